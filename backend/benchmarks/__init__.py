@@ -0,0 +1,8 @@
+"""
+Offline performance benchmarks for the REST API.
+
+Each module is runnable on its own, e.g. ``python -m benchmarks.bench_pagination``,
+and works against a throwaway test database through the in-process test client.
+``python -m benchmarks.suite`` runs the scripted scenarios together and checks
+them against a saved baseline.
+"""
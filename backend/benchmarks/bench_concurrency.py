@@ -0,0 +1,95 @@
+"""
+Load-test running deployments at increasing concurrency and report
+throughput, latency percentiles and errors for each, e.g. the WSGI
+(gunicorn) and ASGI (uvicorn) services of docker-compose.yml:
+
+    docker compose up -d wsgi asgi
+    python -m benchmarks.bench_concurrency --concurrency 1 10 50 100 --duration 10
+
+Each target is NAME=URL; by default the employee list of both services.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.utils import summarize
+
+DEFAULT_TARGETS = [
+    'wsgi=http://localhost:8001/api/employees/',
+    'asgi=http://localhost:8002/api/async/employees/',
+]
+
+
+async def fetch(url, timeout):
+    """
+    GET `url` over a fresh connection and return the status code.
+    """
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, parts.port or 80), timeout
+    )
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+            f'Accept: application/json\r\nConnection: close\r\n\r\n'.encode('ascii')
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    status_line = response.split(b'\r\n', 1)[0].split()
+    return int(status_line[1]) if len(status_line) > 1 else 0
+
+
+async def load(url, concurrency, duration, timeout):
+    samples = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            began = time.perf_counter_ns()
+            try:
+                status = await fetch(url, timeout)
+            except (OSError, asyncio.TimeoutError):
+                status = 0
+            if status == 200:
+                samples.append((time.perf_counter_ns() - began) / 1e6)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'concurrency': concurrency,
+        'requests_per_sec': round(len(samples) / elapsed, 1),
+        'errors': errors,
+        'latency': summarize(samples),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', action='append', help='NAME=URL, may be repeated')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50, 100])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per level')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    targets = dict(target.split('=', 1) for target in args.target or DEFAULT_TARGETS)
+    report = {}
+    for name, url in targets.items():
+        report[name] = [
+            asyncio.run(load(url, concurrency, args.duration, args.timeout))
+            for concurrency in args.concurrency
+        ]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure employee create throughput for each uniqueness validation strategy.
+
+    python -m benchmarks.bench_create --creates 2000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.utils import setup_django, summarize, test_database
+
+
+def legacy_serializer_class():
+    """
+    Rebuild the serializer as it was before set-based validation: the
+    generated UniqueValidators plus one exists() query per unique field.
+    """
+    from rest_framework import serializers
+    from employees.models import Employee
+    from employees.serializers import EmployeeSerializer
+
+    class LegacyEmployeeSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = Employee
+            fields = EmployeeSerializer.Meta.fields
+
+        def validate_email(self, value):
+            if Employee.objects.filter(email=value).exists():
+                raise serializers.ValidationError('Email already exists')
+            return value
+
+        def validate_employee_id(self, value):
+            if Employee.objects.filter(employee_id=value).exists():
+                raise serializers.ValidationError('Employee ID already exists')
+            return value
+
+    return LegacyEmployeeSerializer
+
+
+def run(client, creates, offset):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from benchmarks.datasets import employee_row
+
+    samples = []
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for i in range(offset, offset + creates):
+            payload = {
+                key: value.isoformat() if hasattr(value, 'isoformat') else value
+                for key, value in employee_row(i).items()
+            }
+            began = time.perf_counter_ns()
+            response = client.post(
+                '/api/employees/', json.dumps(payload), content_type='application/json'
+            )
+            samples.append((time.perf_counter_ns() - began) / 1e6)
+            assert response.status_code == 201, response.content
+        elapsed = time.perf_counter() - start
+    return {
+        'creates_per_sec': round(creates / elapsed, 1),
+        'queries_per_create': round(len(queries) / creates, 2),
+        'latency': summarize(samples),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--creates', type=int, default=1000)
+    parser.add_argument('--existing', type=int, default=20000,
+                        help='employees seeded beforehand so lookups hit a real index')
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from unittest import mock
+    from django.test import Client
+    from django.test.utils import override_settings
+    from benchmarks.datasets import seed_employees
+    from employees.views import EmployeeViewSet
+
+    report = {}
+    with test_database(), override_settings(ALLOWED_HOSTS=['testserver'], DEBUG=True):
+        seed_employees(args.existing)
+        client = Client()
+        offset = args.existing
+        with mock.patch.object(EmployeeViewSet, 'serializer_class', legacy_serializer_class()):
+            report['before'] = run(client, args.creates, offset)
+        offset += args.creates
+        report['single_query'] = run(client, args.creates, offset)
+        offset += args.creates
+        with override_settings(UNIQUE_PRECHECK=False):
+            report['constraint_only'] = run(client, args.creates, offset)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
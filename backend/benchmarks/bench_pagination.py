@@ -0,0 +1,73 @@
+"""
+Compare deep-page latency of page-number and keyset pagination.
+
+    python -m benchmarks.bench_pagination --employees 200000 --tasks 200000
+"""
+import argparse
+import json
+
+from benchmarks.utils import setup_django, summarize, test_database, time_calls
+
+
+def bench_endpoint(client, url, model, ordering, pages, page_size, repeat):
+    from core.pagination import KeysetPagination
+
+    paginator = KeysetPagination(ordering)
+    paginator.base_url = f'http://testserver{url}?page_size={page_size}'
+    results = []
+    total = model.objects.count()
+    for page in pages:
+        offset = (page - 1) * page_size
+        if offset >= total:
+            continue
+        page_url = f'{url}?page={page}'
+        # Start the keyset request right after the last row of the previous page,
+        # which is what a client following `next` links would send.
+        if offset:
+            anchor = model.objects.order_by(*ordering)[offset - 1]
+            cursor_url = paginator.encode_cursor(paginator.get_position(anchor))
+        else:
+            cursor_url = paginator.base_url + '&pagination=cursor'
+        results.append({
+            'page': page,
+            'page_number': summarize(time_calls(lambda: client.get(page_url), repeat)),
+            'keyset': summarize(time_calls(lambda: client.get(cursor_url), repeat)),
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--employees', type=int, default=50000)
+    parser.add_argument('--tasks', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 1000, 4000])
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from benchmarks.datasets import seed_employees, seed_tasks
+    from employees.models import Employee
+    from tasks.models import Task
+
+    with test_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+        seed_employees(args.employees)
+        seed_tasks(args.tasks)
+        client = Client()
+        report = {
+            'employees': bench_endpoint(
+                client, '/api/employees/', Employee, ('-date_of_joining', '-id'),
+                args.pages, 10, args.repeat,
+            ),
+            'tasks': bench_endpoint(
+                client, '/api/tasks/', Task, ('-created_at', '-id'),
+                args.pages, 10, args.repeat,
+            ),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare list serialization throughput and payload size for employees and
+tasks: DRF's per-field path, the compact list serializer, a sparse fieldset,
+and the values_list() fast path, each rendered with the stock JSON renderer
+and with the orjson one.
+
+    python -m benchmarks.bench_serialization --employees 20000 --tasks 20000 --rows 1000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.utils import setup_django, summarize, test_database
+
+
+def run(build, renderer, rows, repeat):
+    """
+    Load and render `rows` rows `repeat` times with `build()`, which returns
+    the list of dicts for one page.
+    """
+    samples = []
+    payload = b''
+    for _ in range(repeat):
+        began = time.perf_counter_ns()
+        payload = renderer.render(build())
+        samples.append((time.perf_counter_ns() - began) / 1e6)
+    latency = summarize(samples)
+    return {
+        'rows_per_sec': round(rows / (latency['mean_ms'] / 1000), 1),
+        'payload_bytes': len(payload),
+        'latency': latency,
+    }
+
+
+def list_modes(serializer_class, page, sparse=None, request=None):
+    from rest_framework import serializers
+
+    def values_list():
+        serializer = serializer_class([], many=True)
+        columns = serializer.value_columns()
+        return serializer.rows_to_representation(page().values_list(*columns), columns)
+
+    modes = {
+        'model_serializer': lambda: serializers.ListSerializer(page(), child=serializer_class()).data,
+        'compact': lambda: serializer_class(page(), many=True).data,
+        'values_list': values_list,
+    }
+    if sparse:
+        modes['compact_sparse'] = lambda: serializer_class(
+            page().only('id', *sparse), many=True, context={'request': request}
+        ).data
+    return modes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--employees', type=int, default=20000)
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=1000, help='rows per rendered page')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from benchmarks.datasets import seed_employees, seed_tasks
+    from core.renderers import FastJSONRenderer
+    from employees.models import Employee
+    from employees.serializers import EmployeeSerializer
+    from tasks.models import Task
+    from tasks.serializers import TaskSerializer
+
+    sparse = ['full_name', 'department']
+    request = Request(APIRequestFactory().get('/api/employees/', {'fields': ','.join(sparse)}))
+    models = {
+        'employees': list_modes(
+            EmployeeSerializer,
+            lambda: Employee.objects.order_by('-date_of_joining', '-id')[:args.rows],
+            sparse, request,
+        ),
+        'tasks': list_modes(
+            TaskSerializer, lambda: Task.objects.order_by('-created_at', '-id')[:args.rows],
+        ),
+    }
+    renderers = {'json': JSONRenderer(), 'orjson': FastJSONRenderer()}
+
+    report = {}
+    with test_database():
+        seed_employees(args.employees)
+        seed_tasks(args.tasks)
+        for model, modes in models.items():
+            report[model] = {
+                f'{mode}+{renderer_name}': run(build, renderer, args.rows, args.repeat)
+                for mode, build in modes.items()
+                for renderer_name, renderer in renderers.items()
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
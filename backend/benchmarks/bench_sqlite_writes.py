@@ -0,0 +1,132 @@
+"""
+Measure concurrent write throughput and "database is locked" errors on a
+SQLite file with the default connection setup, with SQLITE_PRAGMAS, and with
+SQLITE_PRAGMAS plus SQLITE_SERIALIZE_WRITES.
+
+    python -m benchmarks.bench_sqlite_writes --processes 4 --threads 4 --writes 200
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.utils import setup_django, summarize
+
+MODES = {
+    'default': {'SQLITE_PRAGMAS': {}, 'SQLITE_SERIALIZE_WRITES': False},
+    'pragmas': {'SQLITE_SERIALIZE_WRITES': False},
+    'pragmas_serialized': {'SQLITE_SERIALIZE_WRITES': True},
+}
+
+
+def use_database(path):
+    from django.db import connections
+    connections.close_all()
+    connections['default'].settings_dict['NAME'] = path
+
+
+def write_loop(client, writes, worker, results):
+    ok = locked = failed = 0
+    samples = []
+    for i in range(writes):
+        payload = {'title': f'Task {worker}-{i}', 'description': 'benchmark'}
+        began = time.perf_counter_ns()
+        # Alternate creates and updates of the task just created.
+        response = client.post('/api/tasks/', json.dumps(payload), content_type='application/json')
+        if response.status_code == 201 and i % 2:
+            task_id = response.json()['id']
+            response = client.patch(
+                f'/api/tasks/{task_id}/', json.dumps({'completed': True}),
+                content_type='application/json',
+            )
+        samples.append((time.perf_counter_ns() - began) / 1e6)
+        if response.status_code in (200, 201):
+            ok += 1
+        elif b'locked' in response.content:
+            locked += 1
+        else:
+            failed += 1
+    results.append((ok, locked, failed, samples))
+
+
+def worker_process(path, overrides, threads, writes, process_index, queue):
+    from django.db import connections
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    with override_settings(ALLOWED_HOSTS=['testserver'], **overrides):
+        use_database(path)
+        results = []
+
+        def run(index):
+            try:
+                write_loop(Client(), writes, f'{process_index}.{index}', results)
+            finally:
+                connections.close_all()
+
+        pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    queue.put(results)
+
+
+def run_mode(path, overrides, processes, threads, writes):
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    start = time.perf_counter()
+    children = [
+        context.Process(target=worker_process, args=(path, overrides, threads, writes, i, queue))
+        for i in range(processes)
+    ]
+    for child in children:
+        child.start()
+    results = [item for _ in children for item in queue.get()]
+    for child in children:
+        child.join()
+    elapsed = time.perf_counter() - start
+
+    ok = sum(result[0] for result in results)
+    return {
+        'writes_per_sec': round(ok / elapsed, 1),
+        'succeeded': ok,
+        'locked_errors': sum(result[1] for result in results),
+        'other_errors': sum(result[2] for result in results),
+        'latency': summarize([sample for result in results for sample in result[3]]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4, help='threads per process')
+    parser.add_argument('--writes', type=int, default=200, help='requests per thread')
+    args = parser.parse_args(argv)
+
+    setup_django()
+    logging.disable(logging.INFO)
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test.utils import override_settings
+
+    report = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, overrides in MODES.items():
+            path = os.path.join(directory, f'{mode}.sqlite3')
+            # journal_mode is stored in the file, so create it with the
+            # pragmas of the mode as well.
+            with override_settings(**overrides):
+                use_database(path)
+                call_command('migrate', verbosity=0)
+                connections.close_all()
+            report[mode] = run_mode(path, overrides, args.processes, args.threads, args.writes)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import random
+from datetime import date, timedelta
+
+from django.db import transaction
+
+DEPARTMENTS = ['Engineering', 'Sales', 'Marketing', 'Finance', 'HR', 'Support', 'Legal', 'Operations']
+JOB_TITLES = ['Engineer', 'Senior Engineer', 'Manager', 'Analyst', 'Specialist', 'Director']
+LOCATIONS = ['New York', 'London', 'Berlin', 'Bangalore', 'Singapore', 'Remote']
+
+
+def employee_row(i, rng=random):
+    """
+    Return the field values for the `i`-th synthetic employee.
+    """
+    return {
+        'full_name': f'Employee {i}',
+        'date_of_birth': date(1960, 1, 1) + timedelta(days=rng.randrange(15000)),
+        'gender': rng.choice('MFO'),
+        'phone_number': f'+1{i:010d}',
+        'email': f'employee{i}@example.com',
+        'address': f'{i} Main Street, Springfield',
+        'job_title': rng.choice(JOB_TITLES),
+        'department': rng.choice(DEPARTMENTS),
+        'employee_id': f'EMP{i:07d}',
+        'date_of_joining': date(2000, 1, 1) + timedelta(days=rng.randrange(9000)),
+        'work_location': rng.choice(LOCATIONS),
+    }
+
+
+def seed_employees(n, batch_size=5000, seed=0, start=0):
+    """
+    Insert `n` synthetic employees with `bulk_create` and return the count.
+    """
+    from employees.models import Employee
+
+    rng = random.Random(seed)
+    with transaction.atomic():
+        for offset in range(start, start + n, batch_size):
+            stop = min(offset + batch_size, start + n)
+            Employee.objects.bulk_create(
+                [Employee(**employee_row(i, rng)) for i in range(offset, stop)],
+                batch_size=batch_size,
+            )
+    return n
+
+
+def seed_tasks(n, batch_size=5000, seed=0):
+    """
+    Insert `n` synthetic tasks with spread-out `created_at` values.
+    """
+    from django.utils import timezone
+    from tasks.models import Task
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    with transaction.atomic():
+        for offset in range(0, n, batch_size):
+            tasks = [
+                Task(
+                    title=f'Task {i}',
+                    description=f'Description for task {i}',
+                    completed=rng.random() < 0.4,
+                )
+                for i in range(offset, min(offset + batch_size, n))
+            ]
+            created = Task.objects.bulk_create(tasks, batch_size=batch_size)
+            # auto_now_add ignores explicit values, so spread the timestamps afterwards.
+            for task in created:
+                task.created_at = now - timedelta(minutes=rng.randrange(1_000_000))
+            Task.objects.bulk_update(created, ['created_at'], batch_size=batch_size)
+    return n
+
+
+def seed_dataset(employees, tasks, seed=0):
+    """
+    Seed `employees` employees and `tasks` tasks, then rebuild the search
+    indexes and group counts, which bulk_create() leaves behind.
+    """
+    from core.aggregates import registry as aggregates
+    from core.search import registry
+
+    seed_employees(employees, seed=seed)
+    seed_tasks(tasks, seed=seed)
+    for index in [*registry, *aggregates]:
+        index.rebuild()
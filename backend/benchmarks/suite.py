@@ -0,0 +1,306 @@
+"""
+Run the scripted API scenarios (deep list pages, create storms, mixed
+read/write traffic and exports) against the in-process test client, and
+compare the results with a saved baseline.
+
+    python -m benchmarks.suite --save-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.2
+
+With --baseline the exit status is 1 when a scenario's p95 latency grew, or
+its throughput dropped, by more than the threshold.
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.utils import setup_django, summarize, test_database
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def measure(samples, operations, elapsed, unit='requests'):
+    """
+    Return the latency summary of `samples` (ms) plus the throughput of
+    `operations` `unit` in `elapsed` seconds.
+    """
+    return {
+        **summarize(samples),
+        'ops_per_sec': round(operations / elapsed, 1) if elapsed else 0.0,
+        'unit': unit,
+    }
+
+
+def timed(samples, func, *args, **kwargs):
+    began = time.perf_counter_ns()
+    response = func(*args, **kwargs)
+    samples.append((time.perf_counter_ns() - began) / 1e6)
+    assert response.status_code < 400, (response.status_code, response.content[:200])
+    return response
+
+
+def run_requests(requests, warmup=False):
+    """
+    Issue `requests`, a list of `(func, args, kwargs)`, and measure them;
+    with `warmup`, after one unmeasured run of the first (a read).
+    """
+    if warmup and requests:
+        func, args, kwargs = requests[0]
+        func(*args, **kwargs)
+    samples = []
+    started = time.perf_counter()
+    for func, args, kwargs in requests:
+        timed(samples, func, *args, **kwargs)
+    return measure(samples, len(requests), time.perf_counter() - started)
+
+
+def json_body(data):
+    return {'data': json.dumps(data, default=str), 'content_type': 'application/json'}
+
+
+@scenario('list_deep_pages')
+def list_deep_pages(client, options):
+    """
+    The first, middle and last page of both lists, by page number and by
+    keyset cursor.
+    """
+    from core.pagination import KeysetPagination
+    from employees.models import Employee
+    from tasks.models import Task
+
+    results = {}
+    lists = {
+        'employees': (Employee, ('-date_of_joining', '-id')),
+        'tasks': (Task, ('-created_at', '-id')),
+    }
+    page_size = 10
+    for name, (model, ordering) in lists.items():
+        url = f'/api/{name}/'
+        last = max(1, -(-model.objects.count() // page_size))
+        paginator = KeysetPagination(ordering)
+        paginator.base_url = f'http://testserver{url}?pagination=cursor'
+        for depth, page in (('first', 1), ('middle', max(1, last // 2)), ('last', last)):
+            offset = (page - 1) * page_size
+            if offset:
+                anchor = model.objects.order_by(*ordering)[offset - 1]
+                cursor_url = paginator.encode_cursor(paginator.get_position(anchor))
+            else:
+                cursor_url = paginator.base_url
+            results[f'{name}.page_number.{depth}'] = run_requests(
+                [(client.get, (f'{url}?page={page}',), {})] * options.repeat, warmup=True,
+            )
+            results[f'{name}.keyset.{depth}'] = run_requests(
+                [(client.get, (cursor_url,), {})] * options.repeat, warmup=True,
+            )
+    return results
+
+
+@scenario('create_storm')
+def create_storm(client, options):
+    """
+    Back-to-back employee creates, one per request and in bulk requests
+    of 100.
+    """
+    from benchmarks.datasets import employee_row
+
+    # The seeded employees are numbered 0 to employees - 1.
+    start = options.employees
+    single = [
+        (client.post, ('/api/employees/',), json_body(employee_row(i)))
+        for i in range(start, start + options.creates)
+    ]
+    start += options.creates
+    batches = [
+        [employee_row(i) for i in range(offset, min(offset + 100, start + options.creates))]
+        for offset in range(start, start + options.creates, 100)
+    ]
+    bulk = [(client.post, ('/api/employees/bulk/',), json_body(batch)) for batch in batches]
+
+    results = {'employees.single': run_requests(single)}
+    started = time.perf_counter()
+    results['employees.bulk'] = run_requests(bulk)
+    # Throughput of the bulk endpoint in rows rather than requests.
+    results['employees.bulk'].update(
+        ops_per_sec=round(options.creates / (time.perf_counter() - started), 1), unit='rows',
+    )
+    return results
+
+
+@scenario('mixed_read_write')
+def mixed_read_write(client, options):
+    """
+    Task traffic that is 80% reads (list pages and single tasks), 15%
+    updates and 5% creates, in a fixed pseudo-random order.
+    """
+    from tasks.models import Task
+
+    rng = random.Random(options.seed)
+    ids = list(Task.objects.values_list('id', flat=True))
+    pages = max(1, len(ids) // 10)
+    samples = {'read': [], 'write': []}
+    started = time.perf_counter()
+    for i in range(options.mixed):
+        roll = rng.random()
+        if roll < 0.4:
+            timed(samples['read'], client.get, f'/api/tasks/?page={rng.randint(1, min(pages, 50))}')
+        elif roll < 0.8:
+            timed(samples['read'], client.get, f'/api/tasks/{rng.choice(ids)}/')
+        elif roll < 0.95:
+            timed(
+                samples['write'], client.patch, f'/api/tasks/{rng.choice(ids)}/',
+                **json_body({'completed': rng.random() < 0.5}),
+            )
+        else:
+            timed(samples['write'], client.post, '/api/tasks/', **json_body({'title': f'Mixed {i}'}))
+    elapsed = time.perf_counter() - started
+    return {
+        'tasks.all': measure(samples['read'] + samples['write'], options.mixed, elapsed),
+        'tasks.read': measure(samples['read'], len(samples['read']), elapsed),
+        'tasks.write': measure(samples['write'], len(samples['write']), elapsed),
+    }
+
+
+@scenario('export')
+def export(client, options):
+    """
+    Full employee exports, NDJSON and CSV, read to the end.
+    """
+    from employees.models import Employee
+
+    rows = Employee.objects.count()
+    results = {}
+    for export_format in ('ndjson', 'csv'):
+        samples = []
+        started = time.perf_counter()
+        for _ in range(options.exports):
+            def download():
+                response = client.get(f'/api/employees/export/?format={export_format}')
+                b''.join(response.streaming_content)
+                return response
+            timed(samples, download)
+        results[f'employees.{export_format}'] = measure(
+            samples, rows * options.exports, time.perf_counter() - started, unit='rows',
+        )
+    return results
+
+
+def run_suite(options, names):
+    """
+    Seed a throwaway database and run the scenarios `names`, returning
+    `{'<scenario>.<case>': metrics}`.
+    """
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from benchmarks.datasets import seed_dataset
+
+    overrides = {'ALLOWED_HOSTS': ['testserver']}
+    if not options.response_cache:
+        # Measure the views rather than cache hits.
+        overrides['RESPONSE_CACHE_TIMEOUT'] = 0
+
+    # The console log would drown the report (and its cost varies by terminal).
+    logging.disable(logging.INFO)
+    results = {}
+    with test_database(), override_settings(**overrides):
+        seed_dataset(options.employees, options.tasks, seed=options.seed)
+        client = Client()
+        for name in names:
+            for case, metrics in SCENARIOS[name](client, options).items():
+                results[f'{name}.{case}'] = metrics
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms=0.5):
+    """
+    Return a list of regressions of `results` against `baseline`: p95
+    latency up, or throughput down, by more than `threshold` (a fraction).
+    Latency changes below `min_delta_ms` are noise and never count.
+    """
+    regressions = []
+    for key, metrics in sorted(results.items()):
+        before = baseline.get(key)
+        if before is None:
+            continue
+        p95, base_p95 = metrics['p95_ms'], before['p95_ms']
+        if p95 > base_p95 * (1 + threshold) and p95 - base_p95 >= min_delta_ms:
+            regressions.append(f'{key}: p95 {base_p95:.3f}ms -> {p95:.3f}ms')
+        rate, base_rate = metrics['ops_per_sec'], before['ops_per_sec']
+        if rate < base_rate * (1 - threshold):
+            unit = metrics.get('unit', 'requests')
+            regressions.append(f'{key}: {base_rate:.1f} -> {rate:.1f} {unit}/s')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument('--employees', type=int, default=20000)
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20, help='requests per list page')
+    parser.add_argument('--creates', type=int, default=500)
+    parser.add_argument('--mixed', type=int, default=1000, help='requests of the mixed scenario')
+    parser.add_argument('--exports', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--response-cache', action='store_true',
+                        help='keep the list/retrieve response cache on')
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--baseline', metavar='PATH', help='compare with this baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed regression as a fraction (default 0.2)')
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    names = args.scenarios or list(SCENARIOS)
+
+    setup_django()
+    import django
+
+    params = {
+        name: getattr(args, name)
+        for name in ('employees', 'tasks', 'repeat', 'creates', 'mixed', 'exports', 'seed', 'response_cache')
+    }
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.machine(),
+            'params': params,
+        },
+        'results': run_suite(args, names),
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as fp:
+            json.dump(report, fp, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        if baseline['meta'].get('params') != params:
+            print('warning: the baseline was recorded with other parameters', file=sys.stderr)
+        regressions = compare(report['results'], baseline['results'], args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+        print(f'No regressions beyond {args.threshold:.0%} against {args.baseline}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached counts and responses are keyed on model versions that live in
+    # the cache, not the database, so they would outlive each test's rollback.
+    for cache in caches.all():
+        cache.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
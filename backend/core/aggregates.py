@@ -0,0 +1,261 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+# Every GroupCounts, for the reconcile_aggregates command.
+registry = []
+
+# Groups per UPDATE, keeping its parameters under SQLite's limit.
+APPLY_CHUNK_SIZE = 100
+
+_deferred = ContextVar('deferred_count_updates', default=None)
+
+
+@contextmanager
+def deferred_count_updates():
+    """
+    Collect the deltas of every GroupCounts inside the block and apply
+    them when it ends, summed, so per-instance signals (e.g. the
+    post_delete of each row a queryset deletes) cost a few statements in
+    total instead of a few per row. Nothing is applied if the block raises.
+    """
+    if _deferred.get() is not None:
+        yield
+        return
+    pending = defaultdict(Counter)
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+    for counts, deltas in pending.items():
+        counts.apply(deltas)
+
+
+class Dimension:
+    """
+    A grouping of rows by the value of `field`, optionally through the
+    database `expression` used to rebuild the counts. `key` turns both the
+    attribute of an instance and the value of `expression` into the
+    stored group value, so they must agree.
+    """
+
+    def __init__(self, name, field, expression=None, key=str):
+        self.name = name
+        self.field = field
+        self.expression = expression if expression is not None else F(field)
+        self.key = key
+
+    def __repr__(self):
+        return f'<Dimension {self.name}>'
+
+
+class GroupCounts:
+    """
+    Row counts of `model` per value of each of `dimensions`, kept in the
+    `store` model (fields `dimension`, `value` and `count`, unique on the
+    first two) so that reports read one row per group instead of scanning
+    the table.
+
+    The app's signals call `track()` as instances load, and `added()`,
+    `changed()` and `removed()` (or `added_many()`/`changed_many()` for
+    the bulk signals) as they are written; each applies its deltas with
+    one UPDATE, plus an INSERT for new groups.
+    `rebuild()` recounts everything from the model's table.
+    """
+    snapshot_attr = '_group_keys'
+
+    def __init__(self, model, store, dimensions, register=True):
+        self.model = model
+        self.store = store
+        self.dimensions = {dimension.name: dimension for dimension in dimensions}
+        if register:
+            registry.append(self)
+
+    def __repr__(self):
+        return f'<GroupCounts {self.model._meta.label}: {", ".join(self.dimensions)}>'
+
+    def keys(self, instance):
+        return [
+            (dimension.name, dimension.key(getattr(instance, dimension.field)))
+            for dimension in self.dimensions.values()
+        ]
+
+    def track(self, instance):
+        """
+        Remember the groups of `instance` as loaded, to tell later writes
+        which groups it leaves. Instances loaded with some of the fields
+        deferred are looked up again when saved instead.
+        """
+        loaded = all(dimension.field in instance.__dict__ for dimension in self.dimensions.values())
+        setattr(instance, self.snapshot_attr, self.keys(instance) if loaded and instance.pk else None)
+
+    def affected_by(self, update_fields):
+        """
+        Whether a save with `update_fields` (None for all) can move the
+        instance to other groups.
+        """
+        return update_fields is None or any(
+            dimension.field in update_fields for dimension in self.dimensions.values()
+        )
+
+    def stored_keys(self, instance):
+        keys = getattr(instance, self.snapshot_attr, None)
+        if keys is None:
+            fields = [dimension.field for dimension in self.dimensions.values()]
+            values = self.model._default_manager.filter(pk=instance.pk).values(*fields).first()
+            if values is not None:
+                keys = [
+                    (dimension.name, dimension.key(values[dimension.field]))
+                    for dimension in self.dimensions.values()
+                ]
+        return keys or []
+
+    def prepare(self, instance):
+        """
+        Before `instance` is saved: make sure its current groups are known.
+        """
+        if instance.pk is not None and getattr(instance, self.snapshot_attr, None) is None:
+            setattr(instance, self.snapshot_attr, self.stored_keys(instance) or None)
+
+    def added(self, instance):
+        self.added_many([instance])
+
+    def added_many(self, instances):
+        deltas = Counter()
+        for instance in instances:
+            keys = self.keys(instance)
+            deltas.update(keys)
+            setattr(instance, self.snapshot_attr, keys)
+        self.apply(deltas)
+
+    def changed(self, instance):
+        self.changed_many([instance])
+
+    def changed_many(self, instances):
+        deltas = Counter()
+        for instance in instances:
+            keys = self.keys(instance)
+            deltas.update(keys)
+            deltas.subtract(self.stored_keys(instance))
+            setattr(instance, self.snapshot_attr, keys)
+        self.apply(deltas)
+
+    def removed(self, instance):
+        deltas = Counter()
+        deltas.subtract(self.stored_keys(instance))
+        setattr(instance, self.snapshot_attr, None)
+        self.apply(deltas)
+
+    def apply(self, deltas):
+        """
+        Add `deltas`, a Counter of `(dimension, value)` to a number of
+        rows, to the stored counts.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        pending = _deferred.get()
+        if pending is not None:
+            pending[self].update(deltas)
+            return
+        keys = list(deltas)
+        # No transaction of its own: the write that caused the deltas
+        # usually has one, and `rebuild()` repairs counts left behind by a
+        # failure between statements.
+        for start in range(0, len(keys), APPLY_CHUNK_SIZE):
+            chunk = {key: deltas[key] for key in keys[start:start + APPLY_CHUNK_SIZE]}
+            increment = Case(
+                *[When(dimension=dimension, value=value, then=Value(delta))
+                  for (dimension, value), delta in chunk.items()],
+                output_field=IntegerField(),
+            )
+            updated = self.groups(chunk).update(count=F('count') + increment)
+            if updated < len(chunk):
+                self.create_missing(chunk, some_exist=updated > 0)
+
+    def groups(self, keys):
+        condition = Q()
+        for dimension, value in keys:
+            condition |= Q(dimension=dimension, value=value)
+        return self.store._default_manager.filter(condition)
+
+    def create_missing(self, deltas, some_exist=True):
+        existing = set()
+        if some_exist:
+            existing = set(self.groups(deltas).values_list('dimension', 'value'))
+        missing = [
+            self.store(dimension=dimension, value=value, count=delta)
+            for (dimension, value), delta in deltas.items() if (dimension, value) not in existing
+        ]
+        try:
+            with transaction.atomic(using=self.store._default_manager.db):
+                self.store._default_manager.bulk_create(missing)
+        except IntegrityError:
+            # Another writer created some of the groups in the meantime.
+            for group in missing:
+                key = [(group.dimension, group.value)]
+                if not self.groups(key).update(count=F('count') + group.count):
+                    self.store._default_manager.create(
+                        dimension=group.dimension, value=group.value, count=group.count,
+                    )
+
+    def counts(self, dimension):
+        """
+        Return `[(value, count)]` for `dimension`, by value, leaving out
+        groups that have no rows left.
+        """
+        if dimension not in self.dimensions:
+            raise KeyError(dimension)
+        return list(
+            self.store._default_manager
+            .filter(dimension=dimension, count__gt=0)
+            .order_by('value')
+            .values_list('value', 'count')
+        )
+
+    def count_rows(self):
+        """
+        Count the model's rows per group with one GROUP BY per dimension.
+        """
+        expected = Counter()
+        queryset = self.model._default_manager.order_by()
+        for dimension in self.dimensions.values():
+            rows = queryset.values(group=dimension.expression).annotate(rows=Count('pk'))
+            for row in rows:
+                expected[(dimension.name, dimension.key(row['group']))] += row['rows']
+        return expected
+
+    def drift(self):
+        """
+        Return `{(dimension, value): (stored, actual)}` for the groups
+        whose stored count is wrong.
+        """
+        expected = self.count_rows()
+        stored = {
+            (dimension, value): count
+            for dimension, value, count in self.store._default_manager.filter(
+                dimension__in=list(self.dimensions),
+            ).values_list('dimension', 'value', 'count')
+        }
+        return {
+            key: (stored.get(key, 0), expected.get(key, 0))
+            for key in stored.keys() | expected.keys()
+            if stored.get(key, 0) != expected.get(key, 0)
+        }
+
+    def rebuild(self):
+        """
+        Replace the stored counts with a fresh count of the model's table.
+        """
+        expected = self.count_rows()
+        with transaction.atomic(using=self.store._default_manager.db):
+            self.store._default_manager.filter(dimension__in=list(self.dimensions)).delete()
+            self.store._default_manager.bulk_create([
+                self.store(dimension=dimension, value=value, count=count)
+                for (dimension, value), count in sorted(expected.items())
+            ])
+        return len(expected)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from .database import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='core.configure_sqlite')
+        from . import events  # noqa: F401  connects the event broker to committed changes
@@ -13,4 +13,11 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up. The event stream is a plain ASGI app so
+# that it notices clients disconnecting, which Django's handler does not
+# while streaming a response.
+from core.events import EventRouter, EventStreamApp  # noqa: E402
+
+application = EventRouter(django_application, '/api/events/', EventStreamApp())
@@ -0,0 +1,271 @@
+import logging
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counting import approximate_count, count_cache_key
+from .database import serialized_writes
+from .pagination import KeysetPagination, _flip
+from .renderers import FastJSONRenderer
+from .routers import replica_reads
+from .serializers import CompactListSerializer
+
+
+async def acached_count(queryset):
+    """
+    `core.counting.cached_count()` for async code: the count itself runs
+    with `acount()`.
+    """
+    timeout = getattr(settings, 'COUNT_CACHE_TIMEOUT', 0)
+    # The key embeds the model's cache version, read with the blocking cache API.
+    key = await sync_to_async(count_cache_key)(queryset) if timeout else None
+    if key is not None:
+        count = await cache.aget(key)
+        if count is not None:
+            return count
+
+    count = None
+    if getattr(settings, 'COUNT_APPROXIMATE_THRESHOLD', None) is not None:
+        count = await sync_to_async(approximate_count)(queryset)
+    if count is None:
+        count = await queryset.acount()
+
+    if key is not None:
+        await cache.aset(key, count, timeout)
+    return count
+
+
+class AsyncModelView(View):
+    """
+    Async list/retrieve/create/update/destroy for a model, for deployments
+    served by an ASGI server, where a synchronous view ties up a thread for
+    the whole request.
+
+    Responses have the same bodies as the viewset with the same serializer:
+    the list is paginated by page number (`?page=`) or, with
+    `?pagination=cursor`, by keyset (`?page_size=`); `filter_backends` and sparse fieldsets
+    apply as usual. Reads use the async ORM (`aget()`, `acount()`, `async
+    for`) and go to the read replicas. Writes validate and save through the
+    serializer, which is synchronous, in one `sync_to_async()` call. The
+    response cache and conditional GETs of the viewsets do not apply here.
+
+    Route it twice, without and with a `pk` URL keyword argument.
+    """
+    queryset = None
+    serializer_class = None
+    filter_backends = ()
+    keyset_ordering = None
+    page_size = api_settings.PAGE_SIZE
+    page_query_param = 'page'
+    pagination_mode_query_param = 'pagination'
+    http_method_names = ['get', 'post', 'put', 'patch', 'delete', 'head', 'options']
+    renderer = FastJSONRenderer()
+    logger = logging.getLogger('django')
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Like DRF's views: there is no session authentication to protect.
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.request = Request(request, parsers=[JSONParser()])
+        self.args, self.kwargs = args, kwargs
+        safe = request.method in SAFE_METHODS
+        try:
+            with replica_reads() if safe else nullcontext():
+                return await super().dispatch(request, *args, **kwargs)
+        except (Http404, ObjectDoesNotExist):
+            return self.render({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+        except exceptions.APIException as e:
+            detail = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            return self.render(detail, e.status_code)
+        except Exception as e:
+            self.logger.error('Error handling %s %s: %s', request.method, request.path, e, exc_info=True)
+            return self.render({'error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        if data is None:
+            return HttpResponse(status=status_code)
+        content_type = self.renderer.media_type
+        if self.renderer.charset:
+            content_type = f'{content_type}; charset={self.renderer.charset}'
+        return HttpResponse(self.renderer.render(data), status=status_code, content_type=content_type)
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('context', {'request': self.request, 'view': self})
+        return self.serializer_class(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def get_object(self, pk):
+        return await self.get_queryset().aget(pk=pk)
+
+    # HTTP methods
+
+    async def get(self, request, pk=None):
+        if pk is None:
+            return await self.list()
+        return await self.retrieve(pk)
+
+    async def post(self, request, pk=None):
+        if pk is not None:
+            return await self.http_method_not_allowed(request)
+        return await self.create()
+
+    async def put(self, request, pk=None):
+        if pk is None:
+            return await self.http_method_not_allowed(request)
+        return await self.update(pk)
+
+    async def patch(self, request, pk=None):
+        if pk is None:
+            return await self.http_method_not_allowed(request)
+        return await self.update(pk, partial=True)
+
+    async def delete(self, request, pk=None):
+        if pk is None:
+            return await self.http_method_not_allowed(request)
+        return await self.destroy(pk)
+
+    # Actions
+
+    async def list(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        params = self.request.query_params
+        if self.keyset_ordering and (
+            params.get(self.pagination_mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in params
+        ):
+            return self.render(await self.keyset_page(queryset))
+        return self.render(await self.numbered_page(queryset))
+
+    async def retrieve(self, pk):
+        instance = await self.get_object(pk)
+        return self.render(self.get_serializer(instance).data)
+
+    async def create(self):
+        serializer = self.get_serializer(data=self.request.data)
+        await sync_to_async(self.validate_and_save)(serializer)
+        self.logger.info('Created %s %s', self.queryset.model._meta.verbose_name, serializer.instance.pk)
+        return self.render(serializer.data, status.HTTP_201_CREATED)
+
+    async def update(self, pk, partial=False):
+        instance = await self.get_object(pk)
+        serializer = self.get_serializer(instance, data=self.request.data, partial=partial)
+        await sync_to_async(self.validate_and_save)(serializer)
+        self.logger.info('Updated %s %s', self.queryset.model._meta.verbose_name, pk)
+        return self.render(serializer.data)
+
+    async def destroy(self, pk):
+        instance = await self.get_object(pk)
+        await sync_to_async(self.perform_destroy)(instance)
+        self.logger.info('Deleted %s %s', self.queryset.model._meta.verbose_name, pk)
+        return self.render(None, status.HTTP_204_NO_CONTENT)
+
+    def validate_and_save(self, serializer):
+        with serialized_writes():
+            serializer.is_valid(raise_exception=True)
+            # The row and what its signals write (e.g. its change log entry)
+            # commit together.
+            with transaction.atomic():
+                serializer.save()
+
+    def perform_destroy(self, instance):
+        # The write lock is a thread lock, so it must not be held across an
+        # await on the event loop.
+        with serialized_writes():
+            instance.delete()
+
+    # Pagination
+
+    async def serialize_rows(self, queryset):
+        """
+        Render the rows of the (sliced) `queryset`: straight from
+        `values_list()` when the serializer allows it, otherwise through
+        model instances.
+        """
+        serializer = self.get_serializer([], many=True)
+        columns = serializer.value_columns() if isinstance(serializer, CompactListSerializer) else None
+        if columns is None:
+            instances = [instance async for instance in queryset]
+            return instances, await sync_to_async(serializer.to_representation)(instances)
+        key = [field.lstrip('-') for field in self.keyset_ordering or ()]
+        columns = columns + [name for name in key if name not in columns]
+        rows = [row async for row in queryset.values_list(*columns, named=True)]
+        return rows, serializer.rows_to_representation(rows, columns)
+
+    async def numbered_page(self, queryset):
+        page_size = self.page_size
+        page_number = self.request.query_params.get(self.page_query_param, 1)
+        try:
+            page_number = int(page_number)
+        except ValueError:
+            page_number = 0 if page_number != 'last' else None
+
+        count = await acached_count(queryset)
+        num_pages = max(1, -(-count // page_size))
+        if page_number is None:
+            page_number = num_pages
+        if not 1 <= page_number <= num_pages:
+            raise exceptions.NotFound('Invalid page.')
+
+        offset = (page_number - 1) * page_size
+        _, results = await self.serialize_rows(queryset[offset:offset + page_size])
+        url = self.request.build_absolute_uri()
+        next_url = previous_url = None
+        if page_number < num_pages:
+            next_url = replace_query_param(url, self.page_query_param, page_number + 1)
+        if page_number == 2:
+            previous_url = remove_query_param(url, self.page_query_param)
+        elif page_number > 2:
+            previous_url = replace_query_param(url, self.page_query_param, page_number - 1)
+        return {'count': count, 'next': next_url, 'previous': previous_url, 'results': results}
+
+    async def keyset_page(self, queryset):
+        paginator = KeysetPagination(self.keyset_ordering)
+        paginator.base_url = self.request.build_absolute_uri()
+        paginator.page_size = paginator.get_page_size(self.request)
+        paginator.model = queryset.model
+        paginator.request = self.request
+
+        position, reverse = paginator.decode_cursor(self.request)
+        ordering = tuple(_flip(field) for field in self.keyset_ordering) if reverse else self.keyset_ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(paginator.get_seek_filter(ordering, position))
+
+        # One extra row tells whether there is a further page.
+        rows, results = await self.serialize_rows(queryset[:paginator.page_size + 1])
+        has_more = len(rows) > paginator.page_size
+        rows, results = rows[:paginator.page_size], results[:paginator.page_size]
+        if reverse:
+            rows.reverse()
+            results.reverse()
+        paginator.page = rows
+        paginator.has_next = position is not None if reverse else has_more
+        paginator.has_previous = has_more if reverse else position is not None
+        return {
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': results,
+        }
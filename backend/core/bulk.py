@@ -0,0 +1,336 @@
+import logging
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .serializers import CompactListSerializer
+from .signals import post_bulk_create, post_bulk_update
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit.
+IN_QUERY_CHUNK_SIZE = 500
+
+
+def unique_value_owners(model, field, values):
+    """
+    Map each of `values` that is already stored in `model.field` to the pk
+    of the row holding it, using one IN query per chunk of values.
+    """
+    values = list(values)
+    owners = {}
+    for start in range(0, len(values), IN_QUERY_CHUNK_SIZE):
+        chunk = values[start:start + IN_QUERY_CHUNK_SIZE]
+        owners.update(
+            model._default_manager
+            .filter(**{f'{field}__in': chunk})
+            .values_list(field, 'pk')
+        )
+    return owners
+
+
+def find_unique_conflicts(model, rows, fields, message_for):
+    """
+    Check the unique `fields` of a batch of `rows` against the database and
+    against each other.
+
+    `rows` is a list of `(pk, attrs)` pairs, `pk` being None for new rows.
+    Returns one error dict per row, empty when the row has no conflict.
+    """
+    errors = [{} for _ in rows]
+    for field in fields:
+        new_values = {
+            attrs[field] for _, attrs in rows if attrs.get(field) is not None
+        }
+        if not new_values:
+            continue
+        # A value held by another row is a conflict even if that row gives it
+        # up in the same batch: unique constraints are checked row by row.
+        owners = unique_value_owners(model, field, new_values)
+        seen = Counter()
+        for index, (pk, attrs) in enumerate(rows):
+            value = attrs.get(field)
+            if value is None:
+                continue
+            seen[value] += 1
+            owner = owners.get(value)
+            taken = owner is not None and owner != pk
+            if taken or seen[value] > 1:
+                errors[index][field] = [message_for(field)]
+    return errors
+
+
+def unique_violation_field(exc, model, fields):
+    """
+    Return which of `fields` an IntegrityError raised for `model` is about,
+    or None when it is not a unique violation on one of them.
+    """
+    message = ' '.join(str(arg) for arg in exc.args)
+    diag = getattr(exc.__cause__, 'diag', None)
+    constraint = getattr(diag, 'constraint_name', None) or ''
+    table = model._meta.db_table
+    for name in fields:
+        column = model._meta.get_field(name).column
+        if (
+            f'{table}.{column}' in message          # SQLite
+            or f'Key ({column})=' in message        # PostgreSQL detail
+            or constraint.startswith(f'{table}_{column}_')
+        ):
+            return name
+    return None
+
+
+@contextmanager
+def unique_violations_as_errors(serializer, messages):
+    """
+    Run a write in a savepoint and turn a unique constraint violation on one
+    of the fields in `messages` into the same 400 body the validators give.
+    """
+    model = serializer.Meta.model
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as exc:
+        field = unique_violation_field(exc, model, messages)
+        if field is None:
+            raise
+        raise serializers.ValidationError({field: [messages[field]]})
+
+
+def is_id(value):
+    # JSON true/false are bools, which are ints equal to 1 and 0.
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def in_bulk_batch(serializer):
+    """
+    True when `serializer` validates one item of a `BulkListSerializer`,
+    which checks uniqueness for the whole batch at once.
+    """
+    return isinstance(serializer.parent, BulkListSerializer)
+
+
+class BulkListSerializer(CompactListSerializer):
+    """
+    List serializer that creates and updates whole batches in one transaction.
+
+    Fields that are unique on the model are checked for the whole batch with
+    one IN query per field instead of one query per item. Validation errors
+    are reported per item, in the same order as the input.
+    """
+    unique_error_message = '{field} already exists'
+
+    def get_unique_fields(self):
+        model = self.child.Meta.model
+        return [
+            field.name for field in model._meta.concrete_fields
+            if field.unique and not field.primary_key and field.name in self.child.fields
+        ]
+
+    def get_unique_error_message(self, field):
+        messages = getattr(self.child, 'unique_error_messages', {})
+        if field in messages:
+            return messages[field]
+        label = self.child.fields[field].label or field
+        return self.unique_error_message.format(field=label)
+
+    def validate_items(self, data):
+        """
+        Validate every item of `data` and return `(validated, errors)`, two
+        lists aligned with `data`. Invalid items have None in `validated`
+        and their error dict in `errors`.
+        """
+        instances = {}
+        if self.instance is not None:
+            instances = {obj.pk: obj for obj in self.instance}
+
+        validated = []
+        errors = []
+        rows = []
+        for item in data:
+            pk = None
+            if self.instance is not None:
+                pk = item.get('id') if isinstance(item, dict) else None
+                if not is_id(pk) or pk not in instances:
+                    validated.append(None)
+                    errors.append({'id': ['Not found.']})
+                    rows.append((None, {}))
+                    continue
+            try:
+                attrs = self.child.run_validation(item)
+            except serializers.ValidationError as exc:
+                validated.append(None)
+                errors.append(exc.detail)
+                rows.append((None, {}))
+            else:
+                validated.append(attrs)
+                errors.append({})
+                rows.append((pk, attrs))
+
+        conflicts = find_unique_conflicts(
+            self.child.Meta.model, rows, self.get_unique_fields(),
+            self.get_unique_error_message,
+        )
+        for index, conflict in enumerate(conflicts):
+            if conflict:
+                validated[index] = None
+                errors[index] = {**conflict, **errors[index]}
+        if self.instance is not None:
+            for index, (pk, attrs) in enumerate(rows):
+                if validated[index] is not None:
+                    validated[index] = {**attrs, 'id': pk}
+        return validated, errors
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(
+                input_type=type(data).__name__
+            )
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message]
+            }, code='not_a_list')
+        if self.max_length is not None and len(data) > self.max_length:
+            message = self.error_messages['max_length'].format(max_length=self.max_length)
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message]
+            }, code='max_length')
+
+        validated, errors = self.validate_items(data)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        with transaction.atomic():
+            instances = model._default_manager.bulk_create(
+                [model(**attrs) for attrs in validated_data]
+            )
+            post_bulk_create.send(sender=model, instances=instances)
+        return instances
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        instances = {obj.pk: obj for obj in instance}
+        # bulk_update() does not run pre_save(), so auto_now fields are set here.
+        auto_now = [
+            field.name for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+        now = timezone.now()
+        updated = []
+        fields = set(auto_now)
+        for attrs in validated_data:
+            obj = instances[attrs.pop('id')]
+            for name, value in attrs.items():
+                setattr(obj, name, value)
+                fields.add(name)
+            for name in auto_now:
+                setattr(obj, name, now)
+            updated.append(obj)
+
+        with transaction.atomic():
+            model._default_manager.bulk_update(updated, sorted(fields))
+            post_bulk_update.send(sender=model, instances=updated)
+        return updated
+
+
+class BulkModelMixin:
+    """
+    Add batch endpoints to a model viewset at `<prefix>/bulk/`:
+
+    * POST a list of objects to create them,
+    * PATCH a list of partial objects with their `id` to update them,
+    * DELETE a list of ids to delete them.
+
+    Each batch is written in a single transaction and is rejected as a whole
+    when any item is invalid; the 400 response then holds one error dict per
+    item, empty for the valid ones. The serializer's `Meta` must set
+    `list_serializer_class = BulkListSerializer`.
+    """
+
+    def get_bulk_max_items(self):
+        return getattr(settings, 'BULK_MAX_ITEMS', 1000)
+
+    def get_bulk_logger(self):
+        return logging.getLogger(self.get_queryset().model._meta.app_label)
+
+    @action(detail=False, methods=['post'], url_path='bulk', url_name='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        logger = self.get_bulk_logger()
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=self.get_bulk_max_items()
+        )
+        if not serializer.is_valid():
+            count = len(request.data) if isinstance(request.data, list) else 0
+            logger.warning('Rejected bulk create of %s items', count)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            serializer.save()
+        except IntegrityError as e:
+            logger.warning('Integrity error in bulk create: %s', e)
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info('Successfully created %s items in bulk', len(serializer.instance))
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        logger = self.get_bulk_logger()
+        ids = []
+        if isinstance(request.data, list):
+            ids = [
+                item.get('id') for item in request.data
+                if isinstance(item, dict) and is_id(item.get('id'))
+            ]
+        instances = list(self.get_queryset().filter(pk__in=ids))
+        serializer = self.get_serializer(
+            instances, data=request.data, many=True, partial=True,
+            max_length=self.get_bulk_max_items(),
+        )
+        if not serializer.is_valid():
+            logger.warning('Rejected bulk update of %s items', len(ids))
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            updated = serializer.save()
+        except IntegrityError as e:
+            logger.warning('Integrity error in bulk update: %s', e)
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info('Successfully updated %s items in bulk', len(updated))
+        return Response(self.get_serializer(updated, many=True).data)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        from .aggregates import deferred_count_updates
+        from .changes import deferred_changes
+        from .search import deferred_index_updates  # core.search imports this module
+
+        logger = self.get_bulk_logger()
+        ids = request.data
+        if not isinstance(ids, list) or not all(is_id(pk) for pk in ids):
+            return Response(
+                {api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of ids.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(ids) > self.get_bulk_max_items():
+            return Response(
+                {api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Ensure this field has no more than {self.get_bulk_max_items()} elements.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(pk__in=ids)
+            found = set(queryset.values_list('pk', flat=True))
+            missing = [pk for pk in ids if pk not in found]
+            # post_delete runs once per row; let the search indexes drop
+            # all of them with one statement, the group counts apply their
+            # deltas summed and the change log insert its tombstones at once.
+            with deferred_index_updates(), deferred_count_updates(), deferred_changes():
+                queryset.delete()
+        logger.info('Successfully deleted %s items in bulk', len(found))
+        return Response({'deleted': len(found), 'not_found': missing})
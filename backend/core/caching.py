@@ -0,0 +1,116 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def model_version_key(model):
+    return f'model-version:{model._meta.label_lower}'
+
+
+def get_model_version(model):
+    """
+    Return the current cache namespace version for `model`.
+
+    Cache keys derived from a model's rows embed this version, so bumping it
+    on writes invalidates them all without having to enumerate the keys.
+    """
+    key = model_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted version never comes back to a
+        # value that older cached entries were stored under.
+        version = time.time_ns()
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def _incr_model_version(model):
+    key = model_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def bump_model_version(model):
+    """
+    Invalidate the cache entries of `model`, now and again when the
+    current transaction commits: a read between the write and its commit
+    still sees the old rows, and would otherwise cache them under the new
+    version.
+    """
+    _incr_model_version(model)
+    transaction.on_commit(lambda: _incr_model_version(model))
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header or not etag:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+class CachedResponseMixin:
+    """
+    Serve `list` and `retrieve` from a read-through response cache.
+
+    Keys combine the model's cache version, the request's scheme, host and
+    path (responses hold absolute links), its query parameters and the
+    negotiated format, so every write to the model
+    (which bumps the version through the app's signals) invalidates all
+    cached pages at once. Cached responses carry an ETag, and a request
+    whose `If-None-Match` matches it gets a 304 without touching the
+    database.
+    """
+    response_cache_alias = None
+
+    def get_response_cache(self):
+        return caches[self.response_cache_alias or getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+    def get_response_cache_key(self, request):
+        model = self.get_queryset().model
+        params = sorted(
+            (key, sorted(values)) for key, values in request.query_params.lists()
+        )
+        raw = f'{request.scheme}://{request.get_host()}{request.path}|{params!r}|{request.accepted_media_type}'
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        return f'response:{model._meta.label_lower}:{get_model_version(model)}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return handler(request, *args, **kwargs)
+
+        cache = self.get_response_cache()
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            data, etag = entry
+            if etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+            return Response(data, headers={'ETag': etag, 'X-Cache': 'HIT'})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            def store(rendered):
+                # Keep a validator ETag set further down, e.g. by ConditionalGetMixin.
+                etag = rendered.get('ETag') or quote_etag(hashlib.md5(rendered.content).hexdigest())
+                rendered['ETag'] = etag
+                rendered['X-Cache'] = 'MISS'
+                cache.set(key, (rendered.data, etag), timeout)
+            response.add_post_render_callback(store)
+        return response
@@ -0,0 +1,88 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .caching import etag_matches
+from .counting import prime_count
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional `list` and `retrieve` requests from `updated_at`.
+
+    Detail validators come from the row's `updated_at`, list validators from
+    `MAX(updated_at)` and the row count of the filtered queryset (the count
+    catches deletes, which leave no timestamp behind). Both ETags also cover
+    the query string and media type, since those change the representation.
+    A request whose validators still match gets a 304 before anything is
+    serialized; otherwise the count is handed on to the paginator.
+    """
+    last_modified_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        uses_keyset = getattr(self, 'uses_keyset_pagination', None)
+        if uses_keyset is not None and uses_keyset():
+            # Keyset pages exist to avoid counting the table, and without the
+            # count deletes would go unnoticed; the response cache still
+            # gives these pages content-based ETags.
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        aggregate = queryset.aggregate(
+            last_modified=Max(self.last_modified_field), count=Count('pk')
+        )
+        prime_count(queryset, aggregate['count'])
+        last_modified = aggregate['last_modified']
+        etag = self.make_etag(request, 'list', last_modified, aggregate['count'])
+        # If-Modified-Since alone cannot see deletes, so lists only honour ETags.
+        return self.conditional_response(
+            request, etag, last_modified, False, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            last_modified = queryset.filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            ).values_list(self.last_modified_field, flat=True).first()
+        except (TypeError, ValueError):
+            last_modified = None
+        if last_modified is None:
+            # Let the regular path produce the 404.
+            return super().retrieve(request, *args, **kwargs)
+        etag = self.make_etag(request, kwargs[lookup_url_kwarg], last_modified)
+        return self.conditional_response(
+            request, etag, last_modified, True, super().retrieve, *args, **kwargs
+        )
+
+    def make_etag(self, request, *parts):
+        raw = '|'.join(str(part) for part in (
+            *parts, request.META.get('QUERY_STRING', ''), request.accepted_media_type,
+        ))
+        return quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+    def conditional_response(self, request, etag, last_modified, use_modified_since,
+                             handler, *args, **kwargs):
+        headers = {'ETag': etag}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified.timestamp())
+
+        if self.is_not_modified(request, etag, last_modified, use_modified_since):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    def is_not_modified(self, request, etag, last_modified, use_modified_since):
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            return etag_matches(request, etag)
+        if use_modified_since and last_modified is not None:
+            since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+            return since is not None and int(last_modified.timestamp()) <= since
+        return False
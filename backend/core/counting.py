@@ -0,0 +1,106 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections, transaction
+
+from .caching import get_model_version
+
+
+def cached_count(queryset):
+    """
+    Return the row count of `queryset`, served from the cache when possible.
+
+    Entries are keyed on the model's cache version and the SQL of the
+    query, so any write to the model invalidates them; `COUNT_CACHE_TIMEOUT`
+    bounds how stale a count can get when writes happen in another process
+    that does not share the cache. Unfiltered counts of tables larger than
+    `COUNT_APPROXIMATE_THRESHOLD` use the planner's row estimate instead.
+    """
+    timeout = getattr(settings, 'COUNT_CACHE_TIMEOUT', 0)
+    key = None
+    if timeout:
+        key = count_cache_key(queryset)
+    if key is not None:
+        count = cache.get(key)
+        if count is not None:
+            return count
+
+    count = approximate_count(queryset)
+    if count is None:
+        count = queryset.count()
+
+    if key is not None:
+        cache.set(key, count, timeout)
+    return count
+
+
+def prime_count(queryset, count):
+    """
+    Store an exact count that was computed elsewhere, e.g. as part of an
+    aggregate, so the paginator does not have to count the same rows again.
+    """
+    timeout = getattr(settings, 'COUNT_CACHE_TIMEOUT', 0)
+    key = count_cache_key(queryset) if timeout else None
+    if key is not None:
+        cache.set(key, count, timeout)
+
+
+def count_cache_key(queryset):
+    """
+    Return the cache key for the count of `queryset`, or None for a query
+    that cannot match anything (e.g. `.none()`) and so has no SQL.
+    """
+    # Neither the ordering nor (without DISTINCT) the selected columns change
+    # a count, so leave them out of the key: a values_list() of a queryset
+    # shares the count of the queryset.
+    queryset = queryset.order_by()
+    if not queryset.query.distinct:
+        queryset = queryset.values_list('pk')
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+    model = queryset.model
+    return f'count:{model._meta.label_lower}:{get_model_version(model)}:{digest}'
+
+
+def approximate_count(queryset):
+    """
+    Return the planner's row estimate for an unfiltered queryset, or None
+    when the table is below the threshold or no estimate is available.
+    """
+    threshold = getattr(settings, 'COUNT_APPROXIMATE_THRESHOLD', None)
+    query = queryset.query
+    if threshold is None or query.where or query.distinct or query.is_sliced:
+        return None
+
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    elif connection.vendor == 'sqlite':
+        # Only populated once ANALYZE has run. The first number of `stat` is
+        # the row count of the table (idx NULL) or of an index, which for a
+        # partial index is only the rows it covers: take the largest.
+        sql = (
+            'SELECT stat FROM sqlite_stat1 WHERE tbl = %s '
+            'ORDER BY idx IS NOT NULL, CAST(stat AS INTEGER) DESC LIMIT 1'
+        )
+    else:
+        return None
+
+    try:
+        # The savepoint keeps a failed lookup from aborting an outer transaction.
+        with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= threshold else None
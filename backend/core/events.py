@@ -0,0 +1,423 @@
+"""
+Live change events for the models of `EVENTS['FEEDS']`: a Server-Sent
+Events stream for ASGI servers (`EventStreamApp`, mounted in core/asgi.py)
+and a long-poll endpoint for WSGI ones (`core.views.poll_events`).
+
+Events are the entries of the change log (core.changes), so an event id is
+a change `seq`: a client that reconnects with `Last-Event-ID` (or
+`?since=`) gets what it missed from the log. Writes in this process reach
+the subscribers at once through `broker`; writes made by other processes
+are found by reading the log every `POLL_INTERVAL` seconds.
+"""
+import asyncio
+import io
+import logging
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import DisallowedHost
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponse, JsonResponse
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+from .changes import render_changes
+from .models import Change
+from .renderers import FastJSONRenderer
+from .signals import changes_committed
+
+logger = logging.getLogger('django')
+
+Event = namedtuple('Event', 'seq model object_id operation')
+
+DEFAULTS = {
+    'FEEDS': {},
+    'QUEUE_SIZE': 1000,
+    'BATCH_SIZE': 500,
+    'HEARTBEAT': 15.0,
+    'POLL_INTERVAL': 5.0,
+    'STREAM_TIMEOUT': 300.0,
+    'LONG_POLL_TIMEOUT': 25.0,
+    'RETRY_MS': 2000,
+    # The stream is served outside of Django's handler; these middleware
+    # (from settings.MIDDLEWARE) still check and decorate its responses.
+    'MIDDLEWARE': [
+        'django.middleware.security.SecurityMiddleware',
+        'corsheaders.middleware.CorsMiddleware',
+    ],
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'EVENTS', {})}
+
+
+class Subscription:
+    """
+    The events of `models` (model labels) published since the subscriber
+    last took them, at most `maxsize`. Past that the subscriber is too slow
+    to keep up: its queue is dropped and it is marked `lagged`, to catch
+    up from the change log instead, so one slow client never holds more
+    than `maxsize` events in memory nor slows down the others.
+
+    Async subscribers pass their event `loop`; the others are woken
+    through a threading.Event.
+    """
+
+    def __init__(self, models, maxsize, loop=None):
+        self.models = frozenset(models)
+        self.maxsize = maxsize
+        self.loop = loop
+        self.pending = deque()
+        self.lagged = False
+        self.lock = threading.Lock()
+        self.ready = asyncio.Event() if loop is not None else threading.Event()
+
+    def push(self, events):
+        events = [event for event in events if event.model in self.models]
+        if not events:
+            return
+        with self.lock:
+            if self.lagged or len(self.pending) + len(events) > self.maxsize:
+                self.pending.clear()
+                self.lagged = True
+            else:
+                self.pending.extend(events)
+        self.notify()
+
+    def notify(self):
+        if self.loop is None:
+            self.ready.set()
+        else:
+            self.loop.call_soon_threadsafe(self.ready.set)
+
+    def take(self):
+        """
+        Return `(events, lagged)` and start over.
+        """
+        with self.lock:
+            events, lagged = list(self.pending), self.lagged
+            self.pending.clear()
+            self.lagged = False
+            self.ready.clear()
+        return events, lagged
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def wait_sync(self, timeout):
+        self.ready.wait(timeout)
+
+
+class EventBroker:
+    """
+    In-process fan-out of committed changes to every subscription.
+    """
+
+    def __init__(self):
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, models, maxsize, loop=None):
+        subscription = Subscription(models, maxsize, loop)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def publish(self, events):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.push(events)
+            except RuntimeError:
+                # The subscriber's event loop is closed.
+                self.unsubscribe(subscription)
+
+
+broker = EventBroker()
+
+
+@receiver(changes_committed)
+def publish_changes(sender, changes, **kwargs):
+    broker.publish([
+        Event(change.seq, change.model, change.object_id, change.operation) for change in changes
+    ])
+
+
+class Feeds:
+    """
+    The feeds of `EVENTS['FEEDS']`, `{name: viewset path}`: each model's
+    changes are rendered with the queryset and serializer of its viewset.
+    """
+
+    def __init__(self, config):
+        self.viewsets = {name: import_string(path) for name, path in config.items()}
+        self.labels = {
+            name: viewset.queryset.model._meta.label_lower for name, viewset in self.viewsets.items()
+        }
+        self.names = {label: name for name, label in self.labels.items()}
+
+    def select(self, value):
+        """
+        Return the model labels of the comma-separated feed names `value`
+        (all feeds when empty), raising ValueError for an unknown one.
+        """
+        names = [name.strip() for name in (value or '').split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.labels]
+        if unknown:
+            raise ValueError(f"Unknown feed(s): {', '.join(unknown)}; use {', '.join(self.labels)}.")
+        return [self.labels[name] for name in names or self.labels]
+
+    def head(self):
+        return Change.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+
+    def read_log(self, models, since, limit):
+        """
+        Return up to `limit` events of `models` after `since`, and whether
+        there are more.
+        """
+        events = [
+            Event(*row) for row in
+            Change.objects.filter(model__in=models, seq__gt=since).order_by('seq')
+            .values_list('seq', 'model', 'object_id', 'operation')[:limit + 1]
+        ]
+        return events[:limit], len(events) > limit
+
+    def render(self, events):
+        """
+        Render `events` as `[(feed name, change)]` in seq order, with one
+        query per model that has upserts.
+        """
+        by_model = {}
+        for event in events:
+            by_model.setdefault(event.model, []).append((event.seq, event.object_id, event.operation))
+        results = []
+        for model, entries in by_model.items():
+            viewset = self.viewsets[self.names[model]]
+            serializer_class = viewset.serializer_class
+            changes = render_changes(
+                entries, viewset.queryset.all(),
+                lambda instances: serializer_class(instances, many=True, context={}).data,
+            )
+            results += [(self.names[model], change) for change in changes]
+        results.sort(key=lambda result: result[1]['seq'])
+        return results
+
+
+def wait_for_events(feeds, models, since, timeout, config=None):
+    """
+    Block for at most `timeout` seconds until events of `models` after
+    `since` exist, and return `(results, next, has_more)` as for the
+    change feed. For the long-poll endpoint; `timeout` is capped by
+    `LONG_POLL_TIMEOUT`.
+    """
+    config = config or get_config()
+    limit = config['LONG_POLL_TIMEOUT']
+    # NaN would make the deadline unreachable.
+    timeout = min(max(timeout, 0.0), limit) if math.isfinite(timeout) else limit
+    poll_interval = config['POLL_INTERVAL'] or timeout
+    deadline = time.monotonic() + timeout
+    subscription = broker.subscribe(models, config['QUEUE_SIZE'])
+    try:
+        while True:
+            events, has_more = feeds.read_log(models, since, config['BATCH_SIZE'])
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                break
+            # Writes of other processes never reach the broker: read the log
+            # again at least every POLL_INTERVAL.
+            subscription.wait_sync(min(remaining, poll_interval))
+            subscription.take()
+    finally:
+        broker.unsubscribe(subscription)
+    next_seq = events[-1].seq if events else since
+    return feeds.render(events), next_seq, has_more
+
+
+def format_event(name, change, renderer=FastJSONRenderer()):
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (change['seq'], name.encode(), renderer.render(change))
+
+
+class EventStreamApp:
+    """
+    ASGI application streaming the change events as Server-Sent Events:
+
+        GET /api/events/?feeds=tasks,employees
+        Last-Event-ID: 1234    (or ?since=1234)
+
+    Each event has the change `seq` as its id, the feed name as its type
+    and the change (as in the `/changes/` feeds) as JSON data. Without an
+    id the stream starts at the current end of the log. Comments keep idle
+    connections open, and the stream ends after `STREAM_TIMEOUT` seconds
+    (EventSource clients reconnect on their own, resuming from the last id)
+    or when the client disconnects.
+
+    Requests still go through ALLOWED_HOSTS and the `EVENTS['MIDDLEWARE']`
+    (security headers, CORS for browser clients on other origins).
+    """
+
+    def __init__(self, config=None):
+        self.config = config
+
+    @cached_property
+    def settings(self):
+        return self.config or get_config()
+
+    @cached_property
+    def feeds(self):
+        return Feeds(self.settings['FEEDS'])
+
+    @cached_property
+    def handler(self):
+        handler = self.accept
+        for path in reversed(self.settings['MIDDLEWARE']):
+            handler = import_string(path)(handler)
+        return handler
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(f"EventStreamApp cannot handle {scope['type']!r} connections")
+        request = ASGIRequest(scope, io.BytesIO())
+        try:
+            # Django's handler would check ALLOWED_HOSTS through CommonMiddleware.
+            request.get_host()
+        except DisallowedHost as e:
+            logger.warning('Rejected event stream request: %s', e)
+            return await self.send_response(send, JsonResponse({'detail': 'Invalid host.'}, status=400))
+
+        response = self.handler(request)
+        if not getattr(response, 'event_stream', False):
+            # Rejected, redirected or a CORS preflight.
+            return await self.send_response(send, response)
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': self.headers(response)})
+        stream = asyncio.ensure_future(self.stream(send, *response.event_stream))
+        disconnect = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        done, _ = await asyncio.wait({stream, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        stream.cancel()
+        disconnect.cancel()
+        if stream in done:
+            if stream.exception() is not None:
+                logger.error('Event stream failed: %s', stream.exception(), exc_info=stream.exception())
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    def accept(self, request):
+        """
+        Validate the request inside the middleware: the response either
+        rejects it or holds the stream's `(models, since)` in `event_stream`.
+        """
+        if request.method != 'GET':
+            return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        try:
+            models = self.feeds.select(request.GET.get('feeds', ''))
+            last_id = request.headers.get('Last-Event-ID') or request.GET.get('since', '')
+            since = int(last_id) if last_id else None
+            if since is not None and since < 0:
+                raise ValueError('Event ids are not negative.')
+        except ValueError as e:
+            return JsonResponse({'detail': str(e)}, status=400)
+
+        response = HttpResponse(content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep proxies such as nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        response.event_stream = (models, since)
+        return response
+
+    def headers(self, response):
+        return [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.items()]
+
+    async def send_response(self, send, response):
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.headers(response),
+        })
+        await send({'type': 'http.response.body', 'body': response.content})
+
+    async def wait_for_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def database(self, func, *args):
+        def call():
+            # No request_started/finished here: honour CONN_MAX_AGE and drop
+            # broken connections like Django does between requests.
+            close_old_connections()
+            return func(*args)
+        return await sync_to_async(call, thread_sensitive=False)()
+
+    async def stream(self, send, models, since):
+        config = self.settings
+        loop = asyncio.get_running_loop()
+        poll_interval = config['POLL_INTERVAL'] or float('inf')
+        subscription = broker.subscribe(models, config['QUEUE_SIZE'], loop=loop)
+        try:
+            await self.write(send, b'retry: %d\n\n' % config['RETRY_MS'])
+            catch_up = since is not None
+            if since is None:
+                since = await self.database(self.feeds.head)
+            deadline = loop.time() + config['STREAM_TIMEOUT']
+            next_poll = loop.time() + poll_interval
+            last_write = loop.time()
+            while loop.time() < deadline:
+                if catch_up:
+                    events, catch_up = await self.database(
+                        self.feeds.read_log, models, since, config['BATCH_SIZE'],
+                    )
+                else:
+                    wake = min(last_write + config['HEARTBEAT'], next_poll, deadline)
+                    await subscription.wait(max(0.0, wake - loop.time()))
+                    events, lagged = subscription.take()
+                    if lagged or loop.time() >= next_poll:
+                        # Too slow for the queue, or time to look for the
+                        # writes of other processes: read the log.
+                        next_poll = loop.time() + poll_interval
+                        catch_up = True
+                        continue
+                    # Catching up may have delivered some of them already.
+                    events = sorted(event for event in events if event.seq > since)
+                if events:
+                    results = await self.database(self.feeds.render, events)
+                    await self.write(send, b''.join(format_event(name, change) for name, change in results))
+                    since = events[-1].seq
+                    last_write = loop.time()
+                elif loop.time() - last_write >= config['HEARTBEAT']:
+                    await self.write(send, b': keep-alive\n\n')
+                    last_write = loop.time()
+        finally:
+            broker.unsubscribe(subscription)
+
+    async def write(self, send, body):
+        await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+
+class EventRouter:
+    """
+    ASGI application sending the requests for `path` to the event stream
+    `app` and all others to the Django `application`.
+    """
+
+    def __init__(self, application, path, app):
+        self.application = application
+        self.path = path
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == self.path:
+            return await self.app(scope, receive, send)
+        return await self.application(scope, receive, send)
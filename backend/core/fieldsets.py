@@ -0,0 +1,74 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def requested_fields(request, available):
+    """
+    Return the set of field names selected by `?fields=` and `?exclude=`
+    (comma-separated) out of `available`, or None when the request selects
+    nothing and every field applies. Reads only; write requests always use
+    every field.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = request.query_params
+    include = _names(params.get(FIELDS_PARAM))
+    exclude = _names(params.get(EXCLUDE_PARAM))
+    if not include and not exclude:
+        return None
+
+    errors = {}
+    for param, names in ((FIELDS_PARAM, include), (EXCLUDE_PARAM, exclude)):
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            errors[param] = [f"Unknown field(s): {', '.join(unknown)}"]
+    if errors:
+        raise ValidationError(errors)
+    return set(include or available) - set(exclude)
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin that renders only the fields selected with `?fields=`
+    and `?exclude=` on the request in the serializer's context.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        names = requested_fields(self.context.get('request'), fields)
+        if names is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in names}
+
+
+class SparseQuerysetMixin:
+    """
+    Viewset mixin that loads only the columns a sparse fieldset renders
+    (plus the primary key and the keyset pagination key) with `.only()`.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        available = serializer_class.Meta.fields
+        if requested_fields(self.request, available) is None:
+            return queryset
+
+        opts = queryset.model._meta
+        columns = {opts.pk.name}
+        for field in serializer_class(context=self.get_serializer_context()).fields.values():
+            try:
+                columns.add(opts.get_field(field.source_attrs[0]).name)
+            except (FieldDoesNotExist, IndexError):
+                # Computed fields: leave the columns of the queryset alone.
+                return queryset
+        columns.update(name.lstrip('-') for name in getattr(self, 'keyset_ordering', None) or ())
+        return queryset.only(*columns)
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+MULTI_VALUE_LOOKUPS = ('in',)
+
+
+class FieldFilterBackend(BaseFilterBackend):
+    """
+    Filter on the lookups a view whitelists in `filter_fields`, e.g.
+
+        filter_fields = {'department': ['exact', 'in'], 'date_of_joining': ['gte', 'lte']}
+
+    accepts `?department=Sales`, `?department__in=Sales,HR` and
+    `?date_of_joining__gte=2020-01-01`. Values are converted with the model
+    field, so malformed values (or values outside a field's choices) give a
+    400 instead of a silently empty page. Other parameters are ignored.
+    """
+    value_separator = ','
+
+    def get_filter_fields(self, view):
+        return getattr(view, 'filter_fields', None) or {}
+
+    def filter_queryset(self, request, queryset, view):
+        conditions, errors = {}, {}
+        opts = queryset.model._meta
+        for name, lookups in self.get_filter_fields(view).items():
+            model_field = opts.get_field(name)
+            for lookup in lookups:
+                param = name if lookup == 'exact' else f'{name}__{lookup}'
+                raw = request.query_params.get(param)
+                if raw is None or raw == '':
+                    continue
+                try:
+                    if lookup in MULTI_VALUE_LOOKUPS:
+                        value = [
+                            self.to_python(model_field, item)
+                            for item in raw.split(self.value_separator) if item
+                        ]
+                    else:
+                        value = self.to_python(model_field, raw)
+                except DjangoValidationError as exc:
+                    errors[param] = exc.messages
+                    continue
+                conditions[f'{name}__{lookup}'] = value
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**conditions) if conditions else queryset
+
+    def to_python(self, model_field, raw):
+        if isinstance(model_field, models.BooleanField) and raw.lower() in ('true', 'false'):
+            # The field itself only knows True/False, t/f and 1/0.
+            raw = raw.capitalize()
+        value = model_field.to_python(raw)
+        if model_field.choices and value not in dict(model_field.flatchoices):
+            raise DjangoValidationError(
+                f'Select a valid choice. {value} is not one of the available choices.'
+            )
+        if isinstance(value, datetime) and settings.USE_TZ and timezone.is_naive(value):
+            # e.g. ?created_at__gte=2024-01-01, read in the current time zone.
+            value = timezone.make_aware(value)
+        return value
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    `OrderingFilter` restricted to the view's `ordering_fields` that appends
+    `id` as a tie-breaker, in the direction of the leading term, so that
+    pages of a sorted list neither repeat nor skip rows.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        ordering = list(ordering)
+        if not any(term.lstrip('-') in ('id', 'pk') for term in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
@@ -0,0 +1,188 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else was passed through `extra`.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+
+    Values passed through `extra=` are emitted as top-level keys, so call
+    sites can log structured data instead of interpolating it into the text.
+    """
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class BatchingFileHandler(logging.FileHandler):
+    """
+    File handler that flushes every `batch_size` records or `flush_interval`
+    seconds instead of after every record.
+    """
+
+    def __init__(self, filename, mode='a', encoding='utf-8', delay=False,
+                 batch_size=100, flush_interval=1.0):
+        super().__init__(filename, mode=mode, encoding=encoding, delay=delay)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+            return
+        self._pending += 1
+        if (self._pending >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        super().flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    Queue listener that also flushes its handlers when the queue has been
+    idle for `flush_interval` seconds, so batched records never sit in a
+    buffer indefinitely.
+    """
+
+    def __init__(self, queue, *handlers, respect_handler_level=True, flush_interval=1.0):
+        super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
+        self.flush_interval = flush_interval
+
+    def _monitor(self):
+        while True:
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush()
+                continue
+            if record is self._sentinel:
+                self.flush()
+                break
+            self.handle(record)
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hand records to a background thread that writes them to file handlers.
+
+    The request thread only pays for putting the record on a bounded queue.
+    When the queue is full, `policy='drop'` discards the record right away
+    and `policy='block'` waits up to `block_timeout` seconds for room before
+    discarding it; discarded records are counted in `dropped`.
+
+    `targets` describes the file handlers, as dicts with `filename` and an
+    optional `level`. They use this handler's formatter, which dictConfig
+    sets through the usual `formatter` key.
+    """
+
+    def __init__(self, targets, queue_size=10000, policy='drop', block_timeout=0.05,
+                 batch_size=100, flush_interval=1.0):
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Unknown log queue policy: {policy!r}")
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.targets = []
+        for spec in targets:
+            handler = BatchingFileHandler(
+                spec['filename'], delay=True,
+                batch_size=batch_size, flush_interval=flush_interval,
+            )
+            handler.setLevel(spec.get('level', logging.NOTSET))
+            self.targets.append(handler)
+        self._start_listener()
+        atexit.register(self.close)
+        # Pre-fork servers copy the handler but not its thread into workers.
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start_listener(self):
+        self.listener = BatchingQueueListener(
+            self.queue, *self.targets, flush_interval=self.flush_interval
+        )
+        self.listener.start()
+
+    def _after_fork(self):
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self._start_listener()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        for handler in self.targets:
+            handler.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Make the record safe to pass to another thread without formatting it:
+        merge the arguments into the message and render the traceback, but
+        keep any `extra` attributes for structured formatters.
+        """
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        listener = getattr(self, 'listener', None)
+        if listener is not None and listener._thread is not None:
+            try:
+                listener.stop()
+            except queue.Full:
+                pass
+        for handler in self.targets:
+            handler.close()
+        super().close()
@@ -1,5 +1,4 @@
 import os
-from datetime import datetime
 
 # Create logs directory if it doesn't exist
 LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
@@ -13,6 +12,30 @@ GENERAL_LOGS = os.path.join(LOGS_DIR, 'general')
 for directory in [EMPLOYEE_LOGS, TASK_LOGS, GENERAL_LOGS]:
     os.makedirs(directory, exist_ok=True)
 
+# File logging runs on a background thread per component (see
+# core/log_handlers.py). Records wait in a bounded queue; when it is full they
+# are dropped ('drop') or the logging call waits briefly for room ('block').
+LOG_QUEUE_SIZE = int(os.environ.get('DJANGO_LOG_QUEUE_SIZE', 10000))
+LOG_QUEUE_POLICY = os.environ.get('DJANGO_LOG_QUEUE_POLICY', 'drop')
+LOG_BATCH_SIZE = int(os.environ.get('DJANGO_LOG_BATCH_SIZE', 100))
+LOG_FLUSH_INTERVAL = float(os.environ.get('DJANGO_LOG_FLUSH_INTERVAL', 1.0))
+
+
+def async_file_handler(*targets):
+    return {
+        '()': 'core.log_handlers.NonBlockingQueueHandler',
+        'level': 'INFO',
+        'formatter': 'json',
+        'targets': [
+            {'filename': filename, 'level': level} for filename, level in targets
+        ],
+        'queue_size': LOG_QUEUE_SIZE,
+        'policy': LOG_QUEUE_POLICY,
+        'batch_size': LOG_BATCH_SIZE,
+        'flush_interval': LOG_FLUSH_INTERVAL,
+    }
+
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -25,6 +48,9 @@ LOGGING = {
             'format': '{levelname} {asctime} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'core.log_handlers.JsonFormatter',
+        },
     },
     'filters': {
         'require_debug_true': {
@@ -38,36 +64,17 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple'
         },
-        'employee_file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(EMPLOYEE_LOGS, 'employee_api.log'),
-            'formatter': 'verbose',
-        },
-        'employee_error_file': {
-            'level': 'ERROR',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(EMPLOYEE_LOGS, 'employee_error.log'),
-            'formatter': 'verbose',
-        },
-        'task_file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(TASK_LOGS, 'task_api.log'),
-            'formatter': 'verbose',
-        },
-        'task_error_file': {
-            'level': 'ERROR',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(TASK_LOGS, 'task_error.log'),
-            'formatter': 'verbose',
-        },
-        'general_file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(GENERAL_LOGS, 'django.log'),
-            'formatter': 'verbose',
-        },
+        'employee_file': async_file_handler(
+            (os.path.join(EMPLOYEE_LOGS, 'employee_api.log'), 'INFO'),
+            (os.path.join(EMPLOYEE_LOGS, 'employee_error.log'), 'ERROR'),
+        ),
+        'task_file': async_file_handler(
+            (os.path.join(TASK_LOGS, 'task_api.log'), 'INFO'),
+            (os.path.join(TASK_LOGS, 'task_error.log'), 'ERROR'),
+        ),
+        'general_file': async_file_handler(
+            (os.path.join(GENERAL_LOGS, 'django.log'), 'INFO'),
+        ),
     },
     'loggers': {
         'django': {
@@ -76,12 +83,12 @@ LOGGING = {
             'propagate': True,
         },
         'employees': {
-            'handlers': ['console', 'employee_file', 'employee_error_file'],
+            'handlers': ['console', 'employee_file'],
             'level': 'INFO',
             'propagate': False,
         },
         'tasks': {
-            'handlers': ['console', 'task_file', 'task_error_file'],
+            'handlers': ['console', 'task_file'],
             'level': 'INFO',
             'propagate': False,
         },
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.search import registry
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search indexes from their tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.Model',
+            help='Only rebuild the indexes of these models (default: all).',
+        )
+
+    def handle(self, *args, **options):
+        labels = {label.lower() for label in options['models']}
+        indexes = [
+            index for index in registry
+            if not labels or index.model._meta.label_lower in labels
+        ]
+        unknown = labels - {index.model._meta.label_lower for index in indexes}
+        if unknown:
+            raise CommandError(f"No search index for: {', '.join(sorted(unknown))}")
+        for index in indexes:
+            index.rebuild()
+            self.stdout.write(f'Rebuilt {index!r}')
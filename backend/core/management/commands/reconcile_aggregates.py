@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.aggregates import registry
+
+
+class Command(BaseCommand):
+    help = 'Recount the materialized group counts from their tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.Model',
+            help='Only reconcile the counts of these models (default: all).',
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Report the groups whose stored count is wrong, without fixing them; '
+                 'exit with status 1 if there are any.',
+        )
+
+    def handle(self, *args, **options):
+        labels = {label.lower() for label in options['models']}
+        aggregates = [
+            counts for counts in registry
+            if not labels or counts.model._meta.label_lower in labels
+        ]
+        unknown = labels - {counts.model._meta.label_lower for counts in aggregates}
+        if unknown:
+            raise CommandError(f"No group counts for: {', '.join(sorted(unknown))}")
+        drifted = 0
+        for counts in aggregates:
+            drift = counts.drift()
+            for (dimension, value), (stored, actual) in sorted(drift.items()):
+                self.stdout.write(f'{counts.model._meta.label} {dimension}={value}: stored {stored}, actual {actual}')
+            drifted += len(drift)
+            if not options['check']:
+                groups = counts.rebuild()
+                self.stdout.write(f'Rebuilt {counts!r}: {groups} groups, {len(drift)} corrected')
+        if options['check'] and drifted:
+            raise CommandError(f'{drifted} group counts are out of date', returncode=1)
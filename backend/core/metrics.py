@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from glob import glob
+
+from django.conf import settings
+
+# Upper bounds of the histogram buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name -> (type, help text, histogram bounds)
+METRICS = {
+    'http_requests_total': (
+        'counter', 'HTTP requests by route, method and status code.', None,
+    ),
+    'http_request_duration_seconds': (
+        'histogram', 'Time spent serving HTTP requests.', DURATION_BUCKETS,
+    ),
+    'http_response_size_bytes': (
+        'histogram', 'Size of HTTP response bodies.', SIZE_BUCKETS,
+    ),
+    'http_request_db_queries': (
+        'histogram', 'SQL queries issued while serving an HTTP request.', QUERY_COUNT_BUCKETS,
+    ),
+    'http_request_db_duration_seconds': (
+        'histogram', 'Time spent in SQL queries while serving an HTTP request.', DURATION_BUCKETS,
+    ),
+}
+
+
+class Histogram:
+    """
+    Bucket counts plus count and sum, Prometheus style.
+    """
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # One slot per bound plus the +Inf bucket.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip((*self.bounds, float('inf')), self.counts):
+            running += count
+            yield bound, running
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of this process, keyed by metric name and labels.
+
+    Under a pre-fork server every worker has its own registry. When
+    `METRICS_MULTIPROC_DIR` is set, each worker periodically writes its
+    registry to a file of its own in that directory and a scrape merges all
+    the files, so `/metrics` reports totals for the whole server whichever
+    worker answers it. Files of workers that have exited are kept, so
+    counters never go backwards.
+    """
+
+    def __init__(self):
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # A forked worker starts from zero; its parent's counts are in the
+        # parent's own file.
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._file_name = f'metrics_{os.getpid()}_{time.time_ns()}.json'
+        self._last_flush = 0.0
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(METRICS[name][2])
+            histogram.observe(value)
+
+    def dump(self):
+        with self._lock:
+            return {
+                'counters': [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                'histograms': [
+                    [name, list(labels), histogram.counts, histogram.count, histogram.sum]
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # Multi-process support
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+
+    def maybe_flush(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        if self.directory and time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        directory = self.directory
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self._file_name)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(self.dump(), handle)
+        os.replace(temporary, path)
+        self._last_flush = time.monotonic()
+
+    def collect(self):
+        """
+        Return merged `(counters, histograms)` for every process reporting
+        to the multi-process directory, or just this one without it.
+        """
+        dumps = [self.dump()]
+        if self.directory:
+            self.flush()
+            dumps = []
+            for path in glob(os.path.join(self.directory, 'metrics_*.json')):
+                try:
+                    with open(path) as handle:
+                        dumps.append(json.load(handle))
+                except (OSError, ValueError):
+                    continue
+        return merge_dumps(dumps)
+
+
+def merge_dumps(dumps):
+    counters = {}
+    histograms = {}
+    for dump in dumps:
+        for name, labels, value in dump['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, count, total in dump['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram(METRICS[name][2])
+            histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+            histogram.count += count
+            histogram.sum += total
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def render_exposition(counters, histograms):
+    """
+    Render merged metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for name, (kind, help_text, _) in METRICS.items():
+        series = counters if kind == 'counter' else histograms
+        keys = sorted(key for key in series if key[0] == name)
+        if not keys:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key in keys:
+            labels = key[1]
+            if kind == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {series[key]}')
+                continue
+            histogram = series[key]
+            for bound, count in histogram.cumulative():
+                lines.append(
+                    f'{name}_bucket{_format_labels(labels, [("le", _format_bound(bound))])} {count}'
+                )
+            lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum}')
+            lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def route_name(request):
+    """
+    A low-cardinality name for the route that served `request`: the URL
+    pattern's name (e.g. `employee-detail`), not the concrete path.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries and time spent in them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ns = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration_ns += time.perf_counter_ns() - start
@@ -1,34 +1,225 @@
 import logging
+import random
 import time
-import json
-from django.utils.deprecation import MiddlewareMixin
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http.request import RawPostDataException
+
+from .metrics import QueryCounter, registry, route_name
+from .queries import QueryInspector, install_execute_wrapper
 
 # Get general logger
 logger = logging.getLogger('django')
 
-class RequestLoggingMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        request.start_time = time.time()
-
-    def process_response(self, request, response):
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            
-            log_data = {
-                'path': request.path,
-                'method': request.method,
-                'status_code': response.status_code,
-                'duration': f'{duration:.2f}s',
-                'user': str(request.user),
-            }
-
-            # Add request parameters for non-GET requests
-            if request.method != 'GET':
-                log_data['post_params'] = dict(request.POST)
-                # Remove sensitive information
-                if 'password' in log_data['post_params']:
-                    log_data['post_params']['password'] = '[FILTERED]'
-
-            logger.info(f'Request processed: {json.dumps(log_data)}')
+DEFAULT_REDACT_KEYS = ('password', 'token', 'secret', 'api_key', 'authorization')
+
+
+class MetricsMiddleware:
+    """
+    Record request count, latency, response size and SQL usage per route and
+    method in `core.metrics.registry`.
+
+    Queries are counted with an execute wrapper on every database
+    connection. Under ASGI the ORM runs on the request's sync thread (each
+    request gets its own, see asgiref's ThreadSensitiveContext), so the
+    wrappers are installed on that thread's connections.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        start = time.perf_counter_ns()
+        with install_execute_wrapper(counter):
+            response = self.get_response(request)
+        self.record(request, response, start, counter)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter_ns()
+        stack = await sync_to_async(install_execute_wrapper)(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.record(request, response, start, counter)
+        return response
+
+    def record(self, request, response, start, counter):
+        duration = (time.perf_counter_ns() - start) / 1e9
+        labels = {'route': route_name(request), 'method': request.method}
+        registry.inc('http_requests_total', {**labels, 'status': str(response.status_code)})
+        registry.observe('http_request_duration_seconds', labels, duration)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', labels, len(response.content))
+        if counter is not None:
+            registry.observe('http_request_db_queries', labels, counter.count)
+            registry.observe('http_request_db_duration_seconds', labels, counter.duration_ns / 1e9)
+        registry.maybe_flush()
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+class QueryInspectionMiddleware:
+    """
+    Count and fingerprint the SQL of every request and report N+1
+    suspects: SELECT shapes repeated `REPEAT_THRESHOLD` times or more.
+
+    Configured through the `QUERY_INSPECTION` setting:
+
+    * `ENABLED`: off means the middleware is dropped at startup.
+    * `REPEAT_THRESHOLD`: repeats of one query shape that count as N+1.
+    * `MAX_QUERIES`: also report requests running more queries than this
+      (None for no limit).
+    * `RAISE`: raise `NPlusOneError` instead of logging a warning; None
+      follows `DEBUG`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'QUERY_INSPECTION', {})
+        if not config.get('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.repeat_threshold = config.get('REPEAT_THRESHOLD', 5)
+        self.max_queries = config.get('MAX_QUERIES')
+        self.raise_errors = config.get('RAISE')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inspector = QueryInspector()
+        with install_execute_wrapper(inspector):
+            response = self.get_response(request)
+        self.check(request, inspector)
         return response
+
+    async def __acall__(self, request):
+        inspector = QueryInspector()
+        # See MetricsMiddleware: the ORM runs on the request's sync thread.
+        stack = await sync_to_async(install_execute_wrapper)(inspector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.check(request, inspector)
+        return response
+
+    def check(self, request, inspector):
+        problems = [
+            f'{times}x {shape}' for shape, times in inspector.repeated_selects(self.repeat_threshold)
+        ]
+        if self.max_queries is not None and inspector.count > self.max_queries:
+            problems.insert(0, f'{inspector.count} queries (budget {self.max_queries})')
+        if not problems:
+            return
+        raise_errors = settings.DEBUG if self.raise_errors is None else self.raise_errors
+        if raise_errors:
+            raise NPlusOneError(f"Query problems in {request.method} {request.path}: {'; '.join(problems)}")
+        logger.warning(
+            'Query problems in %s %s: %s', request.method, request.path, '; '.join(problems),
+            extra={'route': route_name(request), 'queries': inspector.count, 'suspects': problems},
+        )
+
+
+class RequestLoggingMiddleware:
+    """
+    Time every request and log a sample of them.
+
+    Configured through the `REQUEST_LOGGING` setting:
+
+    * `SAMPLE_RATE`: fraction of requests that are logged (0.0 - 1.0).
+      Server errors and requests slower than `SLOW_REQUEST_MS` are always
+      logged.
+    * `REDACT_KEYS`: form parameters whose values are replaced by
+      `[FILTERED]`, compared case-insensitively.
+    * `LOG_PARAMS`: whether form parameters of non-GET requests are logged.
+
+    The user is only reported when something else already loaded it, so
+    logging never triggers a session or auth lookup of its own.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'REQUEST_LOGGING', {})
+        self.sample_rate = config.get('SAMPLE_RATE', 1.0)
+        self.slow_request_ms = config.get('SLOW_REQUEST_MS', 1000)
+        self.redact_keys = {key.lower() for key in config.get('REDACT_KEYS', DEFAULT_REDACT_KEYS)}
+        self.log_params = config.get('LOG_PARAMS', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter_ns()
+        response = self.get_response(request)
+        self.record(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter_ns()
+        response = await self.get_response(request)
+        self.record(request, response, start)
+        return response
+
+    def record(self, request, response, start):
+        duration_ms = (time.perf_counter_ns() - start) / 1e6
+        if not self.should_log(response, duration_ms) or not logger.isEnabledFor(logging.INFO):
+            return
+        log_data = {
+            'path': request.path,
+            'route': route_name(request),
+            'method': request.method,
+            'status_code': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'user_id': self.get_user_id(request),
+        }
+        # Add request parameters for non-GET requests
+        if self.log_params and request.method != 'GET':
+            log_data['post_params'] = self.get_params(request)
+        logger.info(
+            'Request processed: %s %s %s %.2fms',
+            request.method, request.path, response.status_code, duration_ms,
+            extra=log_data,
+        )
+
+    def should_log(self, response, duration_ms):
+        if response.status_code >= 500 or duration_ms >= self.slow_request_ms:
+            return True
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def get_user_id(self, request):
+        # AuthenticationMiddleware caches the user here once it is resolved.
+        user = getattr(request, '_cached_user', None)
+        if user is None:
+            return None
+        return user.pk if user.is_authenticated else 'anonymous'
+
+    def get_params(self, request):
+        try:
+            params = request.POST
+        except RawPostDataException:
+            return {}
+        # Remove sensitive information
+        return {
+            key: '[FILTERED]' if key.lower() in self.redact_keys else values
+            for key, values in params.lists()
+        }
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class Change(models.Model):
+    """
+    One write to a synced model, in the order the writes happened: `seq`
+    only grows, so clients ask for the changes after the last one they saw.
+    Written by the apps' signals in the transaction of the write itself,
+    one writer at a time (see core.changes.lock_change_log) so that seqs
+    commit in order.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OPERATION_CHOICES = [
+        (UPSERT, 'Upsert'),
+        (DELETE, 'Delete'),
+    ]
+
+    seq = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    operation = models.CharField(max_length=6, choices=OPERATION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.seq}: {self.operation} {self.model} {self.object_id}"
+
+    class Meta:
+        indexes = [
+            # `?since=` reads one model's changes in sequence order.
+            models.Index(fields=['model', 'seq'], name='change_model_seq_idx'),
+        ]
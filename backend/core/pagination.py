@@ -0,0 +1,225 @@
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counting import cached_count
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite key such as (date_of_joining, id).
+
+    Pages are located with a WHERE clause on the last seen key instead of an
+    OFFSET, and no COUNT(*) is issued, so the cost of a page does not grow
+    with its depth as long as an index matches `ordering`.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering):
+        assert ordering, 'KeysetPagination requires a non-empty ordering.'
+        self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self.ordering if not reverse else tuple(
+            _flip(field) for field in self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(ordering, position))
+
+        # Fetch one extra row to find out whether there is a further page.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return results
+
+    def get_seek_filter(self, ordering, position):
+        """
+        Build the lexicographic "row comes after `position`" condition,
+        e.g. `a < x OR (a = x AND b < y)` for ('-a', '-b').
+        """
+        clauses = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {
+                prior.lstrip('-'): position[prior.lstrip('-')]
+                for prior in ordering[:index]
+            }
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': position[name]}))
+        # The redundant inclusive bound on the leading column lets the
+        # planner turn the OR into a single index range scan.
+        leading = ordering[0].lstrip('-')
+        bound = 'lte' if ordering[0].startswith('-') else 'gte'
+        return Q(**{f'{leading}__{bound}': position[leading]}) & reduce(or_, clauses)
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_position(self, item):
+        return {
+            field.lstrip('-'): getattr(item, field.lstrip('-'))
+            for field in self.ordering
+        }
+
+    def decode_cursor(self, request):
+        """
+        Return `(position, reverse)` for the cursor in the request, where
+        `position` maps key field names to Python values.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = {}
+            for field in self.ordering:
+                name = field.lstrip('-')
+                model_field = self.model._meta.get_field(name)
+                position[name] = model_field.to_python(payload['p'][name])
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {
+            'p': {
+                name: value.isoformat() if hasattr(value, 'isoformat') else value
+                for name, value in position.items()
+            },
+        }
+        if reverse:
+            payload['r'] = 1
+        encoded = b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """
+    Let a viewset switch to `KeysetPagination` with `?pagination=cursor`.
+
+    Requests without the switch keep using `pagination_class`. Links
+    returned in keyset mode carry a `cursor` parameter, which keeps the
+    following pages in keyset mode as well.
+    """
+    keyset_ordering = None
+    keyset_pagination_class = KeysetPagination
+    pagination_mode_query_param = 'pagination'
+
+    def uses_keyset_pagination(self):
+        params = self.request.query_params
+        return bool(self.keyset_ordering) and (
+            params.get(self.pagination_mode_query_param) == 'cursor'
+            or self.keyset_pagination_class.cursor_query_param in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.uses_keyset_pagination():
+            self._paginator = self.keyset_pagination_class(self.keyset_ordering)
+        return super().paginator
+
+
+class CachedCountPaginator(DjangoPaginator):
+    """
+    Django paginator whose total comes from `core.counting.cached_count`.
+    """
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    django_paginator_class = CachedCountPaginator
+
+
+def get_result_count(paginator, response):
+    """
+    Return the number of results behind a list response without running a
+    new query: the total the paginator computed (or that a cached page
+    holds) when there is one, otherwise the number of rows in the response.
+    """
+    page = getattr(paginator, 'page', None)
+    if page is not None and hasattr(page, 'paginator'):
+        return page.paginator.count
+    data = response.data
+    if isinstance(data, dict):
+        if 'count' in data:
+            return data['count']
+        data = data.get('results', [])
+    return len(data or [])
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
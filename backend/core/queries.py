@@ -0,0 +1,96 @@
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN\s*\(\s*%s(?:\s*,\s*%s)*\s*\)', re.IGNORECASE)
+ROWS_RE = re.compile(r'(\([^()]*\))(?:\s*,\s*\1)+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Return the shape of `sql`: literals become `?`/`N`, and IN lists and
+    repeated VALUES rows collapse, so queries that differ only in their
+    values (or in the length of an IN list) share a fingerprint.
+    """
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('N', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    sql = ROWS_RE.sub(r'\1', sql)
+    return WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class QueryInspector:
+    """
+    Database execute wrapper recording the SQL of every query, to count
+    them and find shapes that repeat, the usual sign of an N+1 pattern:
+    one query per row of a list instead of one for the whole list.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def shapes(self):
+        return Counter(fingerprint(sql) for sql in self.queries)
+
+    def repeated_selects(self, threshold):
+        """
+        Return `[(fingerprint, times)]` for the SELECT shapes run at least
+        `threshold` times, most repeated first. Writes are left out: bulk
+        inserts legitimately run the same statement once per batch.
+        """
+        return [
+            (shape, times) for shape, times in self.shapes().most_common()
+            if times >= threshold and shape.upper().startswith('SELECT')
+        ]
+
+
+def install_execute_wrapper(wrapper):
+    """
+    Install `wrapper` on every database connection of the current thread
+    and return an ExitStack that removes it again.
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+@contextmanager
+def inspect_queries():
+    """
+    Record the queries the block runs on the current thread's connections.
+    """
+    inspector = QueryInspector()
+    with install_execute_wrapper(inspector):
+        yield inspector
+
+
+@contextmanager
+def query_budget(max_queries, repeat_threshold=3):
+    """
+    Test helper failing when the block runs more than `max_queries`
+    queries, or any SELECT shape `repeat_threshold` times or more.
+    """
+    with inspect_queries() as inspector:
+        yield inspector
+    problems = []
+    if inspector.count > max_queries:
+        problems.append(f'{inspector.count} queries, over the budget of {max_queries}')
+    for shape, times in inspector.repeated_selects(repeat_threshold):
+        problems.append(f'N+1 suspect, run {times} times: {shape}')
+    if problems:
+        listing = '\n'.join(f'{i}. {sql}' for i, sql in enumerate(inspector.queries, 1))
+        raise AssertionError('\n'.join(problems) + f'\n\nQueries:\n{listing}')
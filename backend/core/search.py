@@ -0,0 +1,252 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections, router
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import exceptions
+from rest_framework.filters import BaseFilterBackend
+
+from .bulk import IN_QUERY_CHUNK_SIZE
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Every SearchIndex, for the rebuild_search_index command.
+registry = []
+
+_deferred = ContextVar('deferred_index_updates', default=None)
+
+
+@contextmanager
+def deferred_index_updates():
+    """
+    Collect the `add()` and `remove()` calls of every index inside the
+    block and run them when it ends, merging consecutive calls into one
+    statement per chunk of rows. Per-instance signals, e.g. the post_delete
+    of each row a queryset deletes, then cost one query instead of one per
+    row. Nothing runs if the block raises.
+    """
+    if _deferred.get() is not None:
+        yield
+        return
+    pending = []
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+    for index, operation, pks in pending:
+        getattr(index, operation)(pks)
+
+
+class SearchIndex:
+    """
+    Ranked full-text index over text columns of `model`.
+
+    On SQLite the index is an FTS5 table (`<db_table>_fts`, keyed by the
+    row id) that the app's signals keep up to date through `add()`,
+    `update()` and `remove()`. On PostgreSQL it is a GIN index on the
+    columns' tsvector, which the database maintains itself, so those calls
+    do nothing.
+
+    Migrations create and drop the index with `create()` and `drop()`,
+    passing the historical model.
+    """
+    tokenizer = 'unicode61 remove_diacritics 2'
+    text_search_config = 'english'
+
+    def __init__(self, model, fields, register=True):
+        self.model = model
+        self.fields = tuple(fields)
+        if register:
+            registry.append(self)
+
+    def __repr__(self):
+        return f'<SearchIndex {self.model._meta.label}: {", ".join(self.fields)}>'
+
+    def affected_by(self, update_fields):
+        """
+        Whether a save with `update_fields` (None for all) can change the
+        indexed text.
+        """
+        return update_fields is None or not set(self.fields).isdisjoint(update_fields)
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+    @property
+    def gin_index(self):
+        return f'{self.table}_search_idx'
+
+    def get_connection(self, write=False):
+        using = router.db_for_write(self.model) if write else router.db_for_read(self.model)
+        return connections[using or 'default']
+
+    def columns(self, connection):
+        return [
+            connection.ops.quote_name(self.model._meta.get_field(name).column)
+            for name in self.fields
+        ]
+
+    def tsvector(self, connection):
+        document = " || ' ' || ".join(f"coalesce({column}, '')" for column in self.columns(connection))
+        return f"to_tsvector('{self.text_search_config}', {document})"
+
+    def create(self, connection):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {qn(self.fts_table)} USING fts5('
+                    f"{', '.join(self.columns(connection))}, tokenize='{self.tokenizer}')"
+                )
+                self.fill(cursor, connection)
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {qn(self.gin_index)} '
+                    f'ON {qn(self.table)} USING GIN (({self.tsvector(connection)}))'
+                )
+
+    def drop(self, connection):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'DROP TABLE IF EXISTS {qn(self.fts_table)}')
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f'DROP INDEX IF EXISTS {qn(self.gin_index)}')
+
+    def fill(self, cursor, connection, pks=None):
+        qn = connection.ops.quote_name
+        columns = ', '.join(self.columns(connection))
+        sql = (
+            f'INSERT INTO {qn(self.fts_table)} (rowid, {columns}) '
+            f'SELECT {qn(self.model._meta.pk.column)}, {columns} FROM {qn(self.table)}'
+        )
+        if pks is None:
+            cursor.execute(sql)
+        else:
+            placeholders = ', '.join(['%s'] * len(pks))
+            cursor.execute(f'{sql} WHERE {qn(self.model._meta.pk.column)} IN ({placeholders})', pks)
+
+    def defer(self, operation, pks):
+        """
+        Queue `operation` inside `deferred_index_updates()`; returns False
+        outside of it.
+        """
+        pending = _deferred.get()
+        if pending is None:
+            return False
+        if pending and pending[-1][:2] == (self, operation):
+            pending[-1][2].extend(pks)
+        else:
+            pending.append((self, operation, list(pks)))
+        return True
+
+    def add(self, pks):
+        """
+        Index the new rows with the given primary keys.
+        """
+        if self.defer('add', pks):
+            return
+        connection = self.get_connection(write=True)
+        if connection.vendor != 'sqlite':
+            return
+        pks = list(pks)
+        with connection.cursor() as cursor:
+            for start in range(0, len(pks), IN_QUERY_CHUNK_SIZE):
+                self.fill(cursor, connection, pks[start:start + IN_QUERY_CHUNK_SIZE])
+
+    def update(self, pks):
+        """
+        Re-index the changed rows with the given primary keys.
+        """
+        pks = list(pks)
+        self.remove(pks)
+        self.add(pks)
+
+    def remove(self, pks):
+        if self.defer('remove', pks):
+            return
+        connection = self.get_connection(write=True)
+        if connection.vendor != 'sqlite':
+            return
+        pks = list(pks)
+        with connection.cursor() as cursor:
+            for start in range(0, len(pks), IN_QUERY_CHUNK_SIZE):
+                chunk = pks[start:start + IN_QUERY_CHUNK_SIZE]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    f'DELETE FROM {connection.ops.quote_name(self.fts_table)} '
+                    f'WHERE rowid IN ({placeholders})', chunk
+                )
+
+    def rebuild(self):
+        """
+        Rebuild the whole index from the model's table.
+        """
+        connection = self.get_connection(write=True)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(self.fts_table)}')
+                self.fill(cursor, connection)
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f'REINDEX INDEX {connection.ops.quote_name(self.gin_index)}')
+
+    def search(self, queryset, text):
+        """
+        Filter `queryset` to rows matching every word of `text` (as a
+        prefix) and order them by relevance, best first. Raises a DRF
+        ValidationError (a 400) on databases without full-text search.
+        """
+        tokens = TOKEN_RE.findall(text)
+        if not tokens:
+            return queryset.none()
+        connection = connections[queryset.db]
+        qn = connection.ops.quote_name
+        pk = f'{qn(self.table)}.{qn(self.model._meta.pk.column)}'
+        if connection.vendor == 'sqlite':
+            fts = qn(self.fts_table)
+            match = ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+            condition = RawSQL(
+                f'{pk} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)', [match],
+                output_field=BooleanField(),
+            )
+            # bm25() is lower for better matches.
+            rank = RawSQL(
+                f'SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = {pk}', [match],
+                output_field=FloatField(),
+            )
+        elif connection.vendor == 'postgresql':
+            query = ' & '.join(f'{token}:*' for token in tokens)
+            tsquery = f"to_tsquery('{self.text_search_config}', %s)"
+            condition = RawSQL(
+                f'{self.tsvector(connection)} @@ {tsquery}', [query], output_field=BooleanField(),
+            )
+            rank = RawSQL(
+                f'ts_rank({self.tsvector(connection)}, {tsquery})', [query], output_field=FloatField(),
+            )
+        else:
+            # Nothing indexes the text elsewhere: a client error, not a crash.
+            raise exceptions.ValidationError(f'Full-text search is not available on {connection.vendor}.')
+        return queryset.filter(condition).alias(search_rank=rank).order_by('-search_rank', '-pk')
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Search the view's `search_index` with `?q=`, ranking the best matches
+    first. An explicit `?ordering=` applied afterwards overrides the rank.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        index = getattr(view, 'search_index', None)
+        text = request.query_params.get(self.search_param, '').strip()
+        if index is None or not text:
+            return queryset
+        return index.search(queryset, text)
@@ -0,0 +1,204 @@
+from operator import attrgetter, itemgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() returns model values of the matching
+# type unchanged, so the list path can copy the value as is.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+    serializers.RegexField,
+)
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _utc_isoformat(value):
+    # DateTimeField.to_representation() for values already in UTC.
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _is_iso_format(field, default):
+    output_format = getattr(field, 'format', default)
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+def compile_field(field):
+    """
+    Return `(name, source, converter)`, where `converter` turns the
+    non-null value of the attribute `source` into what
+    `field.to_representation()` returns (None when the value passes through
+    unchanged), or None when the field needs the general path.
+    """
+    if field.source == '*' or len(field.source_attrs) != 1:
+        return None
+    if isinstance(field, (serializers.BaseSerializer, RelatedField, ManyRelatedField)):
+        return None
+    source = field.source_attrs[0]
+    field_class = type(field)
+    if field_class in PASSTHROUGH_FIELDS:
+        return field.field_name, source, None
+    if field_class is serializers.DateField and _is_iso_format(field, api_settings.DATE_FORMAT):
+        return field.field_name, source, _isoformat
+    if field_class is serializers.DateTimeField and _is_iso_format(field, api_settings.DATETIME_FORMAT):
+        # Databases hand back aware datetimes in UTC, so when UTC is also the
+        # output timezone enforce_timezone() has nothing to do.
+        output_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if settings.USE_TZ and getattr(output_timezone, 'key', str(output_timezone)) == 'UTC':
+            return field.field_name, source, _utc_isoformat
+    return field.field_name, source, field.to_representation
+
+
+class CompactListSerializer(serializers.ListSerializer):
+    """
+    List serializer that renders rows through accessors compiled once per
+    list instead of DRF's per-field `get_attribute()`/`to_representation()`
+    calls for every row. The output is the same as the child's; children
+    that override `to_representation` keep the regular path.
+
+    When every field maps to a concrete column, `value_columns()` names the
+    columns to select with `values_list()` and `rows_to_representation()`
+    renders those tuples without building model instances.
+    """
+
+    @cached_property
+    def compiled_fields(self):
+        if type(self.child).to_representation is not serializers.Serializer.to_representation:
+            return None
+        compiled = []
+        for field in self.child._readable_fields:
+            spec = compile_field(field)
+            if spec is None:
+                return None
+            compiled.append(spec)
+        return compiled
+
+    def value_columns(self):
+        """
+        Return the model field names to select for `rows_to_representation()`,
+        or None when some field is not a plain column.
+        """
+        if self.compiled_fields is None:
+            return None
+        opts = self.child.Meta.model._meta
+        columns = []
+        for _, source, _ in self.compiled_fields:
+            try:
+                model_field = opts.get_field(source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.is_relation:
+                return None
+            columns.append(source)
+        return columns
+
+    def rows_to_representation(self, rows, columns):
+        """
+        Render `rows`, tuples of the values of `columns` (which must include
+        those of `value_columns()`), the same way as the instances.
+        """
+        compiled = [
+            (name, itemgetter(columns.index(source)), converter)
+            for name, source, converter in self.compiled_fields
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, getter, converter in compiled:
+                value = getter(row)
+                item[name] = value if value is None or converter is None else converter(value)
+            data.append(item)
+        return data
+
+    def to_representation(self, data):
+        compiled = self.compiled_fields
+        if compiled is None:
+            return super().to_representation(data)
+        compiled = [(name, attrgetter(source), converter) for name, source, converter in compiled]
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        rows = []
+        for instance in iterable:
+            row = {}
+            try:
+                for name, getter, converter in compiled:
+                    value = getter(instance)
+                    if value is None or converter is None:
+                        row[name] = value
+                    else:
+                        row[name] = converter(value)
+            except AttributeError:
+                # Let the fields report (or skip) what is missing.
+                row = self.child.to_representation(instance)
+            rows.append(row)
+        return rows
+
+
+class FastListMixin:
+    """
+    Viewset mixin serving `list` from `values_list()` rows rendered by a
+    `CompactListSerializer`, without building model instances, whenever the
+    serializer's fields are all plain columns.
+    """
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer([], many=True)
+        columns = None
+        if self.fast_list and isinstance(serializer, CompactListSerializer):
+            columns = serializer.value_columns()
+        if columns is None:
+            return super().list(request, *args, **kwargs)
+
+        # Keyset pagination reads its key from the rows by name.
+        key = [field.lstrip('-') for field in getattr(self, 'keyset_ordering', None) or ()]
+        columns = columns + [name for name in key if name not in columns]
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*columns, named=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.rows_to_representation(page, columns))
+        return Response(serializer.rows_to_representation(queryset, columns))
+
+
+class ChangedFieldsMixin:
+    """
+    ModelSerializer mixin whose `update()` writes only the fields whose
+    validated value differs from the instance's, with
+    `save(update_fields=...)` plus the `auto_now` fields, and skips the
+    write (and so its signals) when nothing changed. The names of the
+    fields written are left in `changed_fields`.
+    """
+
+    def update(self, instance, validated_data):
+        opts = instance._meta
+        if any(opts.get_field(name).many_to_many for name in validated_data):
+            self.changed_fields = list(validated_data)
+            return super().update(instance, validated_data)
+
+        changed = [name for name, value in validated_data.items() if getattr(instance, name) != value]
+        self.changed_fields = changed
+        if not changed:
+            return instance
+        for name in changed:
+            setattr(instance, name, validated_data[name])
+        auto_now = [
+            field.name for field in opts.concrete_fields
+            if getattr(field, 'auto_now', False) and field.name not in changed
+        ]
+        instance.save(update_fields=changed + auto_now)
+        return instance
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from .logging_config import LOGGING
 
@@ -40,11 +41,14 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'corsheaders',
+    'core',
     'employees',
     'tasks',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryInspectionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -90,6 +94,27 @@ DATABASES = {
     }
 }
 
+# Aliases in DATABASES that safe requests of the viewsets read from (see
+# core/routers.py). settings_prod fills this from DATABASE_REPLICA_URLS.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# PRAGMA statements run on every new SQLite connection (core/database.py).
+# WAL lets reads proceed during a write, and busy_timeout makes a writer wait
+# for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -20000,  # KiB
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
+# Queue the write requests of each process on a lock (SQLite only), see
+# core.database.serialized_writes.
+SQLITE_SERIALIZE_WRITES = os.environ.get('DJANGO_SQLITE_SERIALIZE_WRITES', '') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -127,9 +152,80 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# 'default' holds the per-model versions that namespace cached counts and
+# responses; 'responses' holds the response bodies. Both are per-process here,
+# see settings_prod.py for shared backends.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'responses': {
+        'BACKEND': os.environ.get(
+            'RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'responses'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Read-through cache for list/retrieve responses (see core/caching.py).
+# Seconds a response is kept; 0 disables the cache. The caches above are
+# per-process, so multi-worker servers on these settings set it to 0.
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
 # Logging configuration
 LOGGING = LOGGING
 
+# Request logging and latency histograms (see core/middleware.py)
+REQUEST_LOGGING = {
+    'SAMPLE_RATE': float(os.environ.get('DJANGO_REQUEST_LOG_SAMPLE_RATE', 1.0)),
+    'SLOW_REQUEST_MS': 1000,
+    'REDACT_KEYS': ['password', 'token', 'secret', 'api_key', 'authorization'],
+    'LOG_PARAMS': True,
+}
+
+# Per-request SQL inspection (see core.middleware.QueryInspectionMiddleware):
+# warn about (or, with RAISE, fail on) SELECTs repeated REPEAT_THRESHOLD times
+# in one request, the mark of an N+1 query. RAISE None follows DEBUG.
+QUERY_INSPECTION = {
+    'ENABLED': DEBUG or os.environ.get('DJANGO_QUERY_INSPECTION', '') == '1',
+    'REPEAT_THRESHOLD': 5,
+    'MAX_QUERIES': None,
+    'RAISE': None,
+}
+
+# Metrics served at /metrics (see core/metrics.py). Under a multi-worker
+# server point METRICS_MULTIPROC_DIR at a directory shared by the workers
+# and emptied on each server start; every worker writes its metrics there at
+# most once per METRICS_FLUSH_INTERVAL seconds.
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_INTERVAL = 1.0
+
+# Live change events (see core/events.py): the SSE stream of the ASGI app at
+# /api/events/ and its long-poll fallback at /api/events/poll/. FEEDS names
+# the viewsets whose serializers render each model's changes. Subscribers
+# more than QUEUE_SIZE events behind catch up from the change log instead.
+# The log is also read every POLL_INTERVAL seconds, for writes made by other
+# processes. Streams send a comment after HEARTBEAT idle seconds and end
+# after STREAM_TIMEOUT, for the client to reconnect.
+EVENTS = {
+    'FEEDS': {
+        'tasks': 'tasks.views.TaskViewSet',
+        'employees': 'employees.views.EmployeeViewSet',
+    },
+    'QUEUE_SIZE': 1000,
+    'BATCH_SIZE': 500,
+    'HEARTBEAT': 15.0,
+    'POLL_INTERVAL': 5.0,
+    'STREAM_TIMEOUT': 300.0,
+    'LONG_POLL_TIMEOUT': 25.0,
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 CORS_ALLOWED_ORIGINS = [
@@ -141,10 +237,30 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CachedCountPageNumberPagination',
     'PAGE_SIZE': 10
 }
 
+# Paginated list totals (see core/counting.py)
+# Seconds an exact COUNT(*) is reused for; writes to the model invalidate it
+# earlier. 0 disables the cache.
+COUNT_CACHE_TIMEOUT = int(os.environ.get('COUNT_CACHE_TIMEOUT', 30))
+# Unfiltered lists of tables with at least this many rows report the planner's
+# row estimate instead of an exact count. None always counts exactly.
+COUNT_APPROXIMATE_THRESHOLD = None
+
+# Check unique Employee fields with one query before writing. When False,
+# writes rely on the unique constraints alone and a violation is mapped to
+# the same 400 error body.
+UNIQUE_PRECHECK = True
+
+# Largest batch accepted by the /bulk/ endpoints (see core/bulk.py)
+BULK_MAX_ITEMS = 1000
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -1,3 +1,6 @@
+import os
+
+from .database import databases_from_env
 from .settings import *
 
 # SECURITY WARNING: keep the secret key used in production secret!
@@ -6,6 +9,10 @@ SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = False
 
+# N+1 detection costs a little on every request; opt in with
+# DJANGO_QUERY_INSPECTION=1 (it then logs rather than raises).
+QUERY_INSPECTION = {**QUERY_INSPECTION, 'ENABLED': os.environ.get('DJANGO_QUERY_INSPECTION', '') == '1'}
+
 ALLOWED_HOSTS = ['your-domain.com']  # Replace with your actual domain
 
 # Enable HTTPS/SSL
@@ -14,3 +21,31 @@ SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
+
+# Caches shared by all worker processes, so that a write in one worker
+# invalidates cached counts and responses in the others.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    # Requires the `redis` package.
+    CACHES = {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': alias,
+        }
+        for alias in ('default', 'responses')
+    }
+else:
+    CACHE_DIR = os.environ.get('DJANGO_CACHE_DIR', '/var/tmp/django_cache')
+    CACHES = {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, alias),
+        }
+        for alias in ('default', 'responses')
+    }
+
+# PostgreSQL (or any database given as DATABASE_URL) with persistent
+# connections; see core/database.py for the supported variables. Without
+# DATABASE_URL this falls back to the SQLite file with SQLITE_PRAGMAS.
+DATABASES, DATABASE_REPLICAS = databases_from_env(f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
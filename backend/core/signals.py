@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+# Sent by the bulk write paths in core.bulk, which bypass the per-instance
+# post_save signal. Receivers get `sender` (the model class) and `instances`.
+post_bulk_create = Signal()
+post_bulk_update = Signal()
+
+# Sent by core.changes once the change log entries `changes` (Change
+# instances) are committed.
+changes_committed = Signal()
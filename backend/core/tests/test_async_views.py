@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from benchmarks.datasets import employee_row, seed_employees, seed_tasks
+from core import counting
+from core.async_views import acached_count
+from core.metrics import registry
+from employees.models import Employee
+from tasks.models import Task
+
+
+class SyncAsyncClient:
+    """
+    Drive AsyncClient from a sync test. async_to_sync() sends the ORM
+    calls of the views back to this thread, inside the test's transaction.
+    """
+
+    def __init__(self):
+        self.client = AsyncClient()
+
+    def __getattr__(self, method):
+        return async_to_sync(getattr(self.client, method))
+
+
+@pytest.fixture
+def async_client():
+    return SyncAsyncClient()
+
+
+def payload(i, **overrides):
+    data = {key: str(value) for key, value in employee_row(i).items()}
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    @pytest.mark.parametrize('query', [
+        '',
+        '?page=2',
+        '?department=Sales&ordering=job_title',
+        '?q=employee&fields=id,full_name',
+        '?pagination=cursor&page_size=7',
+    ])
+    def test_employee_list_matches_viewset(self, client, async_client, query):
+        seed_employees(30)
+        expected = client.get(f'/api/employees/{query}').json()
+        response = async_client.get(f'/api/async/employees/{query}')
+        assert response.status_code == 200
+        body = response.json()
+        # Links differ only in their path.
+        for link in ('next', 'previous'):
+            if expected.get(link):
+                expected[link] = expected[link].replace('/api/', '/api/async/')
+        assert body == expected
+
+    def test_keyset_pages_follow_links(self, client, async_client):
+        seed_tasks(25)
+        url = '/api/async/tasks/?pagination=cursor&page_size=10'
+        ids = []
+        while url:
+            body = async_client.get(url).json()
+            ids += [task['id'] for task in body['results']]
+            url = body['next']
+        assert ids == list(Task.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        assert body['previous'] is not None
+
+    def test_invalid_page_and_missing_object(self, async_client):
+        assert async_client.get('/api/async/tasks/?page=5').status_code == 404
+        response = async_client.get('/api/async/tasks/12345/')
+        assert response.status_code == 404
+        assert response.json() == {'detail': 'Not found.'}
+
+    def test_create_update_destroy(self, client, async_client):
+        response = async_client.post(
+            '/api/async/employees/', json.dumps(payload(1)), content_type='application/json'
+        )
+        assert response.status_code == 201
+        employee_id = response.json()['id']
+        assert client.get(f'/api/employees/{employee_id}/').json() == response.json()
+
+        response = async_client.post(
+            '/api/async/employees/', json.dumps(payload(2, email='employee1@example.com')),
+            content_type='application/json',
+        )
+        assert response.status_code == 400
+        assert response.json() == {'email': ['Email already exists']}
+
+        response = async_client.patch(
+            f'/api/async/employees/{employee_id}/', json.dumps({'department': 'Legal'}),
+            content_type='application/json',
+        )
+        assert response.status_code == 200
+        assert response.json()['department'] == 'Legal'
+        # The write went through the model's signals, so the search index and
+        # cached responses follow it.
+        assert client.get('/api/employees/?department=Legal').json()['count'] == 1
+
+        response = async_client.put(
+            f'/api/async/employees/{employee_id}/', json.dumps(payload(1, full_name='Renamed')),
+            content_type='application/json',
+        )
+        assert response.json()['full_name'] == 'Renamed'
+
+        assert async_client.delete(f'/api/async/employees/{employee_id}/').status_code == 204
+        assert not Employee.objects.exists()
+
+    def test_methods_not_allowed(self, async_client):
+        assert async_client.delete('/api/async/tasks/').status_code == 405
+        assert async_client.post('/api/async/tasks/1/', {}).status_code == 405
+
+    def test_async_requests_report_queries(self, async_client):
+        registry.reset()
+        seed_tasks(3)
+        async_client.get('/api/async/tasks/')
+        counters, histograms = registry.collect()
+        labels = (('method', 'GET'), ('route', 'task-async-list'))
+        # One count and one page of rows.
+        assert histograms[('http_request_db_queries', labels)].sum == 2
+        registry.reset()
+
+
+@pytest.mark.django_db
+def test_cached_count_keeps_the_cache_off_the_event_loop(settings):
+    settings.COUNT_CACHE_TIMEOUT = 30
+    threads = []
+
+    def count_cache_key(queryset):
+        threads.append(threading.get_ident())
+        return counting.count_cache_key(queryset)
+
+    with mock.patch('core.async_views.count_cache_key', count_cache_key):
+        # none(): the count needs no query from the executor thread.
+        count = asyncio.run(acached_count(Task.objects.none()))
+    assert count == 0
+    assert threads and threading.get_ident() not in threads
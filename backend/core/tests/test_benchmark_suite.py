@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks import suite
+from benchmarks.datasets import seed_dataset
+
+
+def metrics(p95_ms, ops_per_sec):
+    return {'p95_ms': p95_ms, 'ops_per_sec': ops_per_sec, 'unit': 'requests'}
+
+
+def test_compare_flags_slower_p95_and_lower_throughput():
+    baseline = {'a': metrics(10.0, 100.0), 'b': metrics(10.0, 100.0), 'c': metrics(1.0, 100.0)}
+    results = {
+        'a': metrics(11.0, 95.0),  # within 20%
+        'b': metrics(13.0, 70.0),
+        'c': metrics(1.3, 100.0),  # +30%, but only 0.3ms
+        'new': metrics(50.0, 1.0),  # not in the baseline
+    }
+    assert suite.compare(results, baseline, threshold=0.2) == [
+        'b: p95 10.000ms -> 13.000ms',
+        'b: 100.0 -> 70.0 requests/s',
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', list(suite.SCENARIOS))
+def test_scenarios_run(client, settings, name):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    options = SimpleNamespace(
+        employees=30, tasks=30, repeat=2, creates=5, mixed=20, exports=1, seed=0,
+    )
+    seed_dataset(options.employees, options.tasks)
+    results = suite.SCENARIOS[name](client, options)
+    assert results
+    for case in results.values():
+        assert case['n'] > 0 or case['ops_per_sec'] == 0
+        assert {'p50_ms', 'p95_ms', 'p99_ms', 'ops_per_sec', 'unit'} <= set(case)
@@ -0,0 +1,162 @@
+import json
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient
+
+from benchmarks.datasets import employee_row
+from core.changes import write_changes
+from core.models import Change
+from employees.models import Employee
+from tasks.models import Task
+
+
+def send(client, method, url, data):
+    return getattr(client, method)(url, json.dumps(data), content_type='application/json')
+
+
+def changes(client, since=None, **params):
+    if since is not None:
+        params['since'] = since
+    response = client.get('/api/tasks/changes/', params)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def sync(client, since, limit=100):
+    """
+    Follow the change feed from `since` to its end, like a client would,
+    and return the resulting `{id: row}` and the last `next`.
+    """
+    rows = {}
+    while True:
+        body = changes(client, since, limit=limit)
+        for change in body['results']:
+            if change['op'] == 'delete':
+                rows.pop(change['id'], None)
+            else:
+                rows[change['id']] = change['data']
+        since = body['next']
+        if not body['has_more']:
+            return rows, since
+
+
+@pytest.mark.django_db
+class TestChangeFeed:
+    def test_without_since_returns_the_head(self, client):
+        assert changes(client) == {'since': None, 'next': 0, 'has_more': False, 'results': []}
+        send(client, 'post', '/api/tasks/', {'title': 'One'})
+        head = changes(client)['next']
+        assert head == Change.objects.get().seq
+        assert changes(client, head)['results'] == []
+
+    def test_upserts_and_tombstones_in_sequence_order(self, client):
+        first = send(client, 'post', '/api/tasks/', {'title': 'First'}).json()
+        second = send(client, 'post', '/api/tasks/', {'title': 'Second'}).json()
+        send(client, 'patch', f"/api/tasks/{first['id']}/", {'completed': True})
+        client.delete(f"/api/tasks/{second['id']}/")
+        third = send(client, 'post', '/api/tasks/', {'title': 'Third'}).json()
+
+        body = changes(client, 0)
+        # One entry per task, for its latest change.
+        assert [(change['id'], change['op']) for change in body['results']] == [
+            (first['id'], 'upsert'), (second['id'], 'delete'), (third['id'], 'upsert'),
+        ]
+        seqs = [change['seq'] for change in body['results']]
+        assert seqs == sorted(seqs) and body['next'] == seqs[-1]
+        assert body['results'][0]['data'] == client.get(f"/api/tasks/{first['id']}/").json()
+        assert 'data' not in body['results'][1]
+
+        # Only what happened after `next`.
+        send(client, 'patch', f"/api/tasks/{third['id']}/", {'title': 'Renamed'})
+        later = changes(client, body['next'])
+        assert [change['data']['title'] for change in later['results']] == ['Renamed']
+
+    def test_paging_converges_on_the_table(self, client):
+        ids = [task['id'] for task in send(
+            client, 'post', '/api/tasks/bulk/', [{'title': f'Task {i}'} for i in range(30)]
+        ).json()]
+        send(client, 'patch', '/api/tasks/bulk/', [{'id': pk, 'completed': True} for pk in ids[:10]])
+        send(client, 'delete', '/api/tasks/bulk/', ids[5:15])
+        for pk in ids[20:25]:
+            client.delete(f'/api/tasks/{pk}/')
+
+        rows, since = sync(client, 0, limit=7)
+        assert sorted(rows) == sorted(Task.objects.values_list('pk', flat=True))
+        assert rows[ids[0]] == client.get(f'/api/tasks/{ids[0]}/').json()
+        assert since == Change.objects.order_by('-seq').first().seq
+
+    def test_reads_two_queries(self, client, django_assert_num_queries):
+        send(client, 'post', '/api/tasks/bulk/', [{'title': f'Task {i}'} for i in range(50)])
+        with django_assert_num_queries(2):
+            body = changes(client, 0)
+        assert len(body['results']) == 50
+
+    def test_bulk_destroy_writes_tombstones_at_once(self, client):
+        ids = [task['id'] for task in send(
+            client, 'post', '/api/tasks/bulk/', [{'title': f'Task {i}'} for i in range(20)]
+        ).json()]
+        with mock.patch.object(Change.objects, 'bulk_create', wraps=Change.objects.bulk_create) as insert:
+            send(client, 'delete', '/api/tasks/bulk/', ids)
+        assert insert.call_count == 1
+        assert Change.objects.filter(operation=Change.DELETE).count() == 20
+
+    def test_change_commits_with_the_write(self, client):
+        with mock.patch('tasks.signals.record_changes', side_effect=RuntimeError('log is down')):
+            response = send(client, 'post', '/api/tasks/', {'title': 'Lost'})
+        assert response.status_code == 500
+        assert not Task.objects.exists()
+
+        data = {key: str(value) for key, value in employee_row(1).items()}
+        assert send(client, 'post', '/api/employees/', data).status_code == 201
+        # A rejected write leaves no change behind.
+        assert send(client, 'post', '/api/employees/', data).status_code == 400
+        assert list(Change.objects.values_list('model', 'operation')) == [('employees.employee', 'upsert')]
+
+    def test_feeds_are_per_model(self, client):
+        send(client, 'post', '/api/tasks/', {'title': 'Task'})
+        data = {key: str(value) for key, value in employee_row(1).items()}
+        employee = send(client, 'post', '/api/employees/', data).json()
+        body = client.get('/api/employees/changes/?since=0&fields=id,full_name').json()
+        assert body['results'] == [{
+            'seq': body['next'], 'id': employee['id'], 'op': 'upsert',
+            'data': {'id': employee['id'], 'full_name': 'Employee 1'},
+        }]
+        assert changes(client, 0)['results'][0]['data']['title'] == 'Task'
+
+    def test_async_writes_are_logged(self):
+        client = AsyncClient()
+        response = async_to_sync(client.post)(
+            '/api/async/tasks/', json.dumps({'title': 'Async'}), content_type='application/json',
+        )
+        assert response.status_code == 201
+        assert Change.objects.get().object_id == response.json()['id']
+        async_to_sync(client.delete)(f"/api/async/tasks/{response.json()['id']}/")
+        assert Change.objects.latest('seq').operation == Change.DELETE
+
+    @pytest.mark.parametrize('query', ['since=-1', 'since=abc', 'since=0&limit=0', 'since=0&limit=5000'])
+    def test_invalid_parameters(self, client, query):
+        assert client.get(f'/api/tasks/changes/?{query}').status_code == 400
+
+    def test_employee_writes_log_deletes(self, client):
+        data = {key: str(value) for key, value in employee_row(1).items()}
+        pk = send(client, 'post', '/api/employees/', data).json()['id']
+        Employee.objects.get(pk=pk).delete()
+        body = client.get('/api/employees/changes/?since=0').json()
+        assert body['results'] == [{'seq': body['next'], 'id': pk, 'op': 'delete'}]
+
+    def test_postgresql_writers_take_the_change_log_lock(self):
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            statements.append(sql)
+            if not sql.startswith('LOCK TABLE'):  # SQLite has no LOCK TABLE
+                return execute(sql, params, many, context)
+
+        with mock.patch.object(connection, 'vendor', 'postgresql'), connection.execute_wrapper(capture):
+            write_changes([Change(model='tasks.task', object_id=1, operation=Change.UPSERT)])
+        assert statements[0] == 'LOCK TABLE "core_change" IN SHARE ROW EXCLUSIVE MODE'
+        assert statements[1].startswith('INSERT INTO "core_change"')
+        assert Change.objects.count() == 1
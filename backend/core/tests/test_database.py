@@ -0,0 +1,103 @@
+from unittest import mock
+
+import pytest
+from django.db import connection, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from core import database
+from core.database import database_from_url, databases_from_env
+from core.routers import PrimaryReplicaRouter, reading_from_replicas, replica_reads
+from tasks.models import Task
+from tasks.views import TaskViewSet
+
+
+def test_postgres_url():
+    config = database_from_url('postgres://app:s%40cret@db:6432/crud?sslmode=require', pooled=True)
+    assert config['ENGINE'] == 'django.db.backends.postgresql'
+    assert (config['USER'], config['PASSWORD'], config['HOST'], config['PORT'], config['NAME']) == (
+        'app', 's@cret', 'db', '6432', 'crud'
+    )
+    assert config['OPTIONS'] == {'sslmode': 'require'}
+    assert config['CONN_HEALTH_CHECKS'] is True
+    assert config['DISABLE_SERVER_SIDE_CURSORS'] is True
+
+
+def test_databases_from_env_falls_back_to_sqlite():
+    databases, replicas = databases_from_env('sqlite:////srv/app/db.sqlite3', {
+        'DATABASE_REPLICA_URLS': 'postgres://replica-a/crud, postgres://replica-b/crud',
+        'DJANGO_DB_CONN_MAX_AGE': '0',
+    })
+    assert databases['default']['NAME'] == '/srv/app/db.sqlite3'
+    assert databases['default']['CONN_MAX_AGE'] == 0
+    assert replicas == ['replica_1', 'replica_2']
+    assert databases['replica_2']['HOST'] == 'replica-b'
+    assert databases['replica_1']['TEST'] == {'MIRROR': 'default'}
+
+
+def test_unsupported_scheme():
+    with pytest.raises(ValueError):
+        database_from_url('mysql://db/crud')
+
+
+def test_router_reads_from_replicas_only_when_asked(settings):
+    settings.DATABASE_REPLICAS = ['replica_1']
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Task) is None
+    with replica_reads():
+        assert router.db_for_read(Task) == 'replica_1'
+        assert router.db_for_write(Task) == 'default'
+    assert router.allow_migrate('replica_1', 'tasks') is False
+
+
+@pytest.mark.django_db
+def test_router_keeps_reads_on_primary_in_transactions(settings):
+    settings.DATABASE_REPLICAS = ['replica_1']
+    with replica_reads(), transaction.atomic():
+        assert PrimaryReplicaRouter().db_for_read(Task) == 'default'
+
+
+@pytest.mark.django_db
+def test_viewsets_read_from_replicas_on_safe_methods(client):
+    seen = []
+    original = PrimaryReplicaRouter.db_for_read
+
+    def spy(self, model, **hints):
+        seen.append(reading_from_replicas())
+        return original(self, model, **hints)
+
+    with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', spy):
+        client.get('/api/tasks/')
+        assert seen and all(seen)
+        seen.clear()
+        client.post('/api/tasks/', {'title': 'Write', 'description': 'x'}, content_type='application/json')
+        assert not any(seen)
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_are_applied_to_new_connections(settings, tmp_path):
+    settings.SQLITE_PRAGMAS = {'journal_mode': 'wal', 'synchronous': 'normal'}
+    wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')}, alias='pragmas')
+    try:
+        with wrapper.cursor() as cursor:
+            assert cursor.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert cursor.execute('PRAGMA synchronous').fetchone()[0] == 1
+    finally:
+        wrapper.close()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('enabled', [True, False])
+def test_writes_are_serialized_when_enabled(settings, client, enabled):
+    settings.SQLITE_SERIALIZE_WRITES = enabled
+    held = []
+    original = TaskViewSet.perform_create
+
+    def spy(self, serializer):
+        held.append(database._write_lock.locked())
+        return original(self, serializer)
+
+    with mock.patch.object(TaskViewSet, 'perform_create', spy):
+        response = client.post('/api/tasks/', {'title': 'Write', 'description': 'x'}, content_type='application/json')
+    assert response.status_code == 201
+    assert held == [enabled]
+    assert not database._write_lock.locked()
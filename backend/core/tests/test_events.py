@@ -0,0 +1,329 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+from django.db import connection, connections, transaction
+
+from benchmarks.datasets import seed_employees
+from core.changes import record_changes
+from core.events import (
+    Event, EventRouter, EventStreamApp, Feeds, Subscription, broker, get_config, wait_for_events,
+)
+from core.models import Change
+from tasks.models import Task
+
+
+def config(**overrides):
+    return {**get_config(), **overrides}
+
+
+def parse_events(body):
+    """
+    Return the `(id, event, data)` of the SSE messages in `body`, skipping
+    comments and the retry hint.
+    """
+    events = []
+    for block in body.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'id' in fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def run_stream(app, query='', headers=(), until=None, method='GET', during=None, timeout=5):
+    """
+    Call the ASGI `app` and return `(status, body, finished)`: the client
+    disconnects once `until(events)` holds for the events received, or the
+    app ends the response itself (`finished`). `during` runs in a thread
+    once the stream waits for new events, having subscribed and read the
+    log. The stream reads the database in a single executor thread, whose
+    connection is closed at the end.
+    """
+    messages = []
+    received = asyncio.Event()
+    waiting = threading.Event()
+    wait = Subscription.wait
+
+    async def observed_wait(subscription, timeout):
+        waiting.set()
+        return await wait(subscription, timeout)
+
+    def writer():
+        try:
+            if waiting.wait(timeout):
+                during()
+        finally:
+            connection.close()
+
+    async def receive():
+        await received.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if message['type'] == 'http.response.start' and during is not None:
+            threading.Thread(target=writer).start()
+        body = b''.join(m.get('body', b'') for m in messages)
+        if until is not None and until(parse_events(body)):
+            received.set()
+
+    scope = {
+        'type': 'http', 'method': method, 'path': '/api/events/',
+        'query_string': query.encode(),
+        'headers': [(k.encode(), v.encode()) for k, v in [('host', 'testserver'), *headers]],
+    }
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+        try:
+            await asyncio.wait_for(app(scope, receive, send), timeout)
+        finally:
+            await loop.run_in_executor(None, connections.close_all)
+
+    with mock.patch.object(Subscription, 'wait', observed_wait):
+        asyncio.run(main())
+    body = b''.join(m.get('body', b'') for m in messages)
+    finished = messages[-1].get('more_body') is False
+    return messages[0]['status'], body, finished
+
+
+def response_headers(app, **kwargs):
+    """
+    Return the status and headers of a request to `app` that disconnects
+    at once.
+    """
+    messages = []
+
+    async def receive():
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'method': kwargs.get('method', 'GET'), 'path': '/api/events/', 'query_string': b'',
+        'headers': [(k.encode(), v.encode()) for k, v in kwargs.get('headers', [('host', 'testserver')])],
+    }
+    asyncio.run(app(scope, receive, send))
+    return messages[0]['status'], {k.decode(): v.decode() for k, v in messages[0]['headers']}
+
+
+class TestSubscription:
+    def test_filters_models_and_lags_when_full(self):
+        subscription = broker.subscribe(['tasks.task'], maxsize=3)
+        try:
+            broker.publish([Event(1, 'tasks.task', 1, 'upsert'), Event(2, 'employees.employee', 1, 'upsert')])
+            assert subscription.take() == ([Event(1, 'tasks.task', 1, 'upsert')], False)
+
+            broker.publish([Event(seq, 'tasks.task', seq, 'upsert') for seq in range(3, 7)])
+            # Over the limit: nothing is kept, the subscriber reads the log.
+            assert subscription.take() == ([], True)
+            assert subscription.take() == ([], False)
+        finally:
+            broker.unsubscribe(subscription)
+        broker.publish([Event(7, 'tasks.task', 7, 'upsert')])
+        assert subscription.take() == ([], False)
+
+
+@pytest.mark.django_db
+class TestPublishing:
+    def test_committed_changes_are_published(self, client, django_capture_on_commit_callbacks):
+        subscription = broker.subscribe(['tasks.task', 'employees.employee'], maxsize=100)
+        try:
+            with django_capture_on_commit_callbacks(execute=True):
+                task_id = client.post('/api/tasks/', {'title': 'Live'}, content_type='application/json').json()['id']
+                # Rejected, so rolled back: no event.
+                client.post('/api/employees/', {'email': 'bad'}, content_type='application/json')
+            events, lagged = subscription.take()
+        finally:
+            broker.unsubscribe(subscription)
+        assert events == [Event(Change.objects.get().seq, 'tasks.task', task_id, 'upsert')]
+        assert not lagged
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLongPoll:
+    def test_returns_pending_changes_at_once(self, client):
+        assert client.get('/api/events/poll/').json() == {
+            'since': None, 'next': 0, 'has_more': False, 'results': [],
+        }
+        task = Task.objects.create(title='First')
+        Task.objects.create(title='Second').delete()
+        body = client.get('/api/events/poll/?since=0&feeds=tasks').json()
+        assert [(change['feed'], change['id'], change['op']) for change in body['results']] == [
+            ('tasks', task.pk, 'upsert'), ('tasks', task.pk + 1, 'delete'),
+        ]
+        assert body['results'][0]['data']['title'] == 'First'
+        assert body['next'] == Change.objects.latest('seq').seq
+
+    def test_times_out_empty(self, client):
+        started = time.monotonic()
+        body = client.get('/api/events/poll/?since=0&timeout=0.2').json()
+        assert body == {'since': 0, 'next': 0, 'has_more': False, 'results': []}
+        assert time.monotonic() - started >= 0.2
+
+    @pytest.mark.parametrize('timeout', [float('nan'), float('inf')])
+    def test_wait_is_capped(self, settings, timeout):
+        settings.EVENTS = config(LONG_POLL_TIMEOUT=0.2)
+        feeds = Feeds(get_config()['FEEDS'])
+        started = time.monotonic()
+        assert wait_for_events(feeds, feeds.select(''), 0, timeout) == ([], 0, False)
+        assert time.monotonic() - started < 5
+
+    def test_wakes_on_a_write(self, client, settings):
+        settings.EVENTS = config(POLL_INTERVAL=30)
+        def write():
+            try:
+                Task.objects.create(title='Later')
+            finally:
+                connection.close()
+
+        timer = threading.Timer(0.2, write)
+        started = time.monotonic()
+        timer.start()
+        body = client.get('/api/events/poll/?since=0&timeout=10').json()
+        timer.join()
+        # Woken by the broker, not by reading the log again.
+        assert time.monotonic() - started < 5
+        assert [change['data']['title'] for change in body['results']] == ['Later']
+
+    @pytest.mark.parametrize('query', [
+        'feeds=payroll', 'since=-1', 'since=x', 'since=0&timeout=-1',
+        'since=0&timeout=nan', 'since=0&timeout=inf', 'since=0&timeout=-inf',
+    ])
+    def test_invalid_parameters(self, client, query):
+        assert client.get(f'/api/events/poll/?{query}').status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEventStream:
+    def test_resumes_from_last_event_id(self):
+        first = Task.objects.create(title='Seen')
+        second = Task.objects.create(title='Missed')
+        Task.objects.filter(pk=first.pk).delete()
+        last_seen = Change.objects.filter(object_id=first.pk).earliest('seq').seq
+
+        status, body, _ = run_stream(
+            EventStreamApp(config()), headers=[('last-event-id', str(last_seen))],
+            until=lambda events: len(events) >= 2,
+        )
+        assert status == 200
+        events = parse_events(body)
+        assert [(event, data['id'], data['op']) for _, event, data in events] == [
+            ('tasks', second.pk, 'upsert'), ('tasks', first.pk, 'delete'),
+        ]
+        assert [seq for seq, _, _ in events] == list(
+            Change.objects.filter(seq__gt=last_seen).values_list('seq', flat=True)
+        )
+        assert body.startswith(b'retry: ')
+
+    def test_streams_new_writes_of_the_selected_feeds(self):
+        Task.objects.create(title='Before')
+
+        def write():
+            # One commit, so the stream reads nothing while a write is open.
+            with transaction.atomic():
+                Task.objects.create(title='Ignored').delete()
+                seed_employees(1)  # bulk_create: no signals, no event
+                Task.objects.create(title='After')
+
+        app = EventStreamApp(config(POLL_INTERVAL=30))
+        _, body, _ = run_stream(
+            app, query='feeds=tasks', during=write,
+            until=lambda events: any(data.get('data', {}).get('title') == 'After' for _, _, data in events),
+        )
+        titles = [data.get('data', {}).get('title') for _, _, data in parse_events(body)]
+        # No history without an id; the row deleted since is a tombstone.
+        assert 'Before' not in titles and titles[-1] == 'After'
+
+    def test_slow_subscriber_catches_up_from_the_log(self):
+        def write():
+            with transaction.atomic():
+                Task.objects.bulk_create([Task(title=f'Task {i}') for i in range(5)])
+                record_changes(Task, list(Task.objects.values_list('pk', flat=True)), Change.UPSERT)
+
+        app = EventStreamApp(config(QUEUE_SIZE=2, POLL_INTERVAL=30))
+        _, body, _ = run_stream(app, during=write, until=lambda events: len(events) >= 5)
+        assert sorted(data['data']['title'] for _, _, data in parse_events(body)) == [
+            f'Task {i}' for i in range(5)
+        ]
+
+    def test_heartbeat_and_timeout(self):
+        app = EventStreamApp(config(HEARTBEAT=0.05, STREAM_TIMEOUT=0.3))
+        status, body, finished = run_stream(app)
+        assert status == 200
+        assert b': keep-alive\n\n' in body
+        assert finished
+
+    def test_writes_of_other_processes_are_polled(self):
+        def write():
+            # Straight to the log, as another process would: no broker event.
+            Change.objects.create(model='tasks.task', object_id=1, operation=Change.DELETE)
+
+        app = EventStreamApp(config(POLL_INTERVAL=0.2))
+        _, body, _ = run_stream(app, during=write, until=lambda events: len(events) == 1)
+        assert parse_events(body)[0][2] == {'seq': Change.objects.get().seq, 'id': 1, 'op': 'delete'}
+
+
+class TestEventStreamRequests:
+    @pytest.mark.parametrize('kwargs, status', [
+        ({'query': 'feeds=payroll'}, 400),
+        ({'headers': [('last-event-id', 'abc')]}, 400),
+        ({'method': 'POST'}, 405),
+    ])
+    def test_rejected(self, kwargs, status):
+        assert run_stream(EventStreamApp(config()), **kwargs)[0] == status
+
+    def test_cors_headers_for_allowed_origins(self, settings):
+        settings.CORS_ALLOW_ALL_ORIGINS = False
+        app = EventStreamApp(config())
+        headers = [('host', 'testserver'), ('origin', 'http://localhost:3000')]
+        status, sent = response_headers(app, headers=headers)
+        assert status == 200
+        assert sent['content-type'] == 'text/event-stream'
+        assert sent['access-control-allow-origin'] == 'http://localhost:3000'
+        # Errors carry them too, so the client can read them.
+        status, sent = response_headers(app, method='DELETE', headers=headers)
+        assert status == 405 and sent['access-control-allow-origin'] == 'http://localhost:3000'
+
+        status, sent = response_headers(app, headers=[('host', 'testserver'), ('origin', 'http://evil.test')])
+        assert status == 200 and 'access-control-allow-origin' not in sent
+
+    def test_cors_preflight(self):
+        status, sent = response_headers(EventStreamApp(config()), method='OPTIONS', headers=[
+            ('host', 'testserver'), ('origin', 'http://localhost:3000'),
+            ('access-control-request-method', 'GET'),
+        ])
+        assert status == 200 and 'access-control-allow-origin' in sent
+
+    def test_security_headers_and_allowed_hosts(self, settings):
+        settings.SECURE_CONTENT_TYPE_NOSNIFF = True
+        app = EventStreamApp(config())
+        assert response_headers(app)[1]['x-content-type-options'] == 'nosniff'
+        assert response_headers(app, headers=[('host', 'evil.test')])[0] == 400
+
+    def test_router_sends_other_paths_to_django(self):
+        calls = []
+
+        async def django_app(scope, receive, send):
+            calls.append(scope['path'])
+
+        router = EventRouter(django_app, '/api/events/', EventStreamApp(config()))
+        asyncio.run(router({'type': 'http', 'path': '/api/tasks/'}, None, None))
+        asyncio.run(router({'type': 'lifespan', 'path': '/api/events/'}, None, None))
+        assert calls == ['/api/tasks/', '/api/events/']
+
+
+def test_database_calls_leave_the_event_loop_free():
+    # The stream reads the database in executor threads.
+    app = EventStreamApp(config())
+
+    async def main():
+        return await app.database(threading.get_ident)
+
+    assert asyncio.run(main()) != threading.get_ident()
@@ -0,0 +1,57 @@
+import csv
+import gzip
+import io
+import json
+from unittest import mock
+
+import pytest
+from django.db.models.query import QuerySet
+
+from benchmarks.datasets import seed_employees
+from employees.views import EmployeeViewSet
+from tasks.models import Task
+
+
+def content(response):
+    body = b''.join(response.streaming_content)
+    if response.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return body.decode('utf-8')
+
+
+@pytest.mark.django_db
+class TestExport:
+    def test_ndjson_rows_match_the_list_endpoint(self, client):
+        Task.objects.create(title='Första', description='multi\nline', completed=True)
+        Task.objects.create(title='Second', description='')
+        response = client.get('/api/tasks/export/')
+        assert response.streaming
+        assert response['Content-Type'] == 'application/x-ndjson; charset=utf-8'
+        rows = [json.loads(line) for line in content(response).splitlines()]
+        assert rows == client.get('/api/tasks/').json()['results']
+
+    def test_csv_honours_filters_fields_and_gzip(self, client):
+        seed_employees(60)
+        params = {'format': 'csv', 'department': 'Sales', 'fields': 'employee_id,department'}
+        response = client.get('/api/employees/export/', params, HTTP_ACCEPT_ENCODING='gzip, br')
+        assert response['Content-Encoding'] == 'gzip'
+        assert response['Content-Disposition'] == 'attachment; filename="employees.csv"'
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        listed = client.get('/api/employees/', {**params, 'format': 'json', 'page_size': 100}).json()
+        assert rows == [{key: str(value) for key, value in row.items()} for row in listed['results']]
+
+    def test_rows_are_streamed_in_chunks(self, client):
+        seed_employees(25)
+        with mock.patch.object(EmployeeViewSet, 'export_chunk_size', 10), \
+                mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator:
+            response = client.get('/api/employees/export/')
+            # Nothing is read before the body is consumed.
+            assert not iterator.called
+            chunks = [chunk for chunk in response.streaming_content if chunk]
+        assert iterator.call_args.kwargs == {'chunk_size': 10}
+        assert len(chunks) == 3
+        assert sum(chunk.count(b'\n') for chunk in chunks) == 25
+
+    def test_invalid_filters_are_rejected_before_streaming(self, client):
+        response = client.get('/api/employees/export/', {'gender': 'X'})
+        assert response.status_code == 400
@@ -0,0 +1,76 @@
+import datetime
+import decimal
+import uuid
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.datasets import seed_employees
+from core.renderers import FastJSONRenderer
+from core.serializers import CompactListSerializer
+from employees.views import EmployeeViewSet
+from tasks.models import Task
+from tasks.views import TaskViewSet
+
+
+def regular_response(client, viewset, url, params):
+    with mock.patch.object(viewset, 'fast_list', False), \
+            mock.patch.object(viewset, 'renderer_classes', [JSONRenderer]):
+        return client.get(url, params)
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+
+
+@pytest.mark.django_db
+class TestFastListIsByteIdentical:
+    @pytest.mark.parametrize('params', [
+        {},
+        {'page': 2, 'page_size': 25},
+        {'pagination': 'cursor', 'page_size': 30},
+        {'fields': 'full_name,date_of_joining'},
+        {'department': 'Sales', 'ordering': 'job_title'},
+        {'q': 'employee'},
+    ])
+    def test_employees(self, client, params):
+        seed_employees(80)
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        fast = client.get('/api/employees/', params)
+        regular = regular_response(client, EmployeeViewSet, '/api/employees/', params)
+        assert fast.status_code == regular.status_code == 200
+        assert fast.content == regular.content
+
+    @pytest.mark.parametrize('params', [{}, {'pagination': 'cursor'}])
+    def test_tasks(self, client, params):
+        Task.objects.create(title='Ünïcode   line', description='tab\there "quoted"', completed=True)
+        Task.objects.create(title='Plain', description='')
+        with mock.patch.object(
+            CompactListSerializer, 'rows_to_representation',
+            autospec=True, side_effect=CompactListSerializer.rows_to_representation,
+        ) as rows_to_representation:
+            fast = client.get('/api/tasks/', params)
+        assert rows_to_representation.called
+        regular = regular_response(client, TaskViewSet, '/api/tasks/', params)
+        assert fast.status_code == regular.status_code == 200
+        assert fast.content == regular.content
+        assert b'\\u2028' in fast.content
+
+
+def test_renderer_matches_json_renderer():
+    data = {
+        'text': 'café     \x00 \x1f \x7f "\\/',
+        'when': datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+        'day': datetime.date(2024, 1, 2),
+        'amount': decimal.Decimal('12.50'),
+        'id': uuid.UUID(int=1),
+        'nested': [None, True, 1, {'k': []}],
+    }
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert FastJSONRenderer().render(data, 'application/json; indent=2') == JSONRenderer().render(
+        data, 'application/json; indent=2'
+    )
+    assert FastJSONRenderer().render({'big': 2 ** 70}) == JSONRenderer().render({'big': 2 ** 70})
@@ -0,0 +1,76 @@
+import json
+import logging
+import queue
+
+import pytest
+
+from core.log_handlers import JsonFormatter, NonBlockingQueueHandler
+
+
+@pytest.fixture
+def make_handler(tmp_path):
+    handlers = []
+
+    def make(**kwargs):
+        handler = NonBlockingQueueHandler(
+            targets=[
+                {'filename': str(tmp_path / 'api.log'), 'level': 'INFO'},
+                {'filename': str(tmp_path / 'error.log'), 'level': 'ERROR'},
+            ],
+            **kwargs,
+        )
+        handler.setFormatter(JsonFormatter())
+        handlers.append(handler)
+        return handler
+
+    yield make
+    for handler in handlers:
+        handler.close()
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def make_logger(handler):
+    logger = logging.getLogger('tests.log_handlers')
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def test_records_are_written_as_json_by_level(make_handler, tmp_path):
+    handler = make_handler()
+    logger = make_logger(handler)
+    logger.info('Created employee %s', 'John', extra={'object_id': 7})
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.error('Failed', exc_info=True)
+    handler.close()
+
+    api = read_lines(tmp_path / 'api.log')
+    assert [line['message'] for line in api] == ['Created employee John', 'Failed']
+    assert api[0]['object_id'] == 7
+    assert api[0]['level'] == 'INFO'
+    errors = read_lines(tmp_path / 'error.log')
+    assert len(errors) == 1
+    assert 'ValueError: boom' in errors[0]['exc_info']
+
+
+def test_full_queue_drops_records(make_handler):
+    handler = make_handler(queue_size=1)
+    # Stop the consumer so the queue stays full.
+    handler.listener.stop()
+    handler.listener._thread = None
+    handler.queue = queue.Queue(maxsize=1)
+    logger = make_logger(handler)
+    for i in range(5):
+        logger.info('record %s', i)
+    assert handler.dropped == 4
+
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        NonBlockingQueueHandler(targets=[], policy='spill')
@@ -0,0 +1,51 @@
+import pytest
+
+from core.metrics import MetricsRegistry, merge_dumps, registry, render_exposition
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_requests_and_queries(client):
+    client.get('/api/tasks/')
+    client.get('/api/tasks/')
+    response = client.get('/metrics')
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    body = response.content.decode()
+    assert '# TYPE http_requests_total counter' in body
+    assert 'http_requests_total{method="GET",route="task-list",status="200"} 2' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="task-list"} 2' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="task-list",le="+Inf"} 2' in body
+    # The second request is answered from the response cache without SQL.
+    assert 'http_request_db_queries_bucket{method="GET",route="task-list",le="0.0"} 1' in body
+    assert 'http_request_db_queries_bucket{method="GET",route="task-list",le="+Inf"} 2' in body
+    assert 'http_response_size_bytes_count{method="GET",route="task-list"} 2' in body
+
+
+def test_worker_files_are_merged(settings, tmp_path):
+    settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+    labels = {'route': 'task-list', 'method': 'GET'}
+    workers = [MetricsRegistry(), MetricsRegistry()]
+    for worker in workers:
+        worker.inc('http_requests_total', {**labels, 'status': '200'})
+        worker.observe('http_request_duration_seconds', labels, 0.02)
+        worker.flush()
+
+    counters, histograms = registry.collect()
+    key = ('http_requests_total', (('method', 'GET'), ('route', 'task-list'), ('status', '200')))
+    assert counters[key] == 2
+    histogram = histograms[('http_request_duration_seconds', (('method', 'GET'), ('route', 'task-list')))]
+    assert histogram.count == 2
+    assert len(list(tmp_path.glob('metrics_*.json'))) == 3
+
+
+def test_exposition_escapes_label_values():
+    worker = MetricsRegistry()
+    worker.inc('http_requests_total', {'route': 'a"b', 'method': 'GET', 'status': '200'})
+    text = render_exposition(*merge_dumps([worker.dump()]))
+    assert 'route="a\\"b"' in text
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.metrics import registry
+from core.middleware import RequestLoggingMiddleware
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.mark.django_db
+def test_requests_are_recorded_per_route(client):
+    client.get('/api/tasks/')
+    client.get('/api/tasks/')
+    client.get('/api/tasks/999/')
+    snapshot = client.get('/metrics/latency/').json()
+    assert snapshot['GET task-list']['count'] == 2
+    assert snapshot['GET task-list']['buckets']['+Inf'] == 2
+    assert snapshot['GET task-detail']['count'] == 1
+
+
+def test_sampling_and_redaction(settings, caplog):
+    settings.REQUEST_LOGGING = {'SAMPLE_RATE': 0.0, 'REDACT_KEYS': ['Password']}
+    middleware = RequestLoggingMiddleware(lambda request: HttpResponse())
+    factory = RequestFactory()
+
+    with caplog.at_level(logging.INFO, logger='django'):
+        middleware(factory.get('/api/tasks/'))
+        assert not caplog.records
+
+        failing = RequestLoggingMiddleware(lambda request: HttpResponse(status=500))
+        failing(factory.post('/api/tasks/', {'password': 'hunter2', 'title': 'x'}))
+    record = caplog.records[-1]
+    assert record.status_code == 500
+    assert record.post_params == {'password': '[FILTERED]', 'title': ['x']}
+    assert record.user_id is None
+
+
+def test_async_get_response(settings, caplog):
+    settings.REQUEST_LOGGING = {'SAMPLE_RATE': 1.0}
+
+    async def get_response(request):
+        return HttpResponse()
+
+    middleware = RequestLoggingMiddleware(get_response)
+    with caplog.at_level(logging.INFO, logger='django'):
+        response = asyncio.run(middleware(RequestFactory().get('/api/tasks/')))
+    assert response.status_code == 200
+    assert caplog.records[-1].duration_ms >= 0
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.datasets import employee_row
+from core.models import Change
+from employees.aggregates import employee_counts
+from employees.models import Employee
+from employees.search import employee_search_index
+from tasks.models import Task
+
+
+def send(client, method, url, data):
+    return getattr(client, method)(url, json.dumps(data), content_type='application/json')
+
+
+def updates(queries):
+    return [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+
+
+@pytest.mark.django_db
+class TestChangedFieldsUpdate:
+    def test_writes_only_the_changed_columns(self, client):
+        task = Task.objects.create(title='Draft', description='Keep me')
+        with CaptureQueriesContext(connection) as queries:
+            response = send(client, 'patch', f'/api/tasks/{task.pk}/', {'title': 'Final', 'completed': False})
+        assert response.status_code == 200
+        [sql] = updates(queries)
+        assert '"title"' in sql and '"updated_at"' in sql
+        assert '"description"' not in sql and '"completed"' not in sql
+
+        saved = Task.objects.get()
+        assert (saved.title, saved.description) == ('Final', 'Keep me')
+        assert saved.updated_at > task.updated_at
+
+    def test_unchanged_update_is_not_saved(self, client):
+        task = Task.objects.create(title='Same', description='Text')
+        head = Change.objects.latest('seq').seq
+        with CaptureQueriesContext(connection) as queries:
+            response = send(client, 'put', f'/api/tasks/{task.pk}/', {'title': 'Same', 'description': 'Text'})
+        assert response.status_code == 200
+        assert updates(queries) == []
+        # No write, so no change to log and the same updated_at.
+        assert Change.objects.latest('seq').seq == head
+        assert Task.objects.get().updated_at == task.updated_at
+
+    def test_employee_signals_follow_the_written_fields(self, client):
+        employee = Employee.objects.create(**{**employee_row(1), 'department': 'Sales'})
+        url = f'/api/employees/{employee.pk}/'
+        with CaptureQueriesContext(connection) as queries:
+            assert send(client, 'patch', url, {'phone_number': '+4912345678901'}).status_code == 200
+        # Neither the group counts nor the search index are touched.
+        assert not any('employee_group_count' in query['sql'] or '_fts' in query['sql'] for query in queries)
+
+        assert send(client, 'patch', url, {'department': 'Legal', 'full_name': 'Renamed'}).status_code == 200
+        assert employee_counts.counts('department') == [('Legal', 1)]
+        assert employee_counts.drift() == {}
+        assert list(employee_search_index.search(Employee.objects.all(), 'Renamed')) == [Employee.objects.get()]
+
+    @pytest.mark.parametrize('method', ['put', 'patch', 'delete'])
+    def test_missing_rows_are_not_found(self, client, method):
+        for url in ['/api/tasks/999/', '/api/employees/999/']:
+            assert send(client, method, url, {'title': 'Gone'}).status_code == 404
@@ -0,0 +1,158 @@
+import json
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+
+from benchmarks.datasets import employee_row, seed_dataset
+from core.middleware import NPlusOneError, QueryInspectionMiddleware
+from core.queries import fingerprint, query_budget
+from employees.models import Employee
+from tasks.models import Task
+
+# Queries per request with a cold response cache. A change that adds a
+# query to an endpoint has to raise its budget here, on purpose. Inside the
+# test's transaction, the transaction of a single create or update shows up
+# as a SAVEPOINT and its RELEASE.
+BUDGETS = [
+    ('employee-list', 'get', '/api/employees/', None, 2),
+    ('employee-list-page-2', 'get', '/api/employees/?page=2', None, 2),
+    ('employee-list-cursor', 'get', '/api/employees/?pagination=cursor&page_size=50', None, 1),
+    ('employee-list-filtered', 'get', '/api/employees/?department=Sales&ordering=job_title', None, 2),
+    ('employee-list-search', 'get', '/api/employees/?q=employee', None, 2),
+    ('employee-list-fields', 'get', '/api/employees/?fields=id,full_name', None, 2),
+    ('employee-retrieve', 'get', '/api/employees/{employee}/', None, 2),
+    ('employee-create', 'post', '/api/employees/', lambda ids: {**employee_row(1000), **ids['groups']}, 9),
+    ('employee-update', 'put', '/api/employees/{employee}/', lambda ids: {**employee_row(1001), **ids['groups']}, 11),
+    ('employee-partial-update', 'patch', '/api/employees/{employee}/', lambda ids: {'department': ids['groups']['department']}, 8),
+    ('employee-destroy', 'delete', '/api/employees/{employee}/', None, 5),
+    ('employee-bulk-create', 'post', '/api/employees/bulk/',
+     lambda ids: [{**employee_row(2000 + i), **ids['groups']} for i in range(20)], 8),
+    ('employee-bulk-update', 'patch', '/api/employees/bulk/',
+     lambda ids: [{'id': pk, 'department': ids['groups']['department']} for pk in ids['employees'][:20]], 8),
+    ('employee-bulk-destroy', 'delete', '/api/employees/bulk/', lambda ids: ids['employees'][:20], 8),
+    ('employee-export', 'get', '/api/employees/export/', None, 1),
+    ('employee-stats', 'get', '/api/employees/stats/department/', None, 1),
+    ('employee-changes', 'get', '/api/employees/changes/?since=0', None, 1),
+    ('employee-async-list', 'async_get', '/api/async/employees/', None, 2),
+    ('employee-async-retrieve', 'async_get', '/api/async/employees/{employee}/', None, 1),
+    ('task-list', 'get', '/api/tasks/', None, 2),
+    ('task-list-cursor', 'get', '/api/tasks/?pagination=cursor&page_size=50', None, 1),
+    ('task-list-search', 'get', '/api/tasks/?q=task', None, 2),
+    ('task-list-filtered', 'get', '/api/tasks/?completed=false&created_at__gte=2000-01-01', None, 2),
+    ('task-summary', 'get', '/api/tasks/summary/', None, 1),
+    ('task-retrieve', 'get', '/api/tasks/{task}/', None, 2),
+    ('task-create', 'post', '/api/tasks/', lambda ids: {'title': 'New'}, 5),
+    ('task-update', 'put', '/api/tasks/{task}/', lambda ids: {'title': 'Renamed'}, 7),
+    ('task-partial-update', 'patch', '/api/tasks/{task}/', lambda ids: {'completed': True}, 5),
+    ('task-destroy', 'delete', '/api/tasks/{task}/', None, 4),
+    ('task-bulk-create', 'post', '/api/tasks/bulk/', lambda ids: [{'title': f'Task {i}'} for i in range(20)], 5),
+    ('task-bulk-update', 'patch', '/api/tasks/bulk/',
+     lambda ids: [{'id': pk, 'completed': True} for pk in ids['tasks'][:20]], 7),
+    ('task-bulk-destroy', 'delete', '/api/tasks/bulk/', lambda ids: ids['tasks'][:20], 7),
+    ('task-export', 'get', '/api/tasks/export/', None, 1),
+    ('task-changes', 'get', '/api/tasks/changes/?since=0', None, 1),
+    ('task-async-list', 'async_get', '/api/async/tasks/', None, 2),
+    ('task-async-retrieve', 'async_get', '/api/async/tasks/{task}/', None, 1),
+]
+
+
+def request(client, method, url, data):
+    if method.startswith('async_'):
+        return async_to_sync(getattr(AsyncClient(), method[len('async_'):]))(url)
+    kwargs = {}
+    if data is not None:
+        kwargs = {'data': json.dumps(data, default=str), 'content_type': 'application/json'}
+    response = getattr(client, method)(url, **kwargs)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def seed(rows):
+    seed_dataset(rows, rows)
+    employees = list(Employee.objects.values_list('id', flat=True))
+    # Existing groups for new and changed employees, other than those of
+    # the employee the detail requests change: a new group costs extra
+    # queries, and so would depend on the random rows.
+    groups = (
+        Employee.objects.exclude(department=Employee.objects.get(pk=employees[-1]).department)
+        .values('department', 'work_location', 'date_of_joining').first()
+    )
+    return {
+        'employees': employees,
+        'tasks': list(Task.objects.values_list('id', flat=True)),
+        'groups': groups,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('rows', [30, 90])
+@pytest.mark.parametrize('name, method, url, data, budget', BUDGETS, ids=[case[0] for case in BUDGETS])
+def test_query_budget(client, rows, name, method, url, data, budget):
+    # Budgets must not depend on the size of the tables.
+    ids = seed(rows)
+    url = url.format(employee=ids['employees'][-1], task=ids['tasks'][-1])
+    with query_budget(budget) as queries:
+        response = request(client, method, url, data(ids) if data else None)
+    assert response.status_code < 400, response.content
+    assert queries.count == budget
+
+
+def test_fingerprint_ignores_values_and_list_lengths():
+    assert fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21') == (
+        fingerprint('SELECT * FROM t  WHERE id IN (%s) LIMIT 5')
+    )
+    assert fingerprint("INSERT INTO t VALUES (%s, %s), (%s, %s)") == fingerprint('INSERT INTO t VALUES (%s, %s)')
+    assert fingerprint("SELECT * FROM t WHERE name = 'a'") == fingerprint("SELECT * FROM t WHERE name = 'it''s'")
+    assert fingerprint('SELECT * FROM t1') != fingerprint('SELECT * FROM t2')
+
+
+@pytest.mark.django_db
+def test_query_budget_reports_n_plus_one():
+    seed(5)
+    with pytest.raises(AssertionError, match='N\\+1 suspect, run 5 times'):
+        with query_budget(10):
+            for task in Task.objects.all():
+                Task.objects.get(pk=task.pk)
+
+
+@pytest.mark.django_db
+class TestQueryInspectionMiddleware:
+    def get_response(self, request):
+        for pk in Task.objects.values_list('pk', flat=True):
+            Task.objects.filter(pk=pk).exists()
+        return None
+
+    def run(self, **config):
+        from django.test import RequestFactory
+
+        settings = {'ENABLED': True, 'REPEAT_THRESHOLD': 5, **config}
+        with override_settings(QUERY_INSPECTION=settings):
+            middleware = QueryInspectionMiddleware(self.get_response)
+            return middleware(RequestFactory().get('/api/tasks/'))
+
+    def test_logs_suspects(self, caplog):
+        seed(6)
+        with caplog.at_level(logging.WARNING, logger='django'):
+            self.run(RAISE=False)
+        assert 'Query problems in GET /api/tasks/: 6x SELECT' in caplog.text
+
+    def test_raises_in_debug(self, settings):
+        seed(6)
+        settings.DEBUG = True
+        with pytest.raises(NPlusOneError):
+            self.run(RAISE=None)
+
+    def test_query_limit(self, caplog):
+        seed(2)
+        with caplog.at_level(logging.WARNING, logger='django'):
+            self.run(RAISE=False, MAX_QUERIES=1)
+        assert '3 queries (budget 1)' in caplog.text
+
+    def test_quiet_under_threshold(self, caplog):
+        seed(4)
+        with caplog.at_level(logging.WARNING, logger='django'):
+            self.run(RAISE=True)
+        assert 'Query problems' not in caplog.text
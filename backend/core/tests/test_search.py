@@ -0,0 +1,84 @@
+import json
+
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from benchmarks.datasets import seed_employees
+from employees.models import Employee
+from employees.search import employee_search_index
+from tasks.models import Task
+
+
+def search(client, path, text, **params):
+    response = client.get(path, {'q': text, **params})
+    assert response.status_code == 200, response.content
+    return response.data['results']
+
+
+def indexed_rowids(index):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT rowid FROM {index.fts_table} ORDER BY rowid')
+        return [row[0] for row in cursor.fetchall()]
+
+
+@pytest.mark.django_db
+class TestTaskSearch:
+    def test_matches_every_word_as_a_prefix(self, client):
+        Task.objects.create(title='Quarterly report', description='Prepare finance numbers')
+        Task.objects.create(title='Report bug', description='Login page crashes')
+        Task.objects.create(title='Team lunch', description='')
+        titles = [row['title'] for row in search(client, '/api/tasks/', 'repo')]
+        assert sorted(titles) == ['Quarterly report', 'Report bug']
+        assert [row['title'] for row in search(client, '/api/tasks/', 'report financ')] == ['Quarterly report']
+
+    def test_results_are_ranked(self, client):
+        Task.objects.create(title='Deploy', description='After the review, deploy the service')
+        Task.objects.create(title='Review review', description='Code review for the review tool')
+        assert [row['title'] for row in search(client, '/api/tasks/', 'review')] == ['Review review', 'Deploy']
+
+    def test_index_follows_updates_and_deletes(self, client):
+        task = Task.objects.create(title='Write docs', description='')
+        client.patch(f'/api/tasks/{task.pk}/', json.dumps({'title': 'Write tests'}), content_type='application/json')
+        assert search(client, '/api/tasks/', 'docs') == []
+        assert len(search(client, '/api/tasks/', 'tests')) == 1
+        client.delete(f'/api/tasks/{task.pk}/')
+        assert search(client, '/api/tasks/', 'tests') == []
+
+    def test_bulk_writes_are_indexed(self, client):
+        items = [{'title': f'Bulk item {i}', 'description': 'imported'} for i in range(3)]
+        response = client.post('/api/tasks/bulk/', json.dumps(items), content_type='application/json')
+        assert response.status_code == 201
+        assert len(search(client, '/api/tasks/', 'imported')) == 3
+
+    def test_query_without_words_matches_nothing(self, client):
+        Task.objects.create(title='Anything', description='')
+        assert search(client, '/api/tasks/', '"*') == []
+
+
+@pytest.mark.django_db
+class TestEmployeeSearch:
+    def test_search_combines_with_filters(self, client):
+        seed_employees(50)
+        call_command('rebuild_search_index', 'employees.Employee', stdout=open('/dev/null', 'w'))
+        results = search(client, '/api/employees/', 'Main Street', department='Sales', page_size=100)
+        expected = Employee.objects.filter(department='Sales').count()
+        assert len(results) == expected
+        assert all(row['department'] == 'Sales' for row in results)
+
+    def test_rebuild_restores_the_index(self):
+        seed_employees(5)
+        # bulk_create sends no signals, so the rows are not indexed yet.
+        assert indexed_rowids(employee_search_index) == []
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        assert indexed_rowids(employee_search_index) == sorted(Employee.objects.values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+def test_unsupported_database_is_a_client_error(client):
+    with mock.patch.object(connection, 'vendor', 'mysql'):
+        response = client.get('/api/tasks/', {'q': 'report'})
+    assert response.status_code == 400
+    assert response.json() == ['Full-text search is not available on mysql.']
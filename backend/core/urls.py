@@ -16,9 +16,18 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from employees.urls import async_urlpatterns as employee_async_urls
+from tasks.urls import async_urlpatterns as task_async_urls
+from . import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', views.metrics, name='metrics'),
+    path('metrics/latency/', views.latency_metrics, name='latency-metrics'),
+    # The SSE stream at api/events/ is served by core.asgi, ahead of Django.
+    path('api/events/poll/', views.poll_events, name='events-poll'),
     path('api/tasks/', include('tasks.urls')),
     path('api/employees/', include('employees.urls')),
+    path('api/async/tasks/', include(task_async_urls)),
+    path('api/async/employees/', include(employee_async_urls)),
 ]
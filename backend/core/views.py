@@ -0,0 +1,75 @@
+import math
+
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+
+from .events import Feeds, get_config, wait_for_events
+from .metrics import registry, render_exposition
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_GET
+def metrics(request):
+    """
+    All metrics of the server in the Prometheus text exposition format.
+    """
+    counters, histograms = registry.collect()
+    return HttpResponse(render_exposition(counters, histograms), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@require_GET
+def latency_metrics(request):
+    """
+    Per-route request latency histograms, in seconds, as JSON.
+    """
+    _, histograms = registry.collect()
+    snapshot = {}
+    for (name, labels), histogram in sorted(histograms.items()):
+        if name != 'http_request_duration_seconds':
+            continue
+        labels = dict(labels)
+        snapshot[f"{labels['method']} {labels['route']}"] = {
+            'count': histogram.count,
+            'sum': round(histogram.sum, 6),
+            'buckets': {
+                '+Inf' if bound == float('inf') else str(bound): count
+                for bound, count in histogram.cumulative()
+            },
+        }
+    return JsonResponse(snapshot)
+
+
+@require_GET
+def poll_events(request):
+    """
+    Long-poll fallback of the event stream for WSGI servers: the changes of
+    `?feeds=` after `?since=`, waiting up to `?timeout=` seconds (capped by
+    `EVENTS['LONG_POLL_TIMEOUT']`) for the first one. Without `since`, only
+    the current end of the log is returned.
+    """
+    config = get_config()
+    feeds = Feeds(config['FEEDS'])
+    try:
+        models = feeds.select(request.GET.get('feeds'))
+        since = request.GET.get('since')
+        since = int(since) if since else None
+        timeout = float(request.GET.get('timeout', config['LONG_POLL_TIMEOUT']))
+        if (since is not None and since < 0) or timeout < 0:
+            raise ValueError('since and timeout must not be negative.')
+        if not math.isfinite(timeout):
+            raise ValueError('timeout must be a finite number of seconds.')
+    except ValueError as e:
+        return JsonResponse({'detail': str(e)}, status=400)
+    if since is None:
+        return JsonResponse({'since': None, 'next': feeds.head(), 'has_more': False, 'results': []})
+
+    results, next_seq, has_more = wait_for_events(
+        feeds, models, since, min(timeout, config['LONG_POLL_TIMEOUT']), config,
+    )
+    return JsonResponse({
+        'since': since,
+        'next': next_seq,
+        'has_more': has_more,
+        'results': [{'feed': name, **change} for name, change in results],
+    })
@@ -0,0 +1,16 @@
+from django.db.models.functions import TruncMonth
+
+from core.aggregates import Dimension, GroupCounts
+from .models import Employee, EmployeeGroupCount
+
+
+def joining_month(value):
+    # Both a date and its ISO string start with YYYY-MM.
+    return str(value)[:7]
+
+
+employee_counts = GroupCounts(Employee, EmployeeGroupCount, [
+    Dimension('department', 'department'),
+    Dimension('work_location', 'work_location'),
+    Dimension('joining_month', 'date_of_joining', TruncMonth('date_of_joining'), key=joining_month),
+])
@@ -0,0 +1,216 @@
+import csv
+import json
+import logging
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from employees.serializers import EmployeeSerializer
+
+logger = logging.getLogger('employees')
+
+FORMATS = {'.csv': 'csv', '.json': 'json', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+READ_SIZE = 64 * 1024
+
+
+class DryRunRollback(Exception):
+    pass
+
+
+def iter_csv_records(fp):
+    """
+    Yield one dict per CSV row. Empty cells are left out, so they count as
+    missing (and nullable fields default to null).
+    """
+    for row in csv.DictReader(fp):
+        yield {key: value for key, value in row.items() if key and value != ''}
+
+
+def iter_ndjson_records(fp):
+    for line in fp:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_records(fp):
+    """
+    Yield the items of a top-level JSON array one at a time, reading the
+    file in blocks instead of loading it whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+    while True:
+        # Skip the separators between items.
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if not started and position < len(buffer):
+            if buffer[position] != '[':
+                raise ValueError('Expected a JSON array of employees.')
+            started = True
+            position += 1
+            continue
+        if started and position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            block = fp.read(READ_SIZE)
+            eof = not block
+            buffer = buffer[position:] + block
+            position = 0
+            continue
+        yield item
+        position = end
+
+
+READERS = {'csv': iter_csv_records, 'ndjson': iter_ndjson_records, 'json': iter_json_records}
+
+
+class Command(BaseCommand):
+    help = (
+        'Import employees from a CSV, JSON (array) or NDJSON file, validating and '
+        'inserting them in chunks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=sorted(READERS), help='Default: from the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validate and insert everything, then roll back.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording the progress after each chunk. Default: <path>.checkpoint',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip the records a previous run committed, according to the checkpoint.',
+        )
+        parser.add_argument('--errors', help='Write rejected records to this file as NDJSON.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+        file_format = options['format'] or FORMATS.get(os.path.splitext(path)[1].lower())
+        if file_format is None:
+            raise CommandError('Cannot tell the file format from its name; pass --format.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        progress = {'source': os.path.abspath(path), 'size': os.path.getsize(path),
+                    'processed': 0, 'created': 0, 'rejected': 0}
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as fp:
+                saved = json.load(fp)
+            if (saved.get('source'), saved.get('size')) != (progress['source'], progress['size']):
+                raise CommandError(f'{checkpoint_path} belongs to another file; remove it to start over.')
+            progress = saved
+            self.stdout.write(f"Resuming after {progress['processed']} records")
+        elif os.path.exists(checkpoint_path) and not options['dry_run']:
+            raise CommandError(
+                f'{checkpoint_path} exists from an unfinished import: pass --resume, or remove it.'
+            )
+
+        self.reported = 0
+        errors_file = open(options['errors'], 'a' if options['resume'] else 'w') if options['errors'] else None
+        started = time.perf_counter()
+        skipped = progress['processed']
+        try:
+            with open(path, newline='' if file_format == 'csv' else None, encoding='utf-8') as fp:
+                records = islice(READERS[file_format](fp), skipped, None)
+                if options['dry_run']:
+                    try:
+                        with transaction.atomic():
+                            self.import_records(records, progress, options, None, errors_file)
+                            raise DryRunRollback
+                    except DryRunRollback:
+                        pass
+                else:
+                    self.import_records(records, progress, options, checkpoint_path, errors_file)
+                    if os.path.exists(checkpoint_path):
+                        os.remove(checkpoint_path)
+        except (ValueError, csv.Error) as e:
+            raise CommandError(f"Could not parse record {progress['processed'] + 1}: {e}")
+        finally:
+            if errors_file is not None:
+                errors_file.close()
+
+        elapsed = time.perf_counter() - started
+        handled = progress['processed'] - skipped
+        rate = handled / elapsed if elapsed else 0.0
+        summary = (
+            f"{'Dry run: would have created' if options['dry_run'] else 'Created'} "
+            f"{progress['created']} employees, rejected {progress['rejected']} records, "
+            f"{handled} records in {elapsed:.1f}s ({rate:.0f} records/s)"
+        )
+        logger.info(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def import_records(self, records, progress, options, checkpoint_path, errors_file):
+        chunk_size = options['chunk_size']
+        started = time.perf_counter()
+        # Records skipped on --resume were not handled by this run.
+        skipped = progress['processed']
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return
+            first = progress['processed'] + 1
+            with transaction.atomic():
+                created, rejected = self.import_chunk(chunk, first, errors_file)
+                progress['processed'] += len(chunk)
+                progress['created'] += created
+                progress['rejected'] += rejected
+                if checkpoint_path is not None:
+                    # Only a committed chunk may move the checkpoint.
+                    transaction.on_commit(lambda state=dict(progress): self.save_checkpoint(checkpoint_path, state))
+            if options['verbosity'] >= 2:
+                rate = (progress['processed'] - skipped) / (time.perf_counter() - started)
+                self.stdout.write(
+                    f"{progress['processed']} records, {progress['created']} created, "
+                    f"{progress['rejected']} rejected ({rate:.0f} records/s)"
+                )
+
+    def import_chunk(self, chunk, first, errors_file):
+        """
+        Validate `chunk` with the API's rules (including uniqueness against
+        the database and within the chunk) and insert its valid records.
+        Returns `(created, rejected)`.
+        """
+        serializer = EmployeeSerializer(many=True)
+        validated, errors = serializer.validate_items(chunk)
+        valid = [attrs for attrs in validated if attrs is not None]
+        if valid:
+            serializer.create(valid)
+        rejected = 0
+        for offset, item_errors in enumerate(errors):
+            if not item_errors:
+                continue
+            rejected += 1
+            record = first + offset
+            if errors_file is not None:
+                errors_file.write(json.dumps(
+                    {'record': record, 'errors': item_errors, 'data': chunk[offset]}, default=str
+                ) + '\n')
+            elif self.reported < 20:
+                self.reported += 1
+                self.stderr.write(f'Record {record}: {json.dumps(item_errors)}')
+        return len(valid), rejected
+
+    def save_checkpoint(self, checkpoint_path, progress):
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(progress, fp)
+        os.replace(tmp_path, checkpoint_path)
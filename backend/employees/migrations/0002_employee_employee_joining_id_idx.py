@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['-date_of_joining', '-id'], name='employee_joining_id_idx'),
+        ),
+    ]
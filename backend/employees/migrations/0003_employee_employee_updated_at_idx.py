@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employee_employee_joining_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['updated_at'], name='employee_updated_at_idx'),
+        ),
+    ]
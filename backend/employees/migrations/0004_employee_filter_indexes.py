@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_employee_employee_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department', '-date_of_joining', '-id'], name='employee_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['job_title', '-date_of_joining', '-id'], name='employee_job_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['work_location', '-date_of_joining', '-id'], name='employee_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['gender'], name='employee_gender_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from core.search import SearchIndex
+
+SEARCH_FIELDS = ['full_name', 'job_title', 'address']
+
+
+def create_search_index(apps, schema_editor):
+    model = apps.get_model('employees', 'Employee')
+    SearchIndex(model, SEARCH_FIELDS, register=False).create(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    model = apps.get_model('employees', 'Employee')
+    SearchIndex(model, SEARCH_FIELDS, register=False).drop(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_employee_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-18 06:54
+
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+from core.aggregates import Dimension, GroupCounts
+
+
+def count_employees(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    EmployeeGroupCount = apps.get_model('employees', 'EmployeeGroupCount')
+    GroupCounts(Employee, EmployeeGroupCount, [
+        Dimension('department', 'department'),
+        Dimension('work_location', 'work_location'),
+        Dimension('joining_month', 'date_of_joining', TruncMonth('date_of_joining'),
+                  key=lambda value: str(value)[:7]),
+    ], register=False).rebuild()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_employee_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeGroupCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='employeegroupcount',
+            constraint=models.UniqueConstraint(fields=('dimension', 'value'), name='employee_group_count_unique'),
+        ),
+        migrations.RunPython(count_employees, migrations.RunPython.noop),
+    ]
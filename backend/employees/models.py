@@ -33,3 +33,34 @@ class Employee(models.Model):
 
     class Meta:
         ordering = ['-date_of_joining']
+        indexes = [
+            # Backs the (date_of_joining, id) keyset used for list pagination.
+            models.Index(fields=['-date_of_joining', '-id'], name='employee_joining_id_idx'),
+            # Lets MAX(updated_at) for conditional list requests read one index entry.
+            models.Index(fields=['updated_at'], name='employee_updated_at_idx'),
+            # List filters: equality on the leading column, then the list's
+            # default order, so a filtered page is read in order from the index.
+            models.Index(fields=['department', '-date_of_joining', '-id'], name='employee_department_idx'),
+            models.Index(fields=['job_title', '-date_of_joining', '-id'], name='employee_job_title_idx'),
+            models.Index(fields=['work_location', '-date_of_joining', '-id'], name='employee_location_idx'),
+            # Only three values, so ordering within them is left to a sort.
+            models.Index(fields=['gender'], name='employee_gender_idx'),
+        ]
+
+
+class EmployeeGroupCount(models.Model):
+    """
+    Number of employees per department, work location or joining month,
+    maintained by the app's signals (see employees/aggregates.py).
+    """
+    dimension = models.CharField(max_length=20)
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.dimension}={self.value}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'value'], name='employee_group_count_unique'),
+        ]
@@ -0,0 +1,4 @@
+from core.search import SearchIndex
+from .models import Employee
+
+employee_search_index = SearchIndex(Employee, ['full_name', 'job_title', 'address'])
@@ -1,7 +1,20 @@
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
 from rest_framework import serializers
+from core.bulk import BulkListSerializer, in_bulk_batch, unique_violations_as_errors
+from core.fieldsets import SparseFieldsetsMixin
+from core.serializers import ChangedFieldsMixin
 from .models import Employee
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsetsMixin, ChangedFieldsMixin, serializers.ModelSerializer):
+    unique_error_messages = {
+        'email': 'Email already exists',
+        'employee_id': 'Employee ID already exists',
+    }
+
     class Meta:
         model = Employee
         fields = [
@@ -10,27 +23,48 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'department', 'employee_id', 'date_of_joining', 
             'work_location'
         ]
-        
-    def validate_email(self, value):
-        """
-        Check that the email is unique
-        """
-        if self.instance is None:  # Creating new employee
-            if Employee.objects.filter(email=value).exists():
-                raise serializers.ValidationError("Email already exists")
-        else:  # Updating existing employee
-            if Employee.objects.filter(email=value).exclude(id=self.instance.id).exists():
-                raise serializers.ValidationError("Email already exists")
-        return value
-
-    def validate_employee_id(self, value):
+        # Uniqueness is checked by validate() (or per batch by
+        # BulkListSerializer), not by one generated validator per field.
+        extra_kwargs = {
+            'email': {'validators': []},
+            'employee_id': {'validators': []},
+        }
+        list_serializer_class = BulkListSerializer
+
+    def validate(self, attrs):
         """
-        Check that the employee_id is unique
+        Check that email and employee_id are unique, with a single query
         """
-        if self.instance is None:  # Creating new employee
-            if Employee.objects.filter(employee_id=value).exists():
-                raise serializers.ValidationError("Employee ID already exists")
-        else:  # Updating existing employee
-            if Employee.objects.filter(employee_id=value).exclude(id=self.instance.id).exists():
-                raise serializers.ValidationError("Employee ID already exists")
-        return value
+        if in_bulk_batch(self) or not getattr(settings, 'UNIQUE_PRECHECK', True):
+            return attrs
+        values = {
+            field: attrs[field] for field in self.unique_error_messages
+            if attrs.get(field) is not None
+        }
+        if not values:
+            return attrs
+
+        clashes = Employee.objects.filter(
+            reduce(or_, (Q(**{field: value}) for field, value in values.items()))
+        )
+        if self.instance is not None:  # Updating existing employee
+            clashes = clashes.exclude(id=self.instance.id)
+
+        errors = {}
+        # Each field is unique, so there is at most one clash per field.
+        for row in clashes.values_list(*values)[:len(values)]:
+            for field, value in zip(values, row):
+                if value == values[field]:
+                    errors[field] = [self.unique_error_messages[field]]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        # The constraint still catches rows written between validate() and here.
+        with unique_violations_as_errors(self, self.unique_error_messages):
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with unique_violations_as_errors(self, self.unique_error_messages):
+            return super().update(instance, validated_data)
@@ -0,0 +1,93 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from core.caching import bump_model_version
+from core.changes import record_changes
+from core.models import Change
+from core.signals import post_bulk_create, post_bulk_update
+from .aggregates import employee_counts
+from .models import Employee
+from .search import employee_search_index
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_bulk_create, sender=Employee)
+@receiver(post_bulk_update, sender=Employee)
+def invalidate_employee_caches(sender, **kwargs):
+    bump_model_version(Employee)
+
+
+@receiver(post_save, sender=Employee)
+def index_employee(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        employee_search_index.add([instance.pk])
+    elif employee_search_index.affected_by(update_fields):
+        employee_search_index.update([instance.pk])
+
+
+@receiver(post_delete, sender=Employee)
+def unindex_employee(sender, instance, **kwargs):
+    employee_search_index.remove([instance.pk])
+
+
+@receiver(post_bulk_create, sender=Employee)
+def index_new_employees(sender, instances, **kwargs):
+    employee_search_index.add([instance.pk for instance in instances])
+
+
+@receiver(post_bulk_update, sender=Employee)
+def reindex_employees(sender, instances, **kwargs):
+    employee_search_index.update([instance.pk for instance in instances])
+
+
+@receiver(post_init, sender=Employee)
+def track_employee_groups(sender, instance, **kwargs):
+    employee_counts.track(instance)
+
+
+@receiver(pre_save, sender=Employee)
+def load_employee_groups(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and employee_counts.affected_by(update_fields):
+        employee_counts.prepare(instance)
+
+
+@receiver(post_save, sender=Employee)
+def count_employee(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        employee_counts.added(instance)
+    elif employee_counts.affected_by(update_fields):
+        employee_counts.changed(instance)
+
+
+@receiver(post_delete, sender=Employee)
+def uncount_employee(sender, instance, **kwargs):
+    employee_counts.removed(instance)
+
+
+@receiver(post_bulk_create, sender=Employee)
+def count_new_employees(sender, instances, **kwargs):
+    employee_counts.added_many(instances)
+
+
+@receiver(post_bulk_update, sender=Employee)
+def recount_employees(sender, instances, **kwargs):
+    employee_counts.changed_many(instances)
+
+
+@receiver(post_save, sender=Employee)
+def log_employee_save(sender, instance, **kwargs):
+    record_changes(Employee, [instance.pk], Change.UPSERT)
+
+
+@receiver(post_delete, sender=Employee)
+def log_employee_delete(sender, instance, **kwargs):
+    record_changes(Employee, [instance.pk], Change.DELETE)
+
+
+@receiver(post_bulk_create, sender=Employee)
+@receiver(post_bulk_update, sender=Employee)
+def log_employee_bulk_write(sender, instances, **kwargs):
+    record_changes(Employee, [instance.pk for instance in instances], Change.UPSERT)
@@ -0,0 +1,139 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from benchmarks.datasets import employee_row, seed_dataset
+from employees.aggregates import employee_counts
+from employees.models import Employee, EmployeeGroupCount
+
+
+def payload(i, **overrides):
+    data = {key: str(value) for key, value in employee_row(i).items()}
+    data.update(overrides)
+    return data
+
+
+def send(client, method, url, data):
+    return getattr(client, method)(url, json.dumps(data), content_type='application/json')
+
+
+def stats(client, dimension):
+    response = client.get(f'/api/employees/stats/{dimension}/')
+    assert response.status_code == 200
+    return {group['value']: group['count'] for group in response.json()['groups']}
+
+
+@pytest.mark.django_db
+class TestEmployeeGroupCounts:
+    def test_single_writes_apply_deltas(self, client):
+        for i, department in enumerate(['Sales', 'Sales', 'Legal']):
+            data = payload(i, department=department, work_location='Berlin', date_of_joining='2021-03-04')
+            assert send(client, 'post', '/api/employees/', data).status_code == 201
+        assert stats(client, 'department') == {'Legal': 1, 'Sales': 2}
+        assert stats(client, 'joining_month') == {'2021-03': 3}
+
+        moved = Employee.objects.filter(department='Sales').first()
+        response = send(client, 'patch', f'/api/employees/{moved.pk}/', {'department': 'Legal'})
+        assert response.status_code == 200
+        assert stats(client, 'department') == {'Legal': 2, 'Sales': 1}
+
+        data = payload(5, department='Legal', work_location='Remote', date_of_joining='2022-01-01')
+        assert send(client, 'put', f'/api/employees/{moved.pk}/', data).status_code == 200
+        assert stats(client, 'work_location') == {'Berlin': 2, 'Remote': 1}
+        assert stats(client, 'joining_month') == {'2021-03': 2, '2022-01': 1}
+
+        assert client.delete(f'/api/employees/{moved.pk}/').status_code == 204
+        # Empty groups are left out.
+        assert stats(client, 'department') == {'Legal': 1, 'Sales': 1}
+        assert stats(client, 'work_location') == {'Berlin': 2}
+        assert employee_counts.drift() == {}
+
+    def test_bulk_writes_apply_deltas(self, client):
+        response = send(client, 'post', '/api/employees/bulk/', [payload(i) for i in range(40)])
+        assert response.status_code == 201
+        assert employee_counts.drift() == {}
+
+        ids = [employee['id'] for employee in response.json()]
+        changes = [{'id': pk, 'department': 'HR', 'work_location': 'Mars'} for pk in ids[:15]]
+        assert send(client, 'patch', '/api/employees/bulk/', changes).status_code == 200
+        assert stats(client, 'work_location')['Mars'] == 15
+        assert employee_counts.drift() == {}
+
+        assert send(client, 'delete', '/api/employees/bulk/', ids[10:30]).json()['deleted'] == 20
+        assert stats(client, 'work_location')['Mars'] == 10
+        assert employee_counts.drift() == {}
+
+    def test_bulk_destroy_applies_deltas_once(self, client, django_assert_max_num_queries):
+        seed_dataset(60, 0)
+        ids = list(Employee.objects.values_list('pk', flat=True))
+        # Fetch, delete and its search index and group count updates, not
+        # one update per deleted row.
+        with django_assert_max_num_queries(12):
+            send(client, 'delete', '/api/employees/bulk/', ids[:50])
+        assert employee_counts.drift() == {}
+
+    def test_saving_a_partially_loaded_employee(self):
+        Employee.objects.create(**{**employee_row(1), 'department': 'Sales'})
+        employee = Employee.objects.only('id', 'full_name').get()
+        employee.department = 'Legal'
+        employee.save()
+        assert employee_counts.counts('department') == [('Legal', 1)]
+        assert employee_counts.drift() == {}
+
+    def test_stats_reads_one_row_per_group(self, client, django_assert_num_queries):
+        seed_dataset(200, 0)
+        with django_assert_num_queries(1):
+            response = client.get('/api/employees/stats/work_location/')
+        body = response.json()
+        assert body['dimension'] == 'work_location'
+        assert body['total'] == 200
+        assert [group['value'] for group in body['groups']] == sorted(
+            Employee.objects.order_by().values_list('work_location', flat=True).distinct()
+        )
+
+    def test_unknown_dimension(self, client):
+        response = client.get('/api/employees/stats/salary/')
+        assert response.status_code == 404
+        assert 'department, work_location, joining_month' in response.json()['detail']
+
+    def test_stats_cached_until_a_write(self, client, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 60
+        send(client, 'post', '/api/employees/', payload(1, department='Sales'))
+        assert client.get('/api/employees/stats/department/')['X-Cache'] == 'MISS'
+        assert client.get('/api/employees/stats/department/')['X-Cache'] == 'HIT'
+        send(client, 'post', '/api/employees/', payload(2, department='Sales'))
+        response = client.get('/api/employees/stats/department/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['groups'] == [{'value': 'Sales', 'count': 2}]
+
+
+@pytest.mark.django_db
+class TestReconcileAggregates:
+    def run(self, *args):
+        out = StringIO()
+        call_command('reconcile_aggregates', *args, stdout=out)
+        return out.getvalue()
+
+    def test_check_and_rebuild(self):
+        seed_dataset(30, 0)
+        assert 'corrected' not in self.run('--check')
+        group = EmployeeGroupCount.objects.filter(dimension='department').first()
+        group.count += 5
+        group.save()
+        EmployeeGroupCount.objects.create(dimension='department', value='Gone', count=2)
+
+        with pytest.raises(CommandError, match='2 group counts are out of date'):
+            self.run('--check')
+
+        output = self.run('employees.Employee')
+        assert f'department={group.value}: stored {group.count}, actual {group.count - 5}' in output
+        assert 'department=Gone: stored 2, actual 0' in output
+        assert '2 corrected' in output
+        assert employee_counts.drift() == {}
+        assert not EmployeeGroupCount.objects.filter(value='Gone').exists()
+
+    def test_unknown_model(self):
+        with pytest.raises(CommandError, match='No group counts for: tasks.task'):
+            self.run('tasks.Task')
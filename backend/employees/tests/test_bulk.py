@@ -0,0 +1,118 @@
+import json
+import pytest
+from datetime import date
+from employees.models import Employee
+
+
+def employee_data(i, **overrides):
+    data = {
+        'full_name': f'Employee {i}',
+        'date_of_birth': '1990-01-01',
+        'gender': 'M',
+        'phone_number': '+1234567890',
+        'email': f'employee{i}@example.com',
+        'address': '123 Main St, City',
+        'job_title': 'Software Engineer',
+        'department': 'Engineering',
+        'employee_id': f'EMP{i:03d}',
+        'date_of_joining': '2023-01-01',
+        'work_location': 'New York',
+    }
+    data.update(overrides)
+    return data
+
+
+def send(client, method, payload):
+    return getattr(client, method)(
+        '/api/employees/bulk/', json.dumps(payload), content_type='application/json'
+    )
+
+
+@pytest.mark.django_db
+class TestEmployeeBulkViews:
+    @pytest.fixture
+    def existing(self):
+        data = employee_data(0)
+        data['date_of_birth'] = date.fromisoformat(data['date_of_birth'])
+        data['date_of_joining'] = date.fromisoformat(data['date_of_joining'])
+        return Employee.objects.create(**data)
+
+    def test_bulk_create(self, client, django_assert_num_queries):
+        payload = [employee_data(i) for i in range(1, 51)]
+        # One IN query per unique field, then the insert, its search index
+        # update, the group counts (which creates them, here) and the change
+        # log entries inside a transaction.
+        with django_assert_num_queries(11):
+            response = send(client, 'post', payload)
+        assert response.status_code == 201
+        assert len(response.json()) == 50
+        assert Employee.objects.count() == 50
+
+    def test_bulk_create_reports_errors_per_item(self, client, existing):
+        payload = [
+            employee_data(1),
+            employee_data(2, email=existing.email),
+            employee_data(3, employee_id='EMP001'),
+            employee_data(4, phone_number='not-a-phone'),
+        ]
+        response = send(client, 'post', payload)
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert errors[1] == {'email': ['Email already exists']}
+        assert errors[2] == {'employee_id': ['Employee ID already exists']}
+        assert 'phone_number' in errors[3]
+        # Nothing from a rejected batch is written.
+        assert Employee.objects.count() == 1
+
+    @pytest.mark.parametrize('payload', [employee_data(1), 5, None])
+    def test_bulk_create_rejects_non_list(self, client, payload):
+        response = send(client, 'post', payload)
+        assert response.status_code == 400
+
+    def test_bulk_update(self, client, existing):
+        before = existing.updated_at
+        payload = [
+            # Keeping its own unique values is not a conflict.
+            {'id': existing.id, 'job_title': 'Senior Engineer', 'email': existing.email},
+        ]
+        response = send(client, 'patch', payload)
+        assert response.status_code == 200
+        assert response.json()[0]['job_title'] == 'Senior Engineer'
+        existing.refresh_from_db()
+        assert existing.job_title == 'Senior Engineer'
+        assert existing.updated_at > before
+
+    def test_bulk_update_rejects_taken_value(self, client, existing):
+        other = Employee.objects.create(**{
+            **employee_data(1),
+            'date_of_birth': existing.date_of_birth,
+            'date_of_joining': existing.date_of_joining,
+        })
+        response = send(client, 'patch', [{'id': other.id, 'email': existing.email}])
+        assert response.status_code == 400
+        assert response.json() == [{'email': ['Email already exists']}]
+
+    def test_bulk_update_unknown_id(self, client, existing):
+        response = send(client, 'patch', [{'id': existing.id + 100, 'job_title': 'X'}])
+        assert response.status_code == 400
+        assert response.json() == [{'id': ['Not found.']}]
+
+    def test_bulk_update_rejects_boolean_id(self, client, existing):
+        # true == 1 in Python; it must not stand for the first employee.
+        response = send(client, 'patch', [{'id': True, 'job_title': 'X'}])
+        assert response.status_code == 400
+        assert response.json() == [{'id': ['Not found.']}]
+        existing.refresh_from_db()
+        assert existing.job_title == 'Software Engineer'
+
+    def test_bulk_delete_rejects_boolean_ids(self, client, existing):
+        response = send(client, 'delete', [True])
+        assert response.status_code == 400
+        assert Employee.objects.count() == 1
+
+    def test_bulk_delete(self, client, existing):
+        response = send(client, 'delete', [existing.id, existing.id + 100])
+        assert response.status_code == 200
+        assert response.json() == {'deleted': 1, 'not_found': [existing.id + 100]}
+        assert Employee.objects.count() == 0
@@ -0,0 +1,88 @@
+import pytest
+from datetime import date
+from django.utils.http import http_date
+from employees.models import Employee
+
+
+@pytest.mark.django_db
+class TestEmployeeConditionalGet:
+    @pytest.fixture(autouse=True)
+    def no_response_cache(self, settings):
+        # Exercise the updated_at validators on their own.
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+
+    @pytest.fixture
+    def employee(self):
+        return Employee.objects.create(
+            full_name='John Doe',
+            date_of_birth=date(1990, 1, 1),
+            gender='M',
+            phone_number='+1234567890',
+            email='john.doe@example.com',
+            address='123 Main St, City',
+            job_title='Software Engineer',
+            department='Engineering',
+            employee_id='EMP001',
+            date_of_joining=date(2023, 1, 1),
+            work_location='New York',
+        )
+
+    def test_detail_304_skips_serialization(self, client, employee, django_assert_num_queries):
+        response = client.get(f'/api/employees/{employee.id}/')
+        assert response['Last-Modified'] == http_date(employee.updated_at.timestamp())
+        with django_assert_num_queries(1):
+            response = client.get(
+                f'/api/employees/{employee.id}/', HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        assert response.status_code == 304
+
+    def test_detail_if_modified_since(self, client, employee):
+        response = client.get(
+            f'/api/employees/{employee.id}/',
+            HTTP_IF_MODIFIED_SINCE=http_date(employee.updated_at.timestamp() + 60),
+        )
+        assert response.status_code == 304
+
+    def test_detail_update_changes_etag(self, client, employee):
+        etag = client.get(f'/api/employees/{employee.id}/')['ETag']
+        employee.job_title = 'Manager'
+        employee.save()
+        response = client.get(f'/api/employees/{employee.id}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['job_title'] == 'Manager'
+
+    def test_list_etag_tracks_deletes(self, client, employee):
+        other = Employee.objects.get(pk=employee.pk)
+        other.pk = None
+        other.email = 'jane@example.com'
+        other.employee_id = 'EMP002'
+        other.save()
+        etag = client.get('/api/employees/')['ETag']
+        assert client.get('/api/employees/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+        # Deleting the oldest row leaves MAX(updated_at) untouched.
+        employee.delete()
+        assert client.get('/api/employees/', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_list_etag_depends_on_query(self, client, employee):
+        etag = client.get('/api/employees/')['ETag']
+        response = client.get('/api/employees/?page_size=5', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+    def test_missing_employee_is_404(self, client):
+        assert client.get('/api/employees/999/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_cached_responses_keep_the_validator_etag(client):
+    employee = Employee.objects.create(
+        full_name='John Doe', date_of_birth=date(1990, 1, 1), gender='M',
+        phone_number='+1234567890', email='john.doe@example.com', address='Main St',
+        job_title='Engineer', department='Engineering', employee_id='EMP001',
+        date_of_joining=date(2023, 1, 1), work_location='New York',
+    )
+    url = f'/api/employees/{employee.id}/'
+    first = client.get(url)
+    second = client.get(url)
+    assert second['X-Cache'] == 'HIT'
+    assert second['ETag'] == first['ETag']
+    assert client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
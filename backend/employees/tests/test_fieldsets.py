@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+from benchmarks.datasets import seed_employees
+from employees.models import Employee
+from employees.serializers import EmployeeSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+def regular_rows(serializer_class, queryset):
+    # A plain ListSerializer runs DRF's per-field path for every row.
+    return serializers.ListSerializer(queryset, child=serializer_class()).data
+
+
+@pytest.mark.django_db
+class TestCompactListSerializer:
+    def test_employee_rows_match_the_model_serializer(self):
+        seed_employees(20)
+        Employee.objects.filter(pk__in=Employee.objects.values('pk')[:3]).update(employee_id=None)
+        queryset = Employee.objects.order_by('id')
+        compact = EmployeeSerializer(queryset, many=True).data
+        assert json.dumps(compact) == json.dumps(regular_rows(EmployeeSerializer, queryset))
+
+    def test_task_rows_match_the_model_serializer(self):
+        Task.objects.create(title='One', description='', completed=True)
+        Task.objects.create(title='Two', description='Second')
+        queryset = Task.objects.order_by('id')
+        compact = TaskSerializer(queryset, many=True).data
+        assert json.dumps(compact) == json.dumps(regular_rows(TaskSerializer, queryset))
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    @pytest.fixture(autouse=True)
+    def employees(self):
+        seed_employees(15)
+
+    def test_fields_selects_columns_and_keys(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/employees/', {'fields': 'full_name,department'})
+        assert response.status_code == 200
+        assert all(set(row) == {'full_name', 'department'} for row in response.data['results'])
+        page_query = queries[-1]['sql']
+        assert '"full_name"' in page_query and '"address"' not in page_query
+
+    def test_exclude_drops_fields(self, client):
+        response = client.get('/api/employees/', {'exclude': 'address,phone_number'})
+        row = response.data['results'][0]
+        assert 'address' not in row and 'phone_number' not in row and 'email' in row
+
+    def test_unknown_fields_are_rejected(self, client):
+        response = client.get('/api/employees/', {'fields': 'full_name,salary'})
+        assert response.status_code == 400
+        assert response.data == {'fields': ['Unknown field(s): salary']}
+
+    def test_cursor_pages_need_no_deferred_loads(self, client, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = client.get('/api/employees/', {'fields': 'full_name', 'pagination': 'cursor'})
+        assert response.data['next']
+
+    def test_retrieve_and_writes(self, client):
+        employee = Employee.objects.order_by('id').first()
+        response = client.get(f'/api/employees/{employee.pk}/', {'fields': 'email'})
+        assert response.data == {'email': employee.email}
+        # Writes validate and return every field regardless of the selection.
+        response = client.patch(
+            f'/api/employees/{employee.pk}/?fields=email', json.dumps({'job_title': 'Director'}),
+            content_type='application/json',
+        )
+        assert response.status_code == 200
+        assert response.data['job_title'] == 'Director' and 'address' in response.data
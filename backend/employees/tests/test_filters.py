@@ -0,0 +1,125 @@
+from itertools import product
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.datasets import seed_employees
+from employees.views import EmployeeViewSet
+
+# A value for each lookup of EmployeeViewSet.filter_fields.
+VALUES = {
+    'exact': {
+        'department': 'Sales', 'job_title': 'Manager', 'work_location': 'Remote',
+        'gender': 'F', 'date_of_joining': '2015-06-01',
+    },
+    'in': {
+        'department': 'Sales,HR', 'job_title': 'Manager,Director',
+        'work_location': 'Remote,Berlin', 'gender': 'F,O',
+    },
+    'gte': {'date_of_joining': '2010-01-01'},
+    'lte': {'date_of_joining': '2015-12-31'},
+}
+
+
+def lookup_params(name, lookup):
+    return {name if lookup == 'exact' else f'{name}__{lookup}': VALUES[lookup][name]}
+
+
+# At most one lookup per field (or none), in every combination.
+FILTER_COMBINATIONS = [
+    {key: value for name, lookup in zip(EmployeeViewSet.filter_fields, choice) if lookup
+     for key, value in lookup_params(name, lookup).items()}
+    for choice in product(*[[None, *lookups] for lookups in EmployeeViewSet.filter_fields.values()])
+    if any(choice)
+]
+SINGLE_FILTERS = [{}] + [
+    lookup_params(name, lookup)
+    for name, lookups in EmployeeViewSet.filter_fields.items() for lookup in lookups
+]
+ORDERINGS = [
+    prefix + field for field in EmployeeViewSet.ordering_fields for prefix in ('', '-')
+]
+
+
+def employee_query_plans(client, params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/api/employees/', params)
+    assert response.status_code == 200, response.content
+    plans = {}
+    with connection.cursor() as cursor:
+        for query in queries:
+            if 'employees_employee' not in query['sql']:
+                continue
+            cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+            plans[query['sql']] = [row[-1] for row in cursor.fetchall()]
+    return response, plans
+
+
+@pytest.mark.django_db
+class TestEmployeeFilters:
+    @pytest.fixture(autouse=True)
+    def employees(self):
+        seed_employees(300)
+
+    def test_filters_match_the_queryset(self, client):
+        from employees.models import Employee
+        response = client.get('/api/employees/', {
+            'department__in': 'Sales,HR', 'date_of_joining__lte': '2010-12-31', 'page_size': 100,
+        })
+        expected = Employee.objects.filter(
+            department__in=['Sales', 'HR'], date_of_joining__lte='2010-12-31'
+        ).count()
+        assert response.status_code == 200
+        assert response.data['count'] == expected
+        assert all(row['department'] in ('Sales', 'HR') for row in response.data['results'])
+
+    @pytest.mark.parametrize('params', [
+        {'gender': 'X'},
+        {'date_of_joining__gte': 'yesterday'},
+    ])
+    def test_invalid_values_are_rejected(self, client, params):
+        response = client.get('/api/employees/', params)
+        assert response.status_code == 400
+        assert list(response.data) == list(params)
+
+    def test_ordering_is_whitelisted_and_stable(self, client):
+        response = client.get('/api/employees/', {'ordering': 'department'})
+        departments = [row['department'] for row in response.data['results']]
+        assert departments == sorted(departments)
+        # full_name is not an ordering field: the default order applies.
+        response = client.get('/api/employees/', {'ordering': 'full_name'})
+        dates = [row['date_of_joining'] for row in response.data['results']]
+        assert dates == sorted(dates, reverse=True)
+
+    def assert_indexed(self, client, params):
+        """
+        Every read of the employee table searches an index, or, for a
+        page in `?ordering=` order, walks an index (or the rowid, by id) in
+        that order until the page is full, with nothing left to sort.
+        Unfiltered reads may walk any index.
+        """
+        _, plans = employee_query_plans(client, params)
+        unfiltered = not params.keys() - {'ordering'}
+        by_rowid = params.get('ordering', '').lstrip('-') == 'id'
+        assert plans
+        for sql, plan in plans.items():
+            table_steps = [step for step in plan if 'employees_employee' in step]
+            assert table_steps, plan
+            ordered_page = (
+                'ordering' in params and ' LIMIT ' in sql
+                and 'USE TEMP B-TREE FOR ORDER BY' not in plan
+            )
+            for step in table_steps:
+                searched = step.startswith('SEARCH') and 'INDEX' in step
+                walked = ordered_page and ('INDEX' in step or by_rowid)
+                assert searched or walked or (unfiltered and 'INDEX' in step), (sql, plan)
+
+    @pytest.mark.parametrize('params', FILTER_COMBINATIONS, ids=lambda params: '&'.join(params))
+    def test_filter_combinations_use_an_index(self, client, params):
+        self.assert_indexed(client, params)
+
+    @pytest.mark.parametrize('ordering', ORDERINGS)
+    @pytest.mark.parametrize('params', SINGLE_FILTERS, ids=lambda params: '&'.join(params) or 'none')
+    def test_orderings_use_an_index(self, client, params, ordering):
+        self.assert_indexed(client, {**params, 'ordering': ordering})
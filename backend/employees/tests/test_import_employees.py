@@ -0,0 +1,104 @@
+import csv
+import itertools
+import json
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from benchmarks.datasets import employee_row
+from employees.management.commands import import_employees
+from employees.models import Employee
+
+FIELDS = list(employee_row(0))
+
+
+def record(i, **overrides):
+    row = {key: str(value) for key, value in employee_row(i).items()}
+    row.update(overrides)
+    return row
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as fp:
+        writer = csv.DictWriter(fp, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def run(*args, **options):
+    out, err = StringIO(), StringIO()
+    call_command('import_employees', *args, stdout=out, stderr=err, **options)
+    return out.getvalue(), err.getvalue()
+
+
+@pytest.mark.django_db
+class TestImportEmployees:
+    def test_csv_import_in_chunks(self, tmp_path):
+        rows = [record(i) for i in range(25)]
+        rows[3]['employee_id'] = ''  # empty cells count as missing
+        out, _ = run(write_csv(tmp_path / 'staff.csv', rows), chunk_size=10)
+        assert Employee.objects.count() == 25
+        assert Employee.objects.get(email='employee3@example.com').employee_id is None
+        assert 'Created 25 employees, rejected 0 records' in out
+        assert not (tmp_path / 'staff.csv.checkpoint').exists()
+
+    def test_invalid_and_duplicate_records_are_rejected(self, tmp_path):
+        run(write_csv(tmp_path / 'first.csv', [record(0)]))
+        rows = [
+            record(1, phone_number='call me'),
+            record(2, email='employee0@example.com'),  # already stored
+            record(3),
+            record(4, employee_id='EMP0000003'),  # repeats record 3
+        ]
+        errors_path = tmp_path / 'errors.ndjson'
+        out, _ = run(write_csv(tmp_path / 'second.csv', rows), errors=str(errors_path))
+        assert 'Created 1 employees, rejected 3 records' in out
+        rejected = [json.loads(line) for line in errors_path.read_text().splitlines()]
+        assert [item['record'] for item in rejected] == [1, 2, 4]
+        assert list(rejected[0]['errors']) == ['phone_number']
+        assert rejected[1]['errors'] == {'email': ['Email already exists']}
+
+    def test_json_array_is_streamed(self, tmp_path):
+        path = tmp_path / 'staff.json'
+        path.write_text(json.dumps([record(i) for i in range(30)], indent=2))
+        with mock.patch.object(import_employees, 'READ_SIZE', 100):
+            out, _ = run(str(path), chunk_size=7)
+        assert Employee.objects.count() == 30
+
+    def test_dry_run_writes_nothing(self, tmp_path):
+        path = tmp_path / 'staff.ndjson'
+        path.write_text('\n'.join(json.dumps(record(i)) for i in range(5)) + '\n')
+        out, _ = run(str(path), dry_run=True)
+        assert 'Dry run: would have created 5 employees' in out
+        assert Employee.objects.count() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_resume_from_checkpoint(self, tmp_path):
+        # Checkpoints are written when a chunk's transaction commits.
+        path = write_csv(tmp_path / 'staff.csv', [record(i) for i in range(30)])
+        original = import_employees.Command.import_chunk
+
+        def fail_on_third_chunk(self, chunk, first, errors_file):
+            if first > 20:
+                raise RuntimeError('connection lost')
+            return original(self, chunk, first, errors_file)
+
+        with mock.patch.object(import_employees.Command, 'import_chunk', fail_on_third_chunk):
+            with pytest.raises(RuntimeError):
+                run(path, chunk_size=10)
+        assert Employee.objects.count() == 20
+        checkpoint = json.loads((tmp_path / 'staff.csv.checkpoint').read_text())
+        assert checkpoint['processed'] == 20
+
+        with pytest.raises(CommandError):
+            run(path, chunk_size=10)
+        # One second per clock reading: the last chunk takes one second.
+        with mock.patch.object(import_employees.time, 'perf_counter', side_effect=itertools.count()):
+            out, _ = run(path, chunk_size=10, resume=True, verbosity=2)
+        assert 'Created 30 employees, rejected 0 records' in out
+        # The rate counts the records of this run only, not the skipped ones.
+        assert '30 records, 30 created, 0 rejected (10 records/s)' in out
+        assert Employee.objects.count() == 30
@@ -0,0 +1,60 @@
+import pytest
+from datetime import date
+from employees.models import Employee
+
+
+def make_employee(i, joined):
+    return Employee.objects.create(
+        full_name=f'Employee {i}',
+        date_of_birth=date(1990, 1, 1),
+        gender='F',
+        phone_number='+1234567890',
+        email=f'employee{i}@example.com',
+        address='123 Main St, City',
+        job_title='Engineer',
+        department='Engineering',
+        employee_id=f'EMP{i:03d}',
+        date_of_joining=joined,
+        work_location='New York',
+    )
+
+
+@pytest.mark.django_db
+class TestEmployeeKeysetPagination:
+    @pytest.fixture
+    def employees(self):
+        # Several employees share a joining date so the id tie-breaker matters.
+        return [make_employee(i, date(2023, 1, 1 + i // 3)) for i in range(25)]
+
+    def test_page_number_mode_is_default(self, client, employees):
+        response = client.get('/api/employees/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 25
+
+    def test_cursor_mode_walks_all_rows_in_order(self, client, employees):
+        expected = list(
+            Employee.objects.order_by('-date_of_joining', '-id').values_list('id', flat=True)
+        )
+        seen = []
+        url = '/api/employees/?pagination=cursor&page_size=7'
+        while url:
+            body = client.get(url).json()
+            assert 'count' not in body
+            seen.extend(row['id'] for row in body['results'])
+            url = body['next']
+        assert seen == expected
+
+    def test_cursor_mode_previous_link(self, client, employees):
+        first = client.get('/api/employees/?pagination=cursor&page_size=5').json()
+        second = client.get(first['next']).json()
+        back = client.get(second['previous']).json()
+        assert [row['id'] for row in back['results']] == [row['id'] for row in first['results']]
+        assert back['previous'] is None
+
+    def test_cursor_mode_does_not_count(self, client, employees, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            client.get('/api/employees/?pagination=cursor')
+
+    def test_invalid_cursor_returns_404(self, client, employees):
+        response = client.get('/api/employees/?cursor=not-a-cursor')
+        assert response.status_code == 404
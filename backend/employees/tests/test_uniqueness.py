@@ -0,0 +1,73 @@
+import json
+import pytest
+from datetime import date
+from django.test.utils import override_settings
+from employees.models import Employee
+
+
+def employee_data(**overrides):
+    data = {
+        'full_name': 'John Doe',
+        'date_of_birth': '1990-01-01',
+        'gender': 'M',
+        'phone_number': '+1234567890',
+        'email': 'john.doe@example.com',
+        'address': '123 Main St, City',
+        'job_title': 'Software Engineer',
+        'department': 'Engineering',
+        'employee_id': 'EMP001',
+        'date_of_joining': '2023-01-01',
+        'work_location': 'New York',
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.django_db
+class TestEmployeeUniqueness:
+    @pytest.fixture
+    def existing(self):
+        data = employee_data()
+        data['date_of_birth'] = date(1990, 1, 1)
+        data['date_of_joining'] = date(2023, 1, 1)
+        return Employee.objects.create(**data)
+
+    def post(self, client, data):
+        return client.post('/api/employees/', json.dumps(data), content_type='application/json')
+
+    def test_create_checks_both_fields_in_one_query(self, client, django_assert_num_queries):
+        # One uniqueness query, then the savepoints of the write's
+        # transaction and of the INSERT, its search index update, the group
+        # counts (an UPDATE that finds no groups yet, so a savepoint around
+        # their INSERT) and the change log entry.
+        with django_assert_num_queries(12):
+            response = self.post(client, employee_data())
+        assert response.status_code == 201
+
+    def test_duplicate_values_return_400(self, client, existing):
+        response = self.post(client, employee_data())
+        assert response.status_code == 400
+        assert response.json() == {
+            'email': ['Email already exists'],
+            'employee_id': ['Employee ID already exists'],
+        }
+
+        response = self.post(client, employee_data(email='other@example.com'))
+        assert response.json() == {'employee_id': ['Employee ID already exists']}
+
+    def test_update_may_keep_own_values(self, client, existing):
+        response = client.put(
+            f'/api/employees/{existing.id}/',
+            json.dumps(employee_data(job_title='Senior Engineer')),
+            content_type='application/json',
+        )
+        assert response.status_code == 200
+
+    @override_settings(UNIQUE_PRECHECK=False)
+    def test_constraint_violation_maps_to_same_body(self, client, existing, django_assert_num_queries):
+        # No uniqueness query: just the INSERT and the savepoint handling of
+        # the write's transaction and of the INSERT.
+        with django_assert_num_queries(7):
+            response = self.post(client, employee_data(employee_id='EMP002'))
+        assert response.status_code == 400
+        assert response.json() == {'email': ['Email already exists']}
@@ -8,3 +8,9 @@ router.register(r'', views.EmployeeViewSet)
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+# Async views for ASGI deployments, mounted at /api/async/employees/ (core/urls.py).
+async_urlpatterns = [
+    path('', views.EmployeeAsyncView.as_view(), name='employee-async-list'),
+    path('<int:pk>/', views.EmployeeAsyncView.as_view(), name='employee-async-detail'),
+]
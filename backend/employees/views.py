@@ -1,66 +1,168 @@
 import logging
-from rest_framework import viewsets, status
+from rest_framework import exceptions, viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
+from django.http import Http404
+from core.async_views import AsyncModelView
+from core.bulk import BulkModelMixin
+from core.caching import CachedResponseMixin
+from core.changes import ChangesMixin
+from core.conditional import ConditionalGetMixin
+from core.database import SerializedWritesMixin
+from core.export import ExportMixin
+from core.fieldsets import SparseQuerysetMixin
+from core.filters import FieldFilterBackend, StableOrderingFilter
+from core.pagination import KeysetPaginationMixin, get_result_count
+from core.routers import ReplicaReadMixin
+from core.search import FullTextSearchFilter
+from core.serializers import FastListMixin
+from .aggregates import employee_counts
 from .models import Employee
+from .search import employee_search_index
 from .serializers import EmployeeSerializer
 
 # Get logger for employees app
 logger = logging.getLogger('employees')
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(
+    ReplicaReadMixin, SerializedWritesMixin, ChangesMixin, BulkModelMixin, ExportMixin, CachedResponseMixin,
+    ConditionalGetMixin, KeysetPaginationMixin, SparseQuerysetMixin, FastListMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint that allows employees to be viewed or edited.
     """
-    queryset = Employee.objects.all().order_by('-date_of_joining')
+    queryset = Employee.objects.all().order_by('-date_of_joining', '-id')
     serializer_class = EmployeeSerializer
+    keyset_ordering = ('-date_of_joining', '-id')
+    filter_backends = [FullTextSearchFilter, FieldFilterBackend, StableOrderingFilter]
+    search_index = employee_search_index
+    # Each of these is backed by an index; see Employee.Meta.indexes.
+    filter_fields = {
+        'department': ['exact', 'in'],
+        'job_title': ['exact', 'in'],
+        'work_location': ['exact', 'in'],
+        'gender': ['exact', 'in'],
+        'date_of_joining': ['exact', 'gte', 'lte'],
+    }
+    ordering_fields = ['date_of_joining', 'department', 'job_title', 'work_location', 'employee_id', 'id']
 
     def list(self, request, *args, **kwargs):
         logger.info('Fetching list of all employees')
         try:
             response = super().list(request, *args, **kwargs)
-            logger.info(f'Successfully retrieved {self.get_queryset().count()} employees')
+            logger.info('Successfully retrieved %s employees', get_result_count(self.paginator, response))
             return response
+        except exceptions.APIException:
+            # Bad page numbers or cursors are client errors, not server errors.
+            raise
         except Exception as e:
-            logger.error(f'Error fetching employees list: {str(e)}', exc_info=True)
+            logger.error('Error fetching employees list: %s', e, exc_info=True)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'], url_path=r'stats/(?P<dimension>\w+)', url_name='stats')
+    def stats(self, request, dimension, *args, **kwargs):
+        """
+        Headcount per department, work location or joining month, read
+        from the group counts (one row per group) rather than the employee
+        table. Filters do not apply. The response is cached until the next
+        write to an employee.
+        """
+        if dimension not in employee_counts.dimensions:
+            raise exceptions.NotFound(
+                f"Unknown dimension '{dimension}'; use one of: {', '.join(employee_counts.dimensions)}."
+            )
+        return self.cached_response(self.get_stats, request, dimension, *args, **kwargs)
+
+    def get_stats(self, request, dimension, *args, **kwargs):
+        groups = [{'value': value, 'count': count} for value, count in employee_counts.counts(dimension)]
+        logger.info('Fetched %s %s groups', len(groups), dimension)
+        return Response({
+            'dimension': dimension,
+            'total': sum(group['count'] for group in groups),
+            'groups': groups,
+        })
+
     def create(self, request, *args, **kwargs):
         logger.info('Creating new employee')
         try:
             response = super().create(request, *args, **kwargs)
-            logger.info(f'Successfully created employee: {response.data.get("full_name")} (ID: {response.data.get("employee_id")})')
+            logger.info(
+                'Successfully created employee: %s (ID: %s)',
+                response.data.get('full_name'), response.data.get('employee_id'),
+                extra={'object_id': response.data.get('id')},
+            )
             return response
+        except exceptions.APIException:
+            # Serializer errors keep DRF's 400 body instead of becoming a 500.
+            raise
         except ValidationError as e:
-            logger.warning(f'Validation error in employee creation: {str(e)}')
+            logger.warning('Validation error in employee creation: %s', e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f'Error creating employee: {str(e)}', exc_info=True)
+            logger.error('Error creating employee: %s', e, exc_info=True)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def get_object(self):
+        # destroy() looks the instance up for its log before the mixin
+        # does; fetch it once per request.
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
     def update(self, request, *args, **kwargs):
-        logger.info(f'Updating employee with ID: {kwargs.get("pk")}')
+        logger.info('Updating employee with ID: %s', kwargs.get('pk'))
         try:
-            instance = self.get_object()
-            logger.info(f'Current employee data before update: {instance.__dict__}')
             response = super().update(request, *args, **kwargs)
-            logger.info(f'Successfully updated employee: {response.data.get("full_name")} (ID: {response.data.get("employee_id")})')
+            logger.info(
+                'Successfully updated employee: %s (ID: %s)',
+                response.data.get('full_name'), response.data.get('employee_id'),
+                extra={'object_id': response.data.get('id')},
+            )
             return response
+        except Http404:
+            raise
+        except exceptions.APIException:
+            # Serializer errors keep DRF's 400 body instead of becoming a 500.
+            raise
         except ValidationError as e:
-            logger.warning(f'Validation error in employee update: {str(e)}')
+            logger.warning('Validation error in employee update: %s', e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f'Error updating employee: {str(e)}', exc_info=True)
+            logger.error('Error updating employee: %s', e, exc_info=True)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # Only these were written; an update that changes nothing is not saved.
+        logger.debug('Changed employee fields: %s', ', '.join(serializer.changed_fields) or 'none')
+
     def destroy(self, request, *args, **kwargs):
-        logger.info(f'Deleting employee with ID: {kwargs.get("pk")}')
+        logger.info('Deleting employee with ID: %s', kwargs.get('pk'))
         try:
             instance = self.get_object()
-            employee_info = f'{instance.full_name} (ID: {instance.employee_id})'
+            full_name, employee_id = instance.full_name, instance.employee_id
             response = super().destroy(request, *args, **kwargs)
-            logger.info(f'Successfully deleted employee: {employee_info}')
+            logger.info('Successfully deleted employee: %s (ID: %s)', full_name, employee_id)
             return response
+        except Http404:
+            raise
         except Exception as e:
-            logger.error(f'Error deleting employee: {str(e)}', exc_info=True)
+            logger.error('Error deleting employee: %s', e, exc_info=True)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class EmployeeAsyncView(AsyncModelView):
+    """
+    Async version of the list/retrieve/create/update/destroy actions of
+    EmployeeViewSet, with the same filters, search and ordering.
+    """
+    queryset = EmployeeViewSet.queryset
+    serializer_class = EmployeeSerializer
+    keyset_ordering = EmployeeViewSet.keyset_ordering
+    filter_backends = EmployeeViewSet.filter_backends
+    search_index = EmployeeViewSet.search_index
+    filter_fields = EmployeeViewSet.filter_fields
+    ordering_fields = EmployeeViewSet.ordering_fields
+    logger = logger
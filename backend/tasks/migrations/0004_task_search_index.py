@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from core.search import SearchIndex
+
+SEARCH_FIELDS = ['title', 'description']
+
+
+def create_search_index(apps, schema_editor):
+    model = apps.get_model('tasks', 'Task')
+    SearchIndex(model, SEARCH_FIELDS, register=False).create(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    model = apps.get_model('tasks', 'Task')
+    SearchIndex(model, SEARCH_FIELDS, register=False).drop(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_task_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
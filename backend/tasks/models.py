@@ -11,3 +11,23 @@ class Task(models.Model):
 
     def __str__(self):
         return self.title
+
+    class Meta:
+        indexes = [
+            # Backs the (created_at, id) keyset used for list pagination.
+            models.Index(fields=['-created_at', '-id'], name='task_created_id_idx'),
+            # Lets MAX(updated_at) for conditional list requests read one index entry.
+            models.Index(fields=['updated_at'], name='task_updated_at_idx'),
+            # ?completed= lists in keyset order. Django tests booleans as
+            # `WHERE completed` / `WHERE NOT completed`, which SQLite cannot
+            # match against an index on the column, but can against the
+            # condition of a partial index.
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(completed=False),
+                name='task_open_created_idx',
+            ),
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(completed=True),
+                name='task_done_created_idx',
+            ),
+        ]
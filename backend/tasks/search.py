@@ -0,0 +1,4 @@
+from core.search import SearchIndex
+from .models import Task
+
+task_search_index = SearchIndex(Task, ['title', 'description'])
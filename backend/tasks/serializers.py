@@ -1,11 +1,14 @@
 from rest_framework import serializers
+from core.bulk import BulkListSerializer
+from core.serializers import ChangedFieldsMixin
 from .models import Task
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(ChangedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['id', 'title', 'description', 'completed', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+        list_serializer_class = BulkListSerializer
 
     def validate_title(self, value):
         """
@@ -0,0 +1,56 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.caching import bump_model_version
+from core.changes import record_changes
+from core.models import Change
+from core.signals import post_bulk_create, post_bulk_update
+from .models import Task
+from .search import task_search_index
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_bulk_create, sender=Task)
+@receiver(post_bulk_update, sender=Task)
+def invalidate_task_caches(sender, **kwargs):
+    bump_model_version(Task)
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        task_search_index.add([instance.pk])
+    elif task_search_index.affected_by(update_fields):
+        task_search_index.update([instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    task_search_index.remove([instance.pk])
+
+
+@receiver(post_bulk_create, sender=Task)
+def index_new_tasks(sender, instances, **kwargs):
+    task_search_index.add([instance.pk for instance in instances])
+
+
+@receiver(post_bulk_update, sender=Task)
+def reindex_tasks(sender, instances, **kwargs):
+    task_search_index.update([instance.pk for instance in instances])
+
+
+@receiver(post_save, sender=Task)
+def log_task_save(sender, instance, **kwargs):
+    record_changes(Task, [instance.pk], Change.UPSERT)
+
+
+@receiver(post_delete, sender=Task)
+def log_task_delete(sender, instance, **kwargs):
+    record_changes(Task, [instance.pk], Change.DELETE)
+
+
+@receiver(post_bulk_create, sender=Task)
+@receiver(post_bulk_update, sender=Task)
+def log_task_bulk_write(sender, instances, **kwargs):
+    record_changes(Task, [instance.pk for instance in instances], Change.UPSERT)
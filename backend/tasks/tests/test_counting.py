@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import override_settings
+from core.counting import cached_count
+from tasks.models import Task
+
+
+@pytest.mark.django_db
+class TestTaskListCount:
+    @pytest.fixture(autouse=True)
+    def no_response_cache(self, settings):
+        # Every request should reach the paginator.
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+
+    @pytest.fixture
+    def tasks(self):
+        return [Task.objects.create(title=f'Task {i}') for i in range(3)]
+
+    def test_list_counts_once(self, client, tasks, django_assert_num_queries):
+        # The conditional GET aggregate counts the rows and hands the total
+        # to the paginator, which then only has to SELECT the page.
+        with django_assert_num_queries(2):
+            response = client.get('/api/tasks/')
+        assert response.json()['count'] == 3
+
+    def test_writes_invalidate_cached_count(self, client, tasks):
+        assert client.get('/api/tasks/').json()['count'] == 3
+        Task.objects.create(title='Another task')
+        assert client.get('/api/tasks/').json()['count'] == 4
+        tasks[0].delete()
+        assert client.get('/api/tasks/').json()['count'] == 3
+
+    @override_settings(COUNT_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self, client, tasks, django_assert_num_queries):
+        with django_assert_num_queries(3):
+            client.get('/api/tasks/')
+
+
+@pytest.mark.django_db
+class TestCachedCount:
+    def test_count_is_served_from_cache(self, django_assert_num_queries):
+        Task.objects.create(title='Task')
+        assert cached_count(Task.objects.all()) == 1
+        with django_assert_num_queries(0):
+            assert cached_count(Task.objects.order_by('-created_at')) == 1
+
+    def test_writes_invalidate_cached_count(self):
+        assert cached_count(Task.objects.all()) == 0
+        Task.objects.create(title='Task')
+        assert cached_count(Task.objects.all()) == 1
+
+    @override_settings(COUNT_APPROXIMATE_THRESHOLD=1, COUNT_CACHE_TIMEOUT=0)
+    def test_approximate_count_uses_table_statistics(self):
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Task.objects.create(title='Another task')
+        # The estimate only moves when the statistics are refreshed...
+        assert cached_count(Task.objects.all()) == 3
+        # ...and filtered querysets are always counted exactly.
+        assert cached_count(Task.objects.filter(completed=False)) == 4
+
+    @override_settings(COUNT_APPROXIMATE_THRESHOLD=1, COUNT_CACHE_TIMEOUT=0)
+    def test_approximate_count_ignores_partial_indexes(self):
+        # task_done_created_idx only covers the completed tasks.
+        Task.objects.bulk_create([Task(title=f'Task {i}', completed=i < 2) for i in range(10)])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE idx = 'task_done_created_idx'"
+            )
+            assert cursor.fetchone()[0].split()[0] == '2'
+        assert cached_count(Task.objects.all()) == 10
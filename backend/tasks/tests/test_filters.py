@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from benchmarks.datasets import seed_dataset
+from tasks.models import Task
+
+
+def query_plans(client, url, params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    plans = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            if 'tasks_task' in query['sql'] and query['sql'].startswith('SELECT'):
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plans.append(' | '.join(row[-1] for row in cursor.fetchall()))
+    return response, plans
+
+
+@pytest.mark.django_db
+class TestTaskFilters:
+    @pytest.fixture(autouse=True)
+    def tasks(self):
+        seed_dataset(0, 200)
+
+    def test_completed_and_date_ranges(self, client):
+        since = timezone.now() - timedelta(days=100)
+        response = client.get('/api/tasks/', {
+            'completed': 'false', 'created_at__gte': since.isoformat(), 'page_size': 100,
+        })
+        assert response.status_code == 200
+        expected = Task.objects.filter(completed=False, created_at__gte=since)
+        assert response.data['count'] == expected.count()
+        assert {row['id'] for row in response.data['results']} <= set(expected.values_list('id', flat=True))
+
+    def test_dates_without_time_zone_are_accepted(self, client, recwarn):
+        response = client.get('/api/tasks/', {'updated_at__lte': '2999-01-01'})
+        assert response.status_code == 200
+        assert response.data['count'] == 200
+        assert not [w for w in recwarn if 'naive datetime' in str(w.message)]
+
+    @pytest.mark.parametrize('params', [{'completed': 'maybe'}, {'created_at__gte': 'last week'}])
+    def test_invalid_values_are_rejected(self, client, params):
+        response = client.get('/api/tasks/', params)
+        assert response.status_code == 400
+        assert list(response.data) == list(params)
+
+    @pytest.mark.parametrize('params, index', [
+        ({'completed': 'true'}, 'task_done_created_idx'),
+        ({'completed': 'false'}, 'task_open_created_idx'),
+        ({'completed': 'false', 'pagination': 'cursor'}, 'task_open_created_idx'),
+    ])
+    def test_completed_lists_use_the_partial_indexes(self, client, params, index):
+        _, plans = query_plans(client, '/api/tasks/', params)
+        assert plans
+        for plan in plans:
+            assert index in plan, plan
+            assert 'TEMP B-TREE' not in plan, plan
+
+
+@pytest.mark.django_db
+class TestTaskSummary:
+    def test_counts(self, client, django_assert_num_queries):
+        seed_dataset(0, 50)
+        completed = Task.objects.filter(completed=True).count()
+        with django_assert_num_queries(1):
+            response = client.get('/api/tasks/summary/')
+        assert response.status_code == 200
+        assert response.data == {'completed': completed, 'open': 50 - completed, 'total': 50}
+
+    def test_filters_apply(self, client):
+        seed_dataset(0, 20)
+        response = client.get('/api/tasks/summary/', {'completed': 'true'})
+        assert response.data['open'] == 0
+        assert response.data['total'] == Task.objects.filter(completed=True).count()
+
+    def test_cached_until_a_write(self, client, django_assert_num_queries):
+        assert client.get('/api/tasks/summary/').data['total'] == 0
+        with django_assert_num_queries(0):
+            assert client.get('/api/tasks/summary/')['X-Cache'] == 'HIT'
+        client.post('/api/tasks/', {'title': 'New'}, content_type='application/json')
+        response = client.get('/api/tasks/summary/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data == {'completed': 0, 'open': 1, 'total': 1}
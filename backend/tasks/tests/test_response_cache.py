@@ -0,0 +1,60 @@
+import json
+import pytest
+from tasks.models import Task
+
+
+@pytest.mark.django_db
+class TestTaskResponseCache:
+    @pytest.fixture
+    def task(self):
+        return Task.objects.create(title='Cached task', description='Description')
+
+    def test_second_list_is_served_from_cache(self, client, task, django_assert_num_queries):
+        first = client.get('/api/tasks/')
+        assert first['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            second = client.get('/api/tasks/')
+        assert second['X-Cache'] == 'HIT'
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+
+    def test_query_params_are_part_of_the_key(self, client, task):
+        client.get('/api/tasks/')
+        assert client.get('/api/tasks/?page_size=5')['X-Cache'] == 'MISS'
+
+    def test_host_and_scheme_are_part_of_the_key(self, client, task, settings):
+        settings.ALLOWED_HOSTS = ['testserver', 'api.example.com']
+        Task.objects.bulk_create([Task(title=f'Task {i}') for i in range(30)])
+        client.get('/api/tasks/')
+        other = client.get('/api/tasks/', HTTP_HOST='api.example.com', secure=True)
+        assert other['X-Cache'] == 'MISS'
+        assert other.json()['next'].startswith('https://api.example.com/')
+
+    def test_read_before_commit_is_not_served_after_it(self, client, task, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            task.title = 'Renamed task'
+            task.save()
+            # As a concurrent read would, before the write commits.
+            client.get('/api/tasks/')
+        assert client.get('/api/tasks/')['X-Cache'] == 'MISS'
+
+    def test_if_none_match_returns_304(self, client, task):
+        etag = client.get(f'/api/tasks/{task.id}/')['ETag']
+        response = client.get(f'/api/tasks/{task.id}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.content == b''
+
+    def test_writes_invalidate_cached_responses(self, client, task):
+        etag = client.get(f'/api/tasks/{task.id}/')['ETag']
+        client.get('/api/tasks/')
+        client.put(
+            f'/api/tasks/{task.id}/',
+            json.dumps({'title': 'Renamed task'}),
+            content_type='application/json',
+        )
+        detail = client.get(f'/api/tasks/{task.id}/', HTTP_IF_NONE_MATCH=etag)
+        assert detail.status_code == 200
+        assert detail.json()['title'] == 'Renamed task'
+        listing = client.get('/api/tasks/')
+        assert listing['X-Cache'] == 'MISS'
+        assert listing.json()['results'][0]['title'] == 'Renamed task'
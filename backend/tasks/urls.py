@@ -8,3 +8,9 @@ router.register(r'', views.TaskViewSet)
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+# Async views for ASGI deployments, mounted at /api/async/tasks/ (core/urls.py).
+async_urlpatterns = [
+    path('', views.TaskAsyncView.as_view(), name='task-async-list'),
+    path('<int:pk>/', views.TaskAsyncView.as_view(), name='task-async-detail'),
+]
@@ -1,66 +1,158 @@
 import logging
-from rest_framework import viewsets, status
+from django.db.models import Count, Q
+from rest_framework import exceptions, viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
+from django.http import Http404
+from core.async_views import AsyncModelView
+from core.bulk import BulkModelMixin
+from core.caching import CachedResponseMixin
+from core.changes import ChangesMixin
+from core.conditional import ConditionalGetMixin
+from core.database import SerializedWritesMixin
+from core.export import ExportMixin
+from core.filters import FieldFilterBackend
+from core.pagination import KeysetPaginationMixin, get_result_count
+from core.routers import ReplicaReadMixin
+from core.search import FullTextSearchFilter
+from core.serializers import FastListMixin
 from .models import Task
+from .search import task_search_index
 from .serializers import TaskSerializer
 
 # Get logger for tasks app
 logger = logging.getLogger('tasks')
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(
+    ReplicaReadMixin, SerializedWritesMixin, ChangesMixin, BulkModelMixin, ExportMixin, CachedResponseMixin,
+    ConditionalGetMixin, KeysetPaginationMixin, FastListMixin, viewsets.ModelViewSet,
+):
     """
     API endpoint that allows tasks to be viewed or edited.
     """
-    queryset = Task.objects.all().order_by('-created_at')
+    queryset = Task.objects.all().order_by('-created_at', '-id')
     serializer_class = TaskSerializer
+    keyset_ordering = ('-created_at', '-id')
+    filter_backends = [FullTextSearchFilter, FieldFilterBackend]
+    search_index = task_search_index
+    # completed is backed by the partial task_open_created_idx and
+    # task_done_created_idx, the date ranges by the created_at and updated_at
+    # indexes; see Task.Meta.indexes.
+    filter_fields = {
+        'completed': ['exact'],
+        'created_at': ['gte', 'lte'],
+        'updated_at': ['gte', 'lte'],
+    }
 
     def list(self, request, *args, **kwargs):
         logger.info('Fetching list of all tasks')
         try:
             response = super().list(request, *args, **kwargs)
-            logger.info(f'Successfully retrieved {self.get_queryset().count()} tasks')
+            logger.info('Successfully retrieved %s tasks', get_result_count(self.paginator, response))
             return response
+        except exceptions.APIException:
+            # Bad page numbers or cursors are client errors, not server errors.
+            raise
         except Exception as e:
-            logger.error(f'Error fetching tasks list: {str(e)}', exc_info=True)
+            logger.error('Error fetching tasks list: %s', e, exc_info=True)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'], url_path='summary', url_name='summary')
+    def summary(self, request, *args, **kwargs):
+        """
+        Count the (filtered) tasks by status with one aggregate query. The
+        response is cached until the next write to a task.
+        """
+        return self.cached_response(self.get_summary, request, *args, **kwargs)
+
+    def get_summary(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        summary = queryset.order_by().aggregate(
+            total=Count('pk'), completed=Count('pk', filter=Q(completed=True)),
+        )
+        summary['open'] = summary['total'] - summary['completed']
+        logger.info('Summarized %s tasks', summary['total'])
+        return Response(summary)
+
     def create(self, request, *args, **kwargs):
         logger.info('Creating new task')
         try:
             response = super().create(request, *args, **kwargs)
-            logger.info(f'Successfully created task: {response.data.get("title")} (ID: {response.data.get("id")})')
+            logger.info(
+                'Successfully created task: %s (ID: %s)',
+                response.data.get('title'), response.data.get('id'),
+                extra={'object_id': response.data.get('id')},
+            )
             return response
+        except exceptions.APIException:
+            # Serializer errors keep DRF's 400 body instead of becoming a 500.
+            raise
         except ValidationError as e:
-            logger.warning(f'Validation error in task creation: {str(e)}')
+            logger.warning('Validation error in task creation: %s', e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f'Error creating task: {str(e)}', exc_info=True)
+            logger.error('Error creating task: %s', e, exc_info=True)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def get_object(self):
+        # destroy() looks the instance up for its log before the mixin
+        # does; fetch it once per request.
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
     def update(self, request, *args, **kwargs):
-        logger.info(f'Updating task with ID: {kwargs.get("pk")}')
+        logger.info('Updating task with ID: %s', kwargs.get('pk'))
         try:
-            instance = self.get_object()
-            logger.info(f'Current task data before update: {instance.__dict__}')
             response = super().update(request, *args, **kwargs)
-            logger.info(f'Successfully updated task: {response.data.get("title")} (ID: {response.data.get("id")})')
+            logger.info(
+                'Successfully updated task: %s (ID: %s)',
+                response.data.get('title'), response.data.get('id'),
+                extra={'object_id': response.data.get('id')},
+            )
             return response
+        except Http404:
+            raise
+        except exceptions.APIException:
+            # Serializer errors keep DRF's 400 body instead of becoming a 500.
+            raise
         except ValidationError as e:
-            logger.warning(f'Validation error in task update: {str(e)}')
+            logger.warning('Validation error in task update: %s', e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f'Error updating task: {str(e)}', exc_info=True)
+            logger.error('Error updating task: %s', e, exc_info=True)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # Only these were written; an update that changes nothing is not saved.
+        logger.debug('Changed task fields: %s', ', '.join(serializer.changed_fields) or 'none')
+
     def destroy(self, request, *args, **kwargs):
-        logger.info(f'Deleting task with ID: {kwargs.get("pk")}')
+        logger.info('Deleting task with ID: %s', kwargs.get('pk'))
         try:
             instance = self.get_object()
-            task_info = f'{instance.title} (ID: {instance.id})'
+            title, task_id = instance.title, instance.id
             response = super().destroy(request, *args, **kwargs)
-            logger.info(f'Successfully deleted task: {task_info}')
+            logger.info('Successfully deleted task: %s (ID: %s)', title, task_id)
             return response
+        except Http404:
+            raise
         except Exception as e:
-            logger.error(f'Error deleting task: {str(e)}', exc_info=True)
+            logger.error('Error deleting task: %s', e, exc_info=True)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TaskAsyncView(AsyncModelView):
+    """
+    Async version of the list/retrieve/create/update/destroy actions of
+    TaskViewSet, with the same filters and search.
+    """
+    queryset = TaskViewSet.queryset
+    serializer_class = TaskSerializer
+    keyset_ordering = TaskViewSet.keyset_ordering
+    filter_backends = TaskViewSet.filter_backends
+    search_index = TaskViewSet.search_index
+    filter_fields = TaskViewSet.filter_fields
+    logger = logger